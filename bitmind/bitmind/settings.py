@@ -53,6 +53,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.metrics.RequestMetricsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -86,13 +87,29 @@ WSGI_APPLICATION = "bitmind.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds (0 closes them after
+# every request, as Django does by default) and checked before being reused.
+# Set DB_POOLED=1 when DB_HOST is a transaction-pooling pgbouncer: a pooled
+# server connection cannot keep a server-side cursor open between queries.
+# Under ASGI, prefer DB_CONN_MAX_AGE=0 behind pgbouncer, since async requests
+# do not reuse persistent connections.
+
+DB_POOLED = bool(int(os.environ.get("DB_POOLED", 0)))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
         "HOST": os.environ.get("DB_HOST"),
+        "PORT": os.environ.get("DB_PORT", ""),
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": bool(int(os.environ.get("DB_CONN_HEALTH_CHECKS", 1))),
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOLED,
+        "OPTIONS": {
+            "connect_timeout": int(os.environ.get("DB_CONNECT_TIMEOUT", 5)),
+        },
     }
 }
 
@@ -149,12 +166,103 @@ AUTH_USER_MODEL = "core.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "core.throttling.AnonSlidingWindowThrottle",
+        "core.throttling.UserSlidingWindowThrottle",
+        "core.throttling.ScopedSlidingWindowThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "50/day", "user": "50/day"},
+    # Expensive endpoints set a throttle_scope and get their own budget
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "50/day",
+        "user": "50/day",
+        "export": "10/hour",
+        "import": "10/hour",
+        "valuation": "60/hour",
+        "history": "60/hour",
+        "analytics": "60/hour",
+    },
+}
+
+# Caches. CACHE_BACKEND picks where they live: "locmem" (per process, the
+# default for development), "redis" (shared by all workers, needs the redis
+# package), "file" (shared by the workers of one host) or "db" (shared, run
+# createcachetable first). CACHE_LOCATION is the Redis URL, directory or table.
+
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "bitmind"),
+    "redis": (
+        "django.core.cache.backends.redis.RedisCache",
+        "redis://127.0.0.1:6379",
+    ),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        "/tmp/bitmind",
+    ),
+    "db": ("django.core.cache.backends.db.DatabaseCache", "bitmind_cache"),
 }
+CACHE_BACKEND, CACHE_DEFAULT_LOCATION = CACHE_BACKENDS[
+    os.environ.get("CACHE_BACKEND", "locmem")
+]
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.environ.get("CACHE_LOCATION", CACHE_DEFAULT_LOCATION),
+    }
+}
+
+# Cache holding the request throttle counters; must be shared between workers
+# for the rates to hold across them
+
+THROTTLE_CACHE_ALIAS = "default"
+
+# Token -> user id cache used by core.authentication.CachedTokenAuthentication.
+# SHARED_ALIAS names an entry in CACHES to share the mappings between workers.
+
+TOKEN_AUTH_CACHE = {
+    "MAX_ENTRIES": 10000,
+    "LOCAL_TTL": 30,
+    "SHARED_ALIAS": os.environ.get("TOKEN_AUTH_CACHE_ALIAS") or None,
+    "SHARED_TTL": 300,
+}
+
+# In-memory cryptocurrency catalogue used by portfolio.catalogue. The version
+# token lives in CACHE_ALIAS; MAX_AGE bounds how long a process keeps its copy.
+
+CRYPTO_CATALOGUE = {
+    "CACHE_ALIAS": "default",
+    "MAX_AGE": 300,
+}
+
+# Rendered transaction and holdings lists kept per (user, ledger version,
+# request) by portfolio.ledger; off unless CACHE_ALIAS names an entry in CACHES
+
+LEDGER_CACHE = {
+    "CACHE_ALIAS": os.environ.get("LEDGER_CACHE_ALIAS") or None,
+    "TTL": 300,
+}
+
+# Seconds a stored Idempotency-Key response can be replayed before it is pruned
+
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Request histograms kept by core.metrics. Each process adds its observations
+# to counters in CACHE_ALIAS at most every FLUSH_INTERVAL seconds (and when it
+# serves /api/metrics/); the cache must be shared for a scrape to cover all
+# workers.
+
+REQUEST_METRICS = {
+    "CACHE_ALIAS": "default",
+    "FLUSH_INTERVAL": 10,
+}
+
+# Bearer token the Prometheus scraper sends to /api/metrics/; closed when unset
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
 
 SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
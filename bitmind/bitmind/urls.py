@@ -15,6 +15,7 @@ urlpatterns = [
     path("api/user/", include("user.urls")),
     path("api/portfolio/", include("portfolio.urls")),
     path("api/health/", core_views.HealthCheckView.as_view(), name="health-check"),
+    path("api/metrics/", core_views.MetricsView.as_view(), name="metrics"),
     path("api/schema/", SpectacularAPIView.as_view(), name="api-schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="api-schema")),
 ]
@@ -1,17 +1,51 @@
 """
 Django admin customization.
 """
+import json
+
 from core import models
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the PostgreSQL planner's row estimate instead of
+    running COUNT(*) once the estimate is above threshold. Page numbers of
+    such lists are approximate; smaller lists are counted exactly.
+    """
+
+    threshold = 100_000
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate()
+        if estimate is not None and estimate > self.threshold:
+            return estimate
+        return super().count
+
+    def estimate(self):
+        """Planned row count of the object list, None when unavailable."""
+        object_list = self.object_list
+        if not isinstance(object_list, QuerySet):
+            return None
+        if connections[object_list.db].vendor != "postgresql":
+            return None
+        plan = json.loads(object_list.explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
 class UserAdmin(BaseUserAdmin):
     """Define the admin pages for users."""
 
     ordering = ["id"]
     list_display = ["email", "name"]
+    search_fields = ["email", "name"]
     fieldsets = (
         (None, {"fields": ("email", "password")}),
         (_("Personal Info"), {"fields": ("name",)}),
@@ -47,7 +81,88 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class CryptocurrencyAdmin(admin.ModelAdmin):
+    """Define the admin pages for cryptocurrencies."""
+
+    ordering = ["symbol"]
+    list_display = ["symbol", "name"]
+    search_fields = ["symbol", "name"]
+
+
+class LedgerAdmin(admin.ModelAdmin):
+    """
+    View-only admin pages for the transaction history and holdings, and for
+    the large tables derived from them or loaded in bulk. Writes go through
+    the API, which keeps holdings, snapshots and ledger versions in step;
+    reconcile_holdings --fix repairs the ledger.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class TransactionAdmin(LedgerAdmin):
+    """Define the admin pages for transactions."""
+
+    # Newest first across all users, from txn_date_idx
+    ordering = ["-date", "-id"]
+    list_display = ["id", "user", "crypto", "type", "amount", "price", "date"]
+    list_select_related = ["user", "crypto"]
+    list_filter = ["type", "date"]
+    date_hierarchy = "date"
+    search_fields = ["=user__email", "=crypto__symbol"]
+
+
+class UserCoinAdmin(LedgerAdmin):
+    """Define the admin pages for holdings."""
+
+    ordering = ["id"]
+    list_display = ["id", "user", "crypto", "amount"]
+    list_select_related = ["user", "crypto"]
+    search_fields = ["=user__email", "=crypto__symbol"]
+
+
+class PriceTickAdmin(LedgerAdmin):
+    """Define the admin pages for price ticks, loaded by import_prices."""
+
+    ordering = ["id"]
+    list_display = ["id", "crypto", "timestamp", "price"]
+    date_hierarchy = "timestamp"
+    search_fields = ["=crypto__symbol"]
+
+
+class IdempotencyKeyAdmin(LedgerAdmin):
+    """Define the admin pages for stored Idempotency-Key responses."""
+
+    # Newest first, from the created_at index prune_idempotency_keys uses
+    ordering = ["-created_at"]
+    list_display = ["id", "user", "key", "status_code", "created_at"]
+    list_select_related = ["user"]
+    search_fields = ["=user__email", "=key"]
+
+
+class PortfolioSnapshotAdmin(LedgerAdmin):
+    """Define the admin pages for daily snapshots, built by snapshot_portfolios."""
+
+    ordering = ["id"]
+    list_display = ["id", "user", "crypto", "day", "amount", "value"]
+    list_select_related = ["user", "crypto"]
+    search_fields = ["=user__email", "=crypto__symbol"]
+
+
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Cryptocurrency)
-admin.site.register(models.Transaction)
-admin.site.register(models.UserCoin)
+admin.site.register(models.Cryptocurrency, CryptocurrencyAdmin)
+admin.site.register(models.Transaction, TransactionAdmin)
+admin.site.register(models.UserCoin, UserCoinAdmin)
+admin.site.register(models.PriceTick, PriceTickAdmin)
+admin.site.register(models.IdempotencyKey, IdempotencyKeyAdmin)
+admin.site.register(models.PortfolioSnapshot, PortfolioSnapshotAdmin)
@@ -0,0 +1,142 @@
+from core.caching import LRUCache
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (TokenAuthentication,
+                                           get_authorization_header)
+from rest_framework.authtoken.models import Token
+
+CACHE_KEY_PREFIX = "auth-token:"
+
+
+def _cache_settings():
+    return {
+        "MAX_ENTRIES": 10000,
+        "LOCAL_TTL": 30,
+        "SHARED_ALIAS": None,
+        "SHARED_TTL": 300,
+        **getattr(settings, "TOKEN_AUTH_CACHE", {}),
+    }
+
+
+_local_cache = LRUCache(
+    max_entries=_cache_settings()["MAX_ENTRIES"],
+    ttl=_cache_settings()["LOCAL_TTL"],
+)
+
+
+def _shared_cache():
+    alias = _cache_settings()["SHARED_ALIAS"]
+    return caches[alias] if alias else None
+
+
+def invalidate_token(key):
+    """Drop a token from this process's cache and from the shared cache."""
+    _local_cache.delete(key)
+    shared_cache = _shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(CACHE_KEY_PREFIX + key)
+
+
+def _user_queryset(key, user_id=None):
+    """
+    The token's user, loaded fresh. The token must still exist, so a revoked
+    token is rejected even where a cache still maps it.
+    """
+    users = get_user_model().objects.filter(auth_token__key=key)
+    if user_id is not None:
+        users = users.filter(pk=user_id)
+    return users.annotate(token_created=F("auth_token__created"))
+
+
+def _token(key, user):
+    token = Token(key=key, user=user, created=user.token_created)
+    token._state.adding = False
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that loads the token's user fresh on every request.
+
+    The user is read in one query joined to the token, so a deactivated user
+    or a revoked token is rejected at once in every process, and request.user
+    is never a stale copy that a save could write back. Only the token ->
+    user id mapping is remembered, in a bounded in-process LRU and in the
+    optional shared cache configured by TOKEN_AUTH_CACHE["SHARED_ALIAS"], so
+    the query can start from the user's primary key. Mappings of deleted
+    tokens are dropped on commit, or on the first request that finds the
+    token gone.
+    """
+
+    def authenticate_credentials(self, key):
+        user_id = _local_cache.get(key)
+        shared_cache = _shared_cache()
+        if user_id is None and shared_cache is not None:
+            user_id = shared_cache.get(CACHE_KEY_PREFIX + key)
+
+        user = _user_queryset(key, user_id).first()
+        if user is not None and user_id is None and shared_cache is not None:
+            shared_cache.set(
+                CACHE_KEY_PREFIX + key, user.pk, _cache_settings()["SHARED_TTL"]
+            )
+        if user is not None:
+            _local_cache.set(key, user.pk)
+        return self.check_user(key, user)
+
+    def check_user(self, key, user):
+        if user is None:
+            invalidate_token(key)
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return (user, _token(key, user))
+
+    def get_key(self, request):
+        """Token key from the Authorization header, None when it has none."""
+        auth = get_authorization_header(request).split()
+
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) == 1:
+            msg = _("Invalid token header. No credentials provided.")
+            raise exceptions.AuthenticationFailed(msg)
+        elif len(auth) > 2:
+            msg = _("Invalid token header. Token string should not contain spaces.")
+            raise exceptions.AuthenticationFailed(msg)
+
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            msg = _(
+                "Invalid token header. "
+                "Token string should not contain invalid characters."
+            )
+            raise exceptions.AuthenticationFailed(msg)
+
+    async def aauthenticate(self, request):
+        """Async counterpart of authenticate for async views."""
+        key = self.get_key(request)
+        if key is None:
+            return None
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        """Async counterpart of authenticate_credentials for async views."""
+        user_id = _local_cache.get(key)
+        shared_cache = _shared_cache()
+        if user_id is None and shared_cache is not None:
+            user_id = await shared_cache.aget(CACHE_KEY_PREFIX + key)
+
+        user = await _user_queryset(key, user_id).afirst()
+        if user is not None and user_id is None and shared_cache is not None:
+            await shared_cache.aset(
+                CACHE_KEY_PREFIX + key, user.pk, _cache_settings()["SHARED_TTL"]
+            )
+        if user is not None:
+            _local_cache.set(key, user.pk)
+        return self.check_user(key, user)
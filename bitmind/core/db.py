@@ -0,0 +1,59 @@
+"""
+Database helpers shared by the apps.
+"""
+import random
+import time
+
+from django.contrib.postgres import operations
+from django.db import OperationalError, connection, transaction
+from django.db.migrations import AddIndex
+
+# SQLSTATEs Postgres raises when a transaction lost a concurrency conflict
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+def is_retryable(error):
+    """Whether an error is a serialization failure or deadlock worth retrying."""
+    return getattr(error.__cause__, "pgcode", None) in RETRYABLE_SQLSTATES
+
+
+def atomic_with_retry(func, attempts=3, backoff=0.05):
+    """
+    Run func in its own transaction and return its result, retrying it with
+    jittered exponential backoff when the database aborts the transaction for
+    a serialization failure or deadlock. Inside an outer atomic block the
+    whole outer transaction is lost, so errors are raised without retrying.
+    """
+    outermost = not connection.in_atomic_block
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return func()
+        except OperationalError as e:
+            if not outermost or attempt == attempts - 1 or not is_retryable(e):
+                raise
+            time.sleep(backoff * 2**attempt * random.uniform(0.5, 1.5))
+
+
+class AddIndexConcurrently(operations.AddIndexConcurrently):
+    """
+    Builds the index with CREATE INDEX CONCURRENTLY on PostgreSQL, so writes
+    to the table are not blocked while it is built, and as a plain AddIndex
+    on other databases. Use it in migrations with atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
@@ -0,0 +1,194 @@
+"""
+Command to compare sync and async read endpoint latency under concurrency
+"""
+
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from core.models import Cryptocurrency, Transaction, UserCoin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils import timezone
+from portfolio import async_views, views
+from portfolio.benchmarks import benchmark_environment
+from rest_framework.authtoken.models import Token
+
+ENDPOINTS = {
+    "transaction": ("portfolio:transaction-list", "portfolio:async-transaction-list"),
+    "holdings": ("portfolio:holdings-list", "portfolio:async-holdings-list"),
+    "cryptocurrency": (
+        "portfolio:cryptocurrency-list",
+        "portfolio:async-cryptocurrency-list",
+    ),
+}
+
+# Symbol and email prefixes of the fixture rows, all deleted after a run
+BENCH_PREFIX = "BENCH"
+BENCH_EMAIL_PREFIX = "benchmark-"
+
+BENCHMARKED_VIEWS = [
+    views.TransactionViewSet,
+    views.UserHoldingsViewSet,
+    views.CryptocurrencyViewSet,
+    async_views.AsyncTransactionListView,
+    async_views.AsyncHoldingsListView,
+    async_views.AsyncCryptocurrencyListView,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the sync and async read endpoints in-process with many concurrent "
+        "requests and report p50/p99 latency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=2000, help="Requests per endpoint and mode"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=100, help="Requests in flight"
+        )
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=1000,
+            help="Transactions in the benchmark user's history",
+        )
+        parser.add_argument(
+            "--endpoint",
+            choices=list(ENDPOINTS),
+            action="append",
+            help="Endpoint to benchmark, may be repeated; all when omitted",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            token = self.create_fixture(options["transactions"])
+            headers = {"Authorization": f"Token {token.key}"}
+            with benchmark_environment(BENCHMARKED_VIEWS):
+                for endpoint in options["endpoint"] or list(ENDPOINTS):
+                    sync_name, async_name = ENDPOINTS[endpoint]
+                    sync_timings, sync_elapsed = self.run_sync(
+                        reverse(sync_name), headers, options
+                    )
+                    async_timings, async_elapsed = asyncio.run(
+                        self.run_async(reverse(async_name), headers, options)
+                    )
+                    self.report(f"{endpoint} sync", sync_timings, sync_elapsed)
+                    self.report(f"{endpoint} async", async_timings, async_elapsed)
+        finally:
+            # Also whatever an interrupted earlier run left behind
+            get_user_model().objects.filter(
+                email__startswith=BENCH_EMAIL_PREFIX, email__endswith="@example.com"
+            ).delete()
+            Cryptocurrency.objects.filter(symbol__startswith=BENCH_PREFIX).delete()
+
+        self.stdout.write(self.style.SUCCESS("\nBenchmark complete"))
+
+    def create_fixture(self, count):
+        """
+        A throwaway user with a transaction history and some holdings, and
+        the user's token.
+        """
+        user = get_user_model().objects.create_user(
+            email=f"{BENCH_EMAIL_PREFIX}{uuid.uuid4().hex}@example.com"
+        )
+        token = Token.objects.create(user=user)
+        coins = [f"{BENCH_PREFIX}{index}" for index in range(10)]
+        Cryptocurrency.objects.bulk_create(
+            [
+                Cryptocurrency(symbol=symbol, name=f"Benchmark {symbol}")
+                for symbol in coins
+            ],
+            # Left behind by an earlier run that could not clean up
+            ignore_conflicts=True,
+        )
+
+        start = timezone.now() - timedelta(days=count)
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user=user,
+                    crypto_id=coins[index % len(coins)],
+                    date=start + timedelta(days=index),
+                    type="buy",
+                    amount=Decimal("1"),
+                    price=Decimal("100"),
+                )
+                for index in range(count)
+            ],
+            batch_size=1000,
+        )
+        UserCoin.objects.bulk_create(
+            [UserCoin(user=user, crypto_id=symbol, amount=1) for symbol in coins]
+        )
+        return token
+
+    def run_sync(self, url, headers, options):
+        """One thread per in-flight request, each with its own connection."""
+        timings = []
+        remaining = iter(range(options["requests"]))
+        lock = threading.Lock()
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    started = time.perf_counter()
+                    response = client.get(url, headers=headers)
+                    elapsed = time.perf_counter() - started
+                    assert response.status_code == 200, response.status_code
+                    timings.append(elapsed)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker) for _ in range(options["concurrency"])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return timings, time.perf_counter() - started
+
+    async def run_async(self, url, headers, options):
+        """One event loop with up to concurrency requests in flight."""
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        timings = []
+
+        async def fetch():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                elapsed = time.perf_counter() - started
+                assert response.status_code == 200, response.status_code
+                timings.append(elapsed)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch() for _ in range(options["requests"])))
+        elapsed = time.perf_counter() - started
+        await sync_to_async(connections.close_all)()
+        return timings, elapsed
+
+    def report(self, label, timings, elapsed):
+        percentiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f"{label:>22}: p50={percentiles[49] * 1000:.1f}ms "
+            f"p99={percentiles[98] * 1000:.1f}ms "
+            f"{len(timings) / elapsed:,.0f} requests/s"
+        )
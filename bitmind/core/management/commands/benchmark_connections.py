@@ -0,0 +1,71 @@
+"""
+Command to measure what persistent connections save per request
+"""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+MODES = (
+    ("new connection per request", 0, False),
+    ("persistent", None, False),
+    ("persistent + health checks", None, True),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time simulated requests (request signals around one query) with and "
+        "without persistent database connections"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Requests per mode"
+        )
+
+    def handle(self, *args, **options):
+        saved = {
+            key: connection.settings_dict[key]
+            for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS")
+        }
+        results = {}
+        try:
+            for label, max_age, health_checks in MODES:
+                connection.close()
+                connection.settings_dict["CONN_MAX_AGE"] = max_age
+                connection.settings_dict["CONN_HEALTH_CHECKS"] = health_checks
+                results[label] = self.run(options["requests"])
+        finally:
+            connection.close()
+            connection.settings_dict.update(saved)
+
+        baseline = statistics.mean(results[MODES[0][0]])
+        for label, timings in results.items():
+            mean = statistics.mean(timings)
+            self.stdout.write(
+                f"{label:>28}: mean={mean * 1000:.2f}ms "
+                f"p50={statistics.median(timings) * 1000:.2f}ms "
+                f"saved={(baseline - mean) * 1000:.2f}ms/request"
+            )
+
+        self.stdout.write(self.style.SUCCESS("\nBenchmark complete"))
+
+    def run(self, count):
+        """
+        Go through the request cycle Django's handlers use: connections past
+        their CONN_MAX_AGE are closed on request start and finish.
+        """
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            request_finished.send(sender=self.__class__)
+            timings.append(time.perf_counter() - started)
+        return timings
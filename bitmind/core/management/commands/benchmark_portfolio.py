@@ -0,0 +1,207 @@
+"""
+Command to benchmark the portfolio endpoints against realistic data volumes
+"""
+
+import json
+import statistics
+import time
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from itertools import cycle
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from portfolio import views
+from portfolio.benchmarks import (QUERY_BUDGETS, benchmark_environment,
+                                  seed_portfolios)
+from rest_framework.authtoken.models import Token
+
+ENDPOINTS = {
+    "transaction-create": ("post", "portfolio:transaction-list"),
+    "transaction-list": ("get", "portfolio:transaction-list"),
+    "holdings-list": ("get", "portfolio:holdings-list"),
+    "cryptocurrency-search": ("get", "portfolio:cryptocurrency-list"),
+}
+
+BENCHMARKED_VIEWS = [
+    views.TransactionViewSet,
+    views.UserHoldingsViewSet,
+    views.CryptocurrencyViewSet,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users, coins and transactions, measure latency, throughput and "
+        "query counts of the portfolio endpoints and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--transactions", type=int, default=1_000_000)
+        parser.add_argument("--coins", type=int, default=5000)
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Requests per endpoint"
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=50,
+            help="Seeded users the requests are spread over",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Results file, benchmark-portfolio-<UTC time>.json by default",
+        )
+        parser.add_argument(
+            "--compare", type=Path, help="Earlier results file to compare with"
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the seeded data afterwards"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("The portfolio benchmark needs PostgreSQL.")
+
+        started_at = datetime.now(dt_timezone.utc)
+        start = time.perf_counter()
+        data = seed_portfolios(
+            options["users"], options["transactions"], options["coins"]
+        )
+        seed_seconds = time.perf_counter() - start
+        self.stdout.write(
+            f"\nSeeded {options['users']} users, {options['transactions']} "
+            f"transactions and {options['coins']} coins in {seed_seconds:.1f}s"
+        )
+
+        try:
+            users = list(data.user_queryset()[: options["clients"]])
+            tokens = Token.objects.bulk_create(
+                [Token(user=user, key=Token.generate_key()) for user in users]
+            )
+            with benchmark_environment(BENCHMARKED_VIEWS):
+                endpoints = {
+                    name: self.run(name, data, tokens, options["requests"])
+                    for name in ENDPOINTS
+                }
+        finally:
+            if not options["keep"]:
+                data.remove()
+
+        results = {
+            "started_at": started_at.isoformat(),
+            "database": connection.vendor,
+            "dataset": {
+                "users": options["users"],
+                "transactions": options["transactions"],
+                "coins": options["coins"],
+                "seed_seconds": round(seed_seconds, 2),
+            },
+            "endpoints": endpoints,
+        }
+        output = options["output"] or Path(
+            f"benchmark-portfolio-{started_at:%Y%m%dT%H%M%SZ}.json"
+        )
+        output.write_text(json.dumps(results, indent=2) + "\n")
+
+        previous = None
+        if options["compare"]:
+            previous = json.loads(options["compare"].read_text())["endpoints"]
+        for name, result in endpoints.items():
+            self.report(name, result, previous and previous.get(name))
+        self.stdout.write(f"\nResults written to {output}")
+
+        over_budget = [
+            name for name, result in endpoints.items() if result["over_budget"]
+        ]
+        if over_budget:
+            raise CommandError(f"Over the query budget: {', '.join(over_budget)}")
+        self.stdout.write(self.style.SUCCESS("\nBenchmark complete"))
+
+    def requests(self, name, data, tokens):
+        """Endless (token, request kwargs) pairs for an endpoint."""
+        for index, token in enumerate(cycle(tokens)):
+            if name == "transaction-create":
+                kwargs = {
+                    "data": {
+                        # Buys always pass the holdings check
+                        "crypto": data.coin_symbol(index),
+                        "date": timezone.now().isoformat(),
+                        "type": "buy",
+                        "amount": "1",
+                        "price": "100",
+                    },
+                    "content_type": "application/json",
+                }
+            elif name == "cryptocurrency-search":
+                kwargs = {"data": {"search": f"Perf coin {index % data.coins}"}}
+            else:
+                kwargs = {}
+            yield token, kwargs
+
+    def run(self, name, data, tokens, count):
+        """Time count sequential requests to the endpoint."""
+        method, url_name = ENDPOINTS[name]
+        url = reverse(url_name)
+        client = Client()
+        requests = self.requests(name, data, tokens)
+
+        def send(token, kwargs):
+            response = getattr(client, method)(
+                url, headers={"Authorization": f"Token {token.key}"}, **kwargs
+            )
+            if response.status_code >= 400:
+                raise CommandError(f"{name} returned {response.status_code}")
+            return response
+
+        # Warm the token and catalogue caches before counting and timing
+        for _, (token, kwargs) in zip(tokens, requests):
+            send(token, kwargs)
+        # CaptureQueriesContext would lose them to the request_started reset
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            send(*next(requests))
+
+        timings = []
+        start = time.perf_counter()
+        for _, (token, kwargs) in zip(range(count), requests):
+            started = time.perf_counter()
+            send(token, kwargs)
+            timings.append(time.perf_counter() - started)
+        elapsed = time.perf_counter() - start
+
+        percentiles = statistics.quantiles(timings, n=100)
+        return {
+            "requests": count,
+            "queries": len(queries),
+            "query_budget": QUERY_BUDGETS[name],
+            "over_budget": len(queries) > QUERY_BUDGETS[name],
+            "mean_ms": round(statistics.mean(timings) * 1000, 3),
+            "p50_ms": round(percentiles[49] * 1000, 3),
+            "p95_ms": round(percentiles[94] * 1000, 3),
+            "p99_ms": round(percentiles[98] * 1000, 3),
+            "requests_per_second": round(count / elapsed, 1),
+        }
+
+    def report(self, name, result, previous=None):
+        line = (
+            f"{name:>22}: p50={result['p50_ms']:.2f}ms "
+            f"p99={result['p99_ms']:.2f}ms "
+            f"{result['requests_per_second']:,.0f} requests/s "
+            f"queries={result['queries']}/{result['query_budget']}"
+        )
+        if previous:
+            change = result["p50_ms"] / previous["p50_ms"] - 1
+            line += f" (p50 {change:+.0%} vs previous)"
+        self.stdout.write(line)
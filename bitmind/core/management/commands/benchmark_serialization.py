@@ -0,0 +1,110 @@
+"""
+Command to compare list serialization throughput of the serializer and lean paths
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+
+from core.models import Transaction
+from core.renderers import FastJSONRenderer
+from django.core.management.base import BaseCommand, CommandError
+from portfolio.serializers import (CryptocurrencySerializer,
+                                   TransactionSerializer)
+from portfolio.views import TRANSACTION_ROWS
+from rest_framework.renderers import JSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure rows/s of serializing and rendering transaction and coin lists "
+        "through ModelSerializer and JSONRenderer versus .values() rows and "
+        "FastJSONRenderer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=10_000, help="Rows per serialized list"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Runs per path; the best is kept"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    def handle(self, *args, **options):
+        instances, rows, coins = self.synthetic_lists(options["rows"], options["seed"])
+        self.stdout.write(f"\nSerializing lists of {options['rows']} rows")
+
+        self.compare(
+            "transactions",
+            lambda: JSONRenderer().render(
+                TransactionSerializer(instances, many=True).data
+            ),
+            lambda: FastJSONRenderer().render(TRANSACTION_ROWS.represent(rows)),
+            options,
+        )
+        self.compare(
+            "cryptocurrencies",
+            lambda: JSONRenderer().render(
+                CryptocurrencySerializer(coins, many=True).data
+            ),
+            lambda: FastJSONRenderer().render(coins),
+            options,
+        )
+        self.stdout.write(self.style.SUCCESS("\nBenchmark complete"))
+
+    def compare(self, name, before, after, options):
+        if before() != after():
+            raise CommandError(f"The {name} paths render different JSON.")
+        before_rate = options["rows"] / self.best_time(before, options["repeat"])
+        after_rate = options["rows"] / self.best_time(after, options["repeat"])
+        self.stdout.write(
+            f"{name:>16}: serializer {before_rate:,.0f} rows/s, "
+            f"lean {after_rate:,.0f} rows/s ({after_rate / before_rate:.1f}x)"
+        )
+
+    def best_time(self, render, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def synthetic_lists(self, count, seed):
+        """
+        The same transactions as unsaved model instances and as the .values()
+        rows a query would return, plus catalogue entries.
+        """
+        rng = random.Random(seed)
+        scale = Decimal("0.00001")
+        start = datetime(2023, 1, 1, tzinfo=dt_timezone.utc)
+        instances, rows = [], []
+        for index in range(count):
+            row = {
+                "id": index + 1,
+                "crypto": f"C{index % 50}",
+                "date": start + timedelta(seconds=index * 61, microseconds=index),
+                "type": rng.choice(["buy", "sell"]),
+                # Stored with the model fields' scale, as the database returns them
+                "amount": (Decimal(rng.randint(1, 10**7)) / 1000).quantize(scale),
+                "price": (Decimal(rng.randint(1, 10**9)) / 100).quantize(scale),
+            }
+            rows.append(row)
+            instances.append(
+                Transaction(
+                    id=row["id"],
+                    user_id=1,
+                    crypto_id=row["crypto"],
+                    date=row["date"],
+                    type=row["type"],
+                    amount=row["amount"],
+                    price=row["price"],
+                )
+            )
+        coins = [
+            {"symbol": f"C{index}", "name": f"Coin {index}"} for index in range(count)
+        ]
+        return instances, rows, coins
@@ -2,41 +2,133 @@
 Command to import default cryptos into the database
 """
 
+import csv
 import json
+import time
 
 from core.models import Cryptocurrency
 from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from portfolio.catalogue import invalidate_catalogue
+
+SYMBOL_MAX_LENGTH = Cryptocurrency._meta.get_field("symbol").max_length
+NAME_MAX_LENGTH = Cryptocurrency._meta.get_field("name").max_length
 
 
 class Command(BaseCommand):
-    help = "Import data from a JSON file into the Cryptocurrency model"
+    help = "Import data from a JSON, CSV or NDJSON file into the Cryptocurrency model"
 
     def add_arguments(self, parser):
         parser.add_argument(
-            "json_file", type=str, help="Path to the JSON file to import"
+            "file",
+            type=str,
+            help="Path to the file to import: a JSON object of symbol -> name, "
+            "or CSV/NDJSON rows with symbol and name",
+        )
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=["json", "csv", "ndjson"],
+            help="File format, guessed from the extension when omitted",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of coins written per bulk upsert",
         )
 
     def handle(self, *args, **options):
-        json_file = options["json_file"]
+        start = time.monotonic()
+        file_format = options["file_format"] or self.guess_format(options["file"])
 
         try:
-            with open(json_file, "r") as file:
-                data = json.load(file)
-                number_imported = 0
-                for symbol, name in data.items():
-                    # Check if a Cryptocurrency object with the same symbol already exists
-                    existing_crypto = Cryptocurrency.objects.filter(
-                        symbol=symbol
-                    ).first()
-
-                    if existing_crypto is None:
-                        Cryptocurrency.objects.create(symbol=symbol, name=name)
-                        number_imported += 1
-                    else:
-                        continue
-
-                self.stdout.write(
-                    self.style.SUCCESS(f"\nImported {number_imported} Coins")
+            with open(options["file"], "r", newline="") as file:
+                counts = self.upsert(
+                    self.read_entries(file, file_format), options["batch_size"]
                 )
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"\nAn error occurred: {str(e)}"))
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nImported {counts['inserted']} Coins, updated {counts['updated']}, "
+                f"unchanged {counts['unchanged']}, skipped {counts['skipped']} "
+                f"in {time.monotonic() - start:.2f}s"
+            )
+        )
+
+    def guess_format(self, path):
+        if path.lower().endswith(".csv"):
+            return "csv"
+        if path.lower().endswith((".ndjson", ".jsonl")):
+            return "ndjson"
+        return "json"
+
+    def read_entries(self, file, file_format):
+        """Yield (symbol, name) pairs; CSV and NDJSON are streamed line by line."""
+        if file_format == "json":
+            yield from json.load(file).items()
+        elif file_format == "csv":
+            for row in csv.DictReader(file):
+                yield row.get("symbol"), row.get("name")
+        else:
+            for line in file:
+                if line.strip():
+                    row = json.loads(line)
+                    yield row.get("symbol"), row.get("name")
+
+    def upsert(self, entries, batch_size):
+        """
+        Diff the entries against one fetch of the existing catalogue and write
+        only new or renamed coins, in batches, inside a single transaction.
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+
+        with db_transaction.atomic():
+            # Published once the upsert commits, so no process rebuilds from
+            # the old rows under the new version
+            db_transaction.on_commit(invalidate_catalogue)
+            existing = dict(Cryptocurrency.objects.values_list("symbol", "name"))
+            pending = {}
+            for symbol, name in entries:
+                symbol = (symbol or "").strip()
+                name = (name or "").strip()
+                if (
+                    not symbol
+                    or not name
+                    or len(symbol) > SYMBOL_MAX_LENGTH
+                    or len(name) > NAME_MAX_LENGTH
+                ):
+                    counts["skipped"] += 1
+                    continue
+
+                if symbol not in existing:
+                    counts["inserted"] += 1
+                elif existing[symbol] != name:
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+                    continue
+
+                existing[symbol] = name
+                pending[symbol] = name
+                if len(pending) >= batch_size:
+                    self.write(pending)
+                    pending = {}
+            self.write(pending)
+
+        return counts
+
+    def write(self, pending):
+        # Keyed by symbol, so a batch never touches the same row twice
+        Cryptocurrency.objects.bulk_create(
+            [
+                Cryptocurrency(symbol=symbol, name=name)
+                for symbol, name in pending.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["symbol"],
+            update_fields=["name"],
+        )
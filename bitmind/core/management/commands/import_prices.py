@@ -0,0 +1,76 @@
+"""
+Command to bulk load historical prices from CSV files into PriceTick
+"""
+
+import csv
+from decimal import Decimal, InvalidOperation
+
+from core.models import Cryptocurrency, PriceTick
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from django.utils.dateparse import parse_datetime
+
+
+class Command(BaseCommand):
+    help = "Import price ticks from CSV files with symbol,timestamp,price columns"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "csv_files", nargs="+", type=str, help="Paths to the CSV files to import"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of ticks written per bulk insert",
+        )
+
+    def handle(self, *args, **options):
+        symbols = set(Cryptocurrency.objects.values_list("symbol", flat=True))
+        number_imported = 0
+        number_skipped = 0
+
+        for csv_file in options["csv_files"]:
+            with open(csv_file, "r", newline="") as file, db_transaction.atomic():
+                batch = []
+                for row in csv.DictReader(file):
+                    tick = self.parse_row(row, symbols)
+                    if tick is None:
+                        number_skipped += 1
+                        continue
+                    batch.append(tick)
+                    if len(batch) >= options["batch_size"]:
+                        number_imported += self.write(batch)
+                        batch = []
+                number_imported += self.write(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nImported {number_imported} price ticks, skipped {number_skipped}"
+            )
+        )
+
+    def parse_row(self, row, symbols):
+        symbol = (row.get("symbol") or "").strip().upper()
+        timestamp = parse_datetime((row.get("timestamp") or "").strip())
+        if symbol not in symbols or timestamp is None:
+            return None
+        try:
+            price = Decimal(row.get("price"))
+        except (InvalidOperation, TypeError):
+            return None
+        return PriceTick(crypto_id=symbol, timestamp=timestamp, price=price)
+
+    def write(self, batch):
+        # Re-imported ticks overwrite the stored price. A batch may repeat a
+        # tick, which one INSERT ... ON CONFLICT DO UPDATE cannot update twice
+        # on PostgreSQL, so the last row wins and the earlier ones count as
+        # overwritten like any other re-imported tick.
+        ticks = {(tick.crypto_id, tick.timestamp): tick for tick in batch}
+        PriceTick.objects.bulk_create(
+            list(ticks.values()),
+            update_conflicts=True,
+            unique_fields=["crypto", "timestamp"],
+            update_fields=["price"],
+        )
+        return len(batch)
@@ -0,0 +1,65 @@
+"""
+Command to bulk import a user's transaction history from CSV or JSON lines
+"""
+
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from portfolio.importer import TransactionImporter, guess_format, read_rows
+from rest_framework import serializers
+
+
+class Command(BaseCommand):
+    help = "Import transactions for a user from a CSV or JSON lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", type=str, help="Path to the file to import")
+        parser.add_argument(
+            "--user", required=True, help="Email of the user owning the transactions"
+        )
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=["csv", "ndjson"],
+            help="File format, guessed from the extension when omitted",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows validated and inserted per batch",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Abort and roll back the whole import on the first invalid row",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        file_format = options["file_format"] or guess_format(options["file"])
+        importer = TransactionImporter(
+            user, batch_size=options["batch_size"], strict=options["strict"]
+        )
+
+        start = time.monotonic()
+        try:
+            with open(options["file"], "r", newline="") as file:
+                report = importer.run(read_rows(file, file_format))
+        except serializers.ValidationError as e:
+            raise CommandError(f"Import aborted: {json.dumps(e.detail)}")
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nImported {report['imported']} transactions with "
+                f"{len(report['errors'])} errors in {time.monotonic() - start:.2f}s"
+            )
+        )
@@ -0,0 +1,22 @@
+"""
+Command to delete idempotency keys older than IDEMPOTENCY_KEY_TTL
+"""
+
+from core.models import IdempotencyKey
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from portfolio.idempotency import idempotency_key_ttl
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses past their time to live"
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - idempotency_key_ttl()
+        number_deleted, _ = IdempotencyKey.objects.filter(
+            created_at__lt=cutoff
+        ).delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\nPruned {number_deleted} idempotency keys")
+        )
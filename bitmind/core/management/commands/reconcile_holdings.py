@@ -0,0 +1,95 @@
+"""
+Command to check the UserCoin holdings ledger against the transaction history
+"""
+
+from core.models import Transaction, UserCoin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction as db_transaction
+from portfolio.ledger import bump_ledger_version
+
+
+class Command(BaseCommand):
+    help = "Compare UserCoin holdings with a full recompute from Transaction rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rewrite mismatched UserCoin rows with the recomputed totals",
+        )
+
+    def handle(self, *args, **options):
+        mismatches = []
+        user_ids = get_user_model().objects.order_by("id").values_list("id", flat=True)
+        for user_id in list(user_ids):
+            mismatches += self.reconcile_user(user_id, options["fix"])
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("\nHoldings ledger is consistent"))
+        elif options["fix"]:
+            self.stdout.write(
+                self.style.SUCCESS(f"\nRepaired {len(mismatches)} holdings")
+            )
+        else:
+            self.stderr.write(
+                self.style.ERROR(f"\nFound {len(mismatches)} mismatched holdings")
+            )
+
+    def reconcile_user(self, user_id, fix):
+        """
+        Compare one user's ledger with their history and, with fix, repair it.
+        Returns the mismatched (user_id, crypto_id) pairs.
+        """
+        with db_transaction.atomic():
+            ledger_rows = UserCoin.objects.filter(user_id=user_id).order_by("crypto_id")
+            if fix:
+                # Same order as the transaction writes: the holding rows, then
+                # the user row their ledger version bump updates. Writes in
+                # flight are waited for, later ones wait until the repair is in
+                ledger_rows = ledger_rows.select_for_update()
+            ledger = {
+                row["crypto_id"]: row["amount"]
+                for row in ledger_rows.values("crypto_id", "amount")
+            }
+            if fix:
+                get_user_model().objects.select_for_update().filter(
+                    pk=user_id
+                ).exists()
+            # Read after the locks, so it includes every write they waited for
+            expected = {
+                row["crypto_id"]: row["total"]
+                for row in Transaction.objects.filter(user_id=user_id)
+                .holdings()
+                .order_by()
+                if row["total"]
+            }
+
+            mismatches = sorted(
+                crypto_id
+                for crypto_id in expected.keys() | ledger.keys()
+                if expected.get(crypto_id, 0) != ledger.get(crypto_id, 0)
+            )
+            for crypto_id in mismatches:
+                self.stdout.write(
+                    f"user={user_id} crypto={crypto_id}: "
+                    f"ledger={ledger.get(crypto_id, 0)} "
+                    f"expected={expected.get(crypto_id, 0)}"
+                )
+
+            if fix:
+                for crypto_id in mismatches:
+                    total = expected.get(crypto_id, 0)
+                    if total:
+                        UserCoin.objects.update_or_create(
+                            user_id=user_id,
+                            crypto_id=crypto_id,
+                            defaults={"amount": total},
+                        )
+                    else:
+                        UserCoin.objects.filter(
+                            user_id=user_id, crypto_id=crypto_id
+                        ).delete()
+                if mismatches:
+                    bump_ledger_version([user_id])
+        return [(user_id, crypto_id) for crypto_id in mismatches]
@@ -0,0 +1,70 @@
+"""
+Command to materialize end-of-day portfolio snapshots
+"""
+
+from datetime import timedelta
+
+from core.models import PortfolioSnapshot, Transaction
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from portfolio.snapshots import snapshot_user
+
+
+def date_argument(value):
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f"'{value}' is not a YYYY-MM-DD date")
+    return day
+
+
+class Command(BaseCommand):
+    help = "Write the daily portfolio snapshots missing since each user's last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--until",
+            type=date_argument,
+            help="Last day to snapshot (YYYY-MM-DD), yesterday when omitted",
+        )
+        parser.add_argument(
+            "--user", type=str, help="Only snapshot the user with this email"
+        )
+        parser.add_argument(
+            "--since",
+            type=date_argument,
+            help="Delete and rebuild the snapshots from this day (YYYY-MM-DD) on, "
+            "e.g. after back-dated transactions",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        until = options["until"] or today - timedelta(days=1)
+        # Writes dated today do not invalidate snapshots, so today has none
+        if until >= today:
+            raise CommandError("--until must be a day before today.")
+        user_ids = Transaction.objects.order_by().values_list(
+            "user_id", flat=True
+        ).distinct()
+        if options["user"]:
+            user_ids = user_ids.filter(user__email=options["user"])
+            if not user_ids.exists():
+                raise CommandError(f"No transactions for user '{options['user']}'.")
+
+        number_created = 0
+        number_users = 0
+        for user_id in list(user_ids):
+            with db_transaction.atomic():
+                if options["since"]:
+                    PortfolioSnapshot.objects.filter(
+                        user_id=user_id, day__gte=options["since"]
+                    ).delete()
+                number_created += snapshot_user(user_id, until)
+            number_users += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nCreated {number_created} snapshots for {number_users} users"
+            )
+        )
@@ -0,0 +1,289 @@
+"""
+Per-request query count, database time and latency.
+
+RequestMetricsMiddleware times every request and the SQL it runs, reports the
+numbers to the client in a Server-Timing header and records them, labelled by
+the resolved URL name, in fixed-bucket histograms that /api/metrics/ exposes
+in the Prometheus text format. Each process buffers its observations and adds
+them to counters in the REQUEST_METRICS cache, shared by all workers, at most
+every FLUSH_INTERVAL seconds, so a scrape of any worker reports all of them.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Observation counts in fixed buckets, plus their sum and total count."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One slot per bucket upper bound and a last one for +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """(upper bound, count of observations <= bound) pairs, +Inf last."""
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    Histograms keyed by metric name and view label, kept as counters in the
+    shared cache. Observations are buffered per process under a lock and
+    flushed with cache.incr(), which needs no lock across workers.
+    """
+
+    METRICS = {
+        "bitmind_request_duration_seconds": (
+            "Time spent handling the request",
+            DURATION_BUCKETS,
+        ),
+        "bitmind_request_db_duration_seconds": (
+            "Time spent in SQL queries while handling the request",
+            DURATION_BUCKETS,
+        ),
+        "bitmind_request_queries": (
+            "SQL queries run while handling the request",
+            QUERY_BUCKETS,
+        ),
+    }
+    # cache.incr() only adds integers, so sums are stored in millionths
+    SUM_SCALE = 1_000_000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.flushed = time.monotonic()
+
+    @property
+    def cache(self):
+        return caches[settings.REQUEST_METRICS["CACHE_ALIAS"]]
+
+    def observe(self, view, duration, db_duration, queries):
+        values = {
+            "bitmind_request_duration_seconds": duration,
+            "bitmind_request_db_duration_seconds": db_duration,
+            "bitmind_request_queries": queries,
+        }
+        with self.lock:
+            for name, value in values.items():
+                histogram = self.histograms.get((name, view))
+                if histogram is None:
+                    histogram = Histogram(self.METRICS[name][1])
+                    self.histograms[(name, view)] = histogram
+                histogram.observe(value)
+            due = (
+                time.monotonic() - self.flushed
+                >= settings.REQUEST_METRICS["FLUSH_INTERVAL"]
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Add this process's buffered observations to the shared counters."""
+        with self.lock:
+            histograms, self.histograms = self.histograms, {}
+            self.flushed = time.monotonic()
+
+        for (name, view), histogram in histograms.items():
+            for slot, count in enumerate(histogram.counts):
+                if count:
+                    self.add(self.key(name, view, slot), count)
+            self.add(
+                self.key(name, view, "sum"), round(histogram.sum * self.SUM_SCALE)
+            )
+            self.add(self.key(name, view, "count"), histogram.count)
+
+    def add(self, key, delta):
+        try:
+            self.cache.incr(key, delta)
+        except ValueError:
+            # First observation; another worker may create the counter first
+            if not self.cache.add(key, delta, timeout=None):
+                self.cache.incr(key, delta)
+
+    def key(self, name, view, slot):
+        return f"metrics:{name}:{view}:{slot}"
+
+    def keys(self, name, view):
+        """Counter keys of one histogram: its buckets, then sum and count."""
+        slots = (*range(len(self.METRICS[name][1]) + 1), "sum", "count")
+        return [self.key(name, view, slot) for slot in slots]
+
+    def stored(self):
+        """Histograms of all workers, read back from the shared counters."""
+        keys = {
+            (name, view): self.keys(name, view)
+            for name in self.METRICS
+            for view in view_names()
+        }
+        values = self.cache.get_many([key for ks in keys.values() for key in ks])
+
+        histograms = {}
+        for (name, view), ks in keys.items():
+            *slots, sum_key, count_key = ks
+            if not values.get(count_key):
+                continue
+            histogram = Histogram(self.METRICS[name][1])
+            histogram.counts = [values.get(key, 0) for key in slots]
+            histogram.sum = values.get(sum_key, 0) / self.SUM_SCALE
+            histogram.count = values[count_key]
+            histograms[(name, view)] = histogram
+        return histograms
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+        self.cache.delete_many(
+            [
+                key
+                for name in self.METRICS
+                for view in view_names()
+                for key in self.keys(name, view)
+            ]
+        )
+
+    def render(self):
+        """All histograms in the Prometheus text exposition format."""
+        self.flush()
+        histograms = self.stored()
+        lines = []
+        for name, (description, _) in self.METRICS.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, view), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                label = f'view="{view}"'
+                for bound, count in histogram.cumulative_counts():
+                    bucket = f'{label},le="{bound}"'
+                    lines.append(f"{name}_bucket{{{bucket}}} {count}")
+                lines.append(f"{name}_sum{{{label}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=None)
+def view_names():
+    """Every view label a request can be recorded under."""
+    names = {"unresolved"}
+    patterns = list(get_resolver().url_patterns)
+    while patterns:
+        pattern = patterns.pop()
+        if isinstance(pattern, URLResolver):
+            patterns.extend(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return sorted(names)
+
+
+registry = MetricsRegistry()
+
+
+class QueryCollector:
+    """Query count and time of the request being handled."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+
+current_collector = ContextVar("current_collector", default=None)
+
+
+def collect_query(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request's collector."""
+    collector = current_collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.count += 1
+        collector.duration += time.perf_counter() - start
+
+
+def install_collector():
+    """Add collect_query to this thread's database connections, once each."""
+    for connection in connections.all():
+        if collect_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(collect_query)
+
+
+class RequestMetricsMiddleware:
+    """Record query count, DB time and total time of every request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        install_collector()
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_collector.reset(token)
+        return self.record(request, response, collector, start)
+
+    async def __acall__(self, request):
+        # Async views run their queries through sync_to_async, on the thread
+        # (and connections) it picks; the collector follows them there as a
+        # context variable
+        await sync_to_async(install_collector)()
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_collector.reset(token)
+        return self.record(request, response, collector, start)
+
+    def record(self, request, response, collector, start):
+        # Streaming responses (the transaction export) run their queries after
+        # the middleware returns, so only the queries up to the response count
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else "unresolved"
+        registry.observe(view, duration, collector.duration, collector.count)
+
+        response["Server-Timing"] = (
+            f"db;dur={collector.duration * 1000:.2f};"
+            f'desc="{collector.count} queries", '
+            f"total;dur={duration * 1000:.2f}"
+        )
+        return response
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:15
+
+import core.db
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        core.db.AddIndexConcurrently(
+            model_name='usercoin',
+            index=models.Index(fields=['user', '-amount'], name='usercoin_user_amount_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_transaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceTick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('price', models.DecimalField(decimal_places=5, max_digits=20)),
+                ('crypto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.cryptocurrency')),
+            ],
+            options={
+                'unique_together': {('crypto', 'timestamp')},
+            },
+        ),
+    ]
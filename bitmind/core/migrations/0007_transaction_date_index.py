@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:44
+
+import core.db
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0006_portfoliosnapshot'),
+    ]
+
+    operations = [
+        core.db.AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['-date', '-id'], name='txn_date_idx'),
+        ),
+    ]
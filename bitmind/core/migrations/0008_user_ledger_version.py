@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_transaction_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='ledger_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
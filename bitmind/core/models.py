@@ -5,8 +5,11 @@ from decimal import Decimal
 
 from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         PermissionsMixin)
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models
+from django.db import transaction as db_transaction
+from django.db.models import Case, F, Sum, When
 from django.utils import timezone
 
 
@@ -40,6 +43,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Advanced with every write to the user's transactions; see portfolio.ledger
+    ledger_version = models.PositiveBigIntegerField(default=0)
 
     objects = UserManager()
 
@@ -56,6 +61,23 @@ class Cryptocurrency(models.Model):
         return self.name
 
 
+class TransactionQuerySet(models.QuerySet):
+    """Queryset helpers shared by the holdings ledger and its reconciliation."""
+
+    def signed_amount(self):
+        """Expression for the amount with sells counted as negative."""
+        return Case(
+            When(type="sell", then=-F("amount")),
+            default=F("amount"),
+        )
+
+    def holdings(self):
+        """Net amount per (user, crypto) computed from the full history."""
+        return self.values("user_id", "crypto_id").annotate(
+            total=Sum(self.signed_amount())
+        )
+
+
 class Transaction(models.Model):
     """Transaction of a specific coin from a specific user"""
 
@@ -75,9 +97,58 @@ class Transaction(models.Model):
         max_digits=20, decimal_places=5, validators=[MinValueValidator(Decimal("0.01"))]
     )
 
+    objects = TransactionQuerySet.as_manager()
+
+    @property
+    def signed_amount(self):
+        """Amount this transaction adds to (buy) or removes from (sell) holdings."""
+        return -self.amount if self.type == "sell" else self.amount
+
     def __str__(self):
         return f"{self.user.email}: {'bought' if self.type =='buy' else 'sold'} '{self.amount} {self.crypto.symbol}' at the price of '${self.price}'"
 
+    class Meta:
+        indexes = [
+            # Transaction history listing, newest first
+            models.Index(fields=["user", "-date", "-id"], name="txn_user_date_idx"),
+            # Admin changelist across users: ordering, date hierarchy and filter
+            models.Index(fields=["-date", "-id"], name="txn_date_idx"),
+        ]
+
+
+class UserCoinManager(models.Manager):
+    """Manager for the per-user holdings ledger."""
+
+    def apply_delta(self, user, crypto_id, delta):
+        """
+        Add a signed delta to the user's holding of a coin and return the new
+        amount. The row is locked for the rest of the surrounding transaction
+        and removed once it reaches zero; a row created concurrently by another
+        writer is locked and adjusted instead of raising an IntegrityError.
+        """
+        user_coin = (
+            self.select_for_update().filter(user=user, crypto_id=crypto_id).first()
+        )
+        if user_coin is None:
+            if delta <= 0:
+                return delta
+            try:
+                with db_transaction.atomic():
+                    self.create(user=user, crypto_id=crypto_id, amount=delta)
+                return delta
+            except IntegrityError:
+                # A concurrent writer created the row first; apply on top of it
+                user_coin = self.select_for_update().get(
+                    user=user, crypto_id=crypto_id
+                )
+
+        user_coin.amount += delta
+        if user_coin.amount == 0:
+            user_coin.delete()
+        else:
+            user_coin.save(update_fields=["amount"])
+        return user_coin.amount
+
 
 class UserCoin(models.Model):
     """Coins owned of a coin X from a user."""
@@ -86,8 +157,65 @@ class UserCoin(models.Model):
     crypto = models.ForeignKey(Cryptocurrency, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=20, decimal_places=5)
 
+    objects = UserCoinManager()
+
     def __str__(self):
         return f"{self.user.email} - {self.crypto.symbol}: {self.amount}"
 
     class Meta:
         unique_together = ("user", "crypto")
+        indexes = [
+            # Holdings listing, largest position first
+            models.Index(fields=["user", "-amount"], name="usercoin_user_amount_idx"),
+        ]
+
+
+class PriceTick(models.Model):
+    """Price of a coin at a point in time."""
+
+    crypto = models.ForeignKey(Cryptocurrency, on_delete=models.CASCADE)
+    timestamp = models.DateTimeField()
+    price = models.DecimalField(max_digits=20, decimal_places=5)
+
+    def __str__(self):
+        return f"{self.crypto_id} @ {self.timestamp}: ${self.price}"
+
+    class Meta:
+        # Also serves "latest price" lookups by scanning backwards
+        unique_together = ("crypto", "timestamp")
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a write made with an Idempotency-Key header."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # SHA-256 of the method, path and body the key was first used with
+    fingerprint = models.CharField(max_length=64)
+    # Stored in the same database transaction as the write they answer
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
+
+    class Meta:
+        unique_together = ("user", "key")
+
+
+class PortfolioSnapshot(models.Model):
+    """End-of-day amount and value of one coin in a user's portfolio."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    crypto = models.ForeignKey(Cryptocurrency, on_delete=models.CASCADE)
+    day = models.DateField()
+    amount = models.DecimalField(max_digits=30, decimal_places=5)
+    # Empty when no price was known for the coin on that day
+    value = models.DecimalField(max_digits=40, decimal_places=5, null=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.crypto_id} on {self.day}: {self.amount}"
+
+    class Meta:
+        unique_together = ("user", "day", "crypto")
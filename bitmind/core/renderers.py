@@ -0,0 +1,49 @@
+"""
+JSON rendering for the API.
+
+FastJSONRenderer encodes with orjson, which writes dicts, lists, strings,
+numbers and datetimes in C. Only the values orjson does not know, such as
+Decimals, lazy strings and querysets, call back into Python, through the
+same encoder DRF's JSONRenderer uses. Indented output (?indent= and the
+browsable API) still goes through DRF's JSONRenderer.
+"""
+from decimal import Decimal
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """
+    DRF's encoder, except that Decimals follow COERCE_DECIMAL_TO_STRING like
+    the serializer DecimalField does, so rows left with Decimals render the
+    same as serialized ones.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, Decimal) and api_settings.COERCE_DECIMAL_TO_STRING:
+            return format(obj, "f")
+        return super().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    encoder_class = JSONEncoder
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=self.options
+        )
+        # Escaped by JSONRenderer too; valid JSON but not valid JavaScript
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
@@ -0,0 +1,17 @@
+"""
+Signal handlers keeping the core caches consistent with the database.
+"""
+from functools import partial
+
+from core.authentication import invalidate_token
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    # After commit, or a concurrent request could cache the old row again
+    transaction.on_commit(partial(invalidate_token, instance.key))
+
@@ -1,9 +1,17 @@
 """
 Tests for the Django admin modifications.
 """
+from unittest import skipUnless
+
+from core.admin import EstimatedCountPaginator
+from core.models import (Cryptocurrency, IdempotencyKey, PortfolioSnapshot,
+                         PriceTick, Transaction, UserCoin)
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 
 class AdminSiteTests(TestCase):
@@ -42,3 +50,160 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+
+class ChangelistQueryTests(TestCase):
+    """The transaction and holdings changelists run a fixed number of queries."""
+
+    def setUp(self):
+        self.client = Client()
+        admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com",
+            password="testpass123",
+        )
+        self.client.force_login(admin_user)
+        self.users = 0
+
+    def add_rows(self, count):
+        """Give count new users a transaction and a holding of their own coin."""
+        for _ in range(count):
+            self.users += 1
+            user = get_user_model().objects.create_user(
+                email=f"user{self.users}@example.com"
+            )
+            coin = Cryptocurrency.objects.create(
+                name=f"Coin {self.users}", symbol=f"C{self.users}"
+            )
+            Transaction.objects.create(
+                user=user,
+                crypto=coin,
+                date=timezone.now(),
+                type="buy",
+                amount=1,
+                price=100,
+            )
+            UserCoin.objects.create(user=user, crypto=coin, amount=1)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url):
+        self.add_rows(1)
+        expected = self.count_queries(url)
+        self.add_rows(10)
+
+        with self.assertNumQueries(expected):
+            res = self.client.get(url)
+
+        self.assertContains(res, "user11@example.com")
+
+    def test_transaction_changelist(self):
+        """Rows do not look up their user or coin one by one."""
+        self.assert_constant_queries(reverse("admin:core_transaction_changelist"))
+
+    def test_transaction_changelist_filtered(self):
+        url = reverse("admin:core_transaction_changelist")
+        self.assert_constant_queries(f"{url}?type__exact=buy&q=C11")
+
+    def test_usercoin_changelist(self):
+        self.assert_constant_queries(reverse("admin:core_usercoin_changelist"))
+
+    def test_ledger_pages_are_view_only(self):
+        self.add_rows(1)
+        transaction = Transaction.objects.get()
+
+        change = self.client.get(
+            reverse("admin:core_transaction_change", args=[transaction.id])
+        )
+        add = self.client.get(reverse("admin:core_transaction_add"))
+        delete = self.client.post(
+            reverse("admin:core_transaction_delete", args=[transaction.id]),
+            {"post": "yes"},
+        )
+
+        self.assertEqual(change.status_code, 200)
+        self.assertNotContains(change, 'name="_save"')
+        self.assertEqual(add.status_code, 403)
+        self.assertEqual(delete.status_code, 403)
+        self.assertTrue(Transaction.objects.exists())
+        self.assertEqual(
+            self.client.get(reverse("admin:core_usercoin_add")).status_code, 403
+        )
+
+    def test_derived_tables_are_view_only(self):
+        self.add_rows(1)
+        user = get_user_model().objects.get(email="user1@example.com")
+        coin = Cryptocurrency.objects.get()
+        tick = PriceTick.objects.create(crypto=coin, timestamp=timezone.now(), price=1)
+        key = IdempotencyKey.objects.create(
+            user=user, key="abc", fingerprint="0" * 64, status_code=201, response={}
+        )
+        snapshot = PortfolioSnapshot.objects.create(
+            user=user, crypto=coin, day=timezone.now().date(), amount=1
+        )
+
+        for model, obj in (
+            ("pricetick", tick),
+            ("idempotencykey", key),
+            ("portfoliosnapshot", snapshot),
+        ):
+            with self.subTest(model):
+                changelist = self.client.get(reverse(f"admin:core_{model}_changelist"))
+                add = self.client.get(reverse(f"admin:core_{model}_add"))
+                delete = self.client.post(
+                    reverse(f"admin:core_{model}_delete", args=[obj.id]),
+                    {"post": "yes"},
+                )
+
+                self.assertEqual(changelist.status_code, 200)
+                self.assertIsNone(changelist.context["cl"].full_result_count)
+                self.assertEqual(add.status_code, 403)
+                self.assertEqual(delete.status_code, 403)
+                self.assertTrue(type(obj).objects.filter(id=obj.id).exists())
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="user@example.com")
+        coin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        for _ in range(3):
+            Transaction.objects.create(
+                user=user,
+                crypto=coin,
+                date=timezone.now(),
+                type="buy",
+                amount=1,
+                price=100,
+            )
+
+    def test_small_lists_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(
+            Transaction.objects.order_by("id"), per_page=2
+        )
+
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_plain_lists_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(list(range(5)), per_page=2)
+
+        self.assertIsNone(paginator.estimate())
+        self.assertEqual(paginator.count, 5)
+
+    @skipUnless(connection.vendor == "postgresql", "Needs planner estimates")
+    def test_large_lists_use_the_estimate(self):
+        paginator = EstimatedCountPaginator(
+            Transaction.objects.order_by("id"), per_page=2
+        )
+        paginator.threshold = 0
+
+        with CaptureQueriesContext(connection) as queries:
+            count = paginator.count
+
+        self.assertEqual(count, paginator.estimate())
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]["sql"].startswith("EXPLAIN"))
@@ -0,0 +1,113 @@
+"""
+Tests for the cached token authentication.
+"""
+from core import authentication
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+ME_URL = reverse("user:me")
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated."""
+
+    def setUp(self):
+        authentication._local_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123", name="Test User"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_one_query_per_request(self):
+        """Test the user is loaded by the cached user id in one query."""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(authentication._local_cache.get(self.token.key), self.user.id)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.user.email)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is not authenticated."""
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_invalidated(self):
+        """Test deleting a token evicts it from the cache."""
+        self.client.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        self.assertIsNone(authentication._local_cache.get(self.token.key))
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected_while_still_cached(self):
+        """Test another process's cached mapping does not outlive the token."""
+        self.client.get(ME_URL)
+        # Deleted without this process's cache hearing of it
+        Token.objects.filter(key=self.token.key).delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(authentication._local_cache.get(self.token.key))
+
+    def test_deactivated_user_rejected_at_once(self):
+        """Test a user deactivated in the database is rejected while cached."""
+        self.client.get(ME_URL)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_each_request_gets_its_own_user(self):
+        """Test every lookup returns a fresh user and token."""
+        auth = authentication.CachedTokenAuthentication()
+        first_user, first_token = auth.authenticate_credentials(self.token.key)
+        second_user, second_token = auth.authenticate_credentials(self.token.key)
+
+        self.assertIsNot(first_user, second_user)
+        self.assertIsNot(first_token, second_token)
+        self.assertEqual(second_user, self.user)
+        self.assertEqual(second_token.user_id, self.user.id)
+        self.assertEqual(second_token.created, self.token.created)
+
+    def test_update_does_not_resurrect_a_deactivated_user(self):
+        """Test a PATCH after deactivation neither succeeds nor reactivates."""
+        self.client.get(ME_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        res = self.client.patch(ME_URL, {"name": "New Name"})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.name, "Test User")
+
+    def test_update_keeps_fields_changed_elsewhere(self):
+        """Test a PATCH writes over no column with a value read earlier."""
+        self.client.get(ME_URL)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_staff=True)
+
+        res = self.client.patch(ME_URL, {"name": "New Name"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, "New Name")
+        self.assertTrue(self.user.is_staff)
+        self.assertTrue(self.user.check_password("testpass123"))
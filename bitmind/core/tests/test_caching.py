@@ -0,0 +1,34 @@
+"""
+Tests for the in-process caches.
+"""
+from unittest.mock import patch
+
+from core.caching import LRUCache
+from django.test import SimpleTestCase
+
+
+class LRUCacheTests(SimpleTestCase):
+    """Test the bounded LRU cache."""
+
+    def test_least_recently_used_entry_evicted(self):
+        """Test the cache never grows past max_entries."""
+        cache = LRUCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+    @patch("core.caching.time.monotonic")
+    def test_expired_entry_dropped(self, patched_monotonic):
+        """Test entries are not returned after their TTL."""
+        cache = LRUCache(max_entries=2, ttl=10)
+        patched_monotonic.return_value = 100
+        cache.set("a", 1)
+
+        patched_monotonic.return_value = 111
+
+        self.assertIsNone(cache.get("a"))
@@ -3,12 +3,22 @@ Test custom Django management commands.
 """
 import json
 import tempfile
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
-from core.models import Cryptocurrency
-from django.core.management import call_command
+from core.models import (Cryptocurrency, IdempotencyKey, PortfolioSnapshot,
+                         PriceTick, Transaction, UserCoin)
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase, TestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from portfolio.benchmarks import seed_portfolios
 from psycopg2 import OperationalError as Psycopg2OpError
 
 
@@ -67,3 +77,398 @@ class ImportCryptoCurrencies(TestCase):
         finally:
             # Clean up the temporary JSON file
             temp_json_file.close()
+
+    def test_import_cryptocurrencies_upserts_in_bulk(self):
+        Cryptocurrency.objects.create(symbol="BTC", name="Bitcoin")
+        Cryptocurrency.objects.create(symbol="ETH", name="Ether")
+        data = {"BTC": "Bitcoin", "ETH": "Ethereum", "LTC": "Litecoin", "": "Nameless"}
+        with tempfile.NamedTemporaryFile(
+            mode="w+", suffix=".json", delete=False
+        ) as temp_json_file:
+            json.dump(data, temp_json_file)
+
+        out = StringIO()
+        # One fetch of existing symbols and a single bulk upsert, in a savepoint
+        with self.assertNumQueries(4):
+            call_command("import_cryptocurrencies", temp_json_file.name, stdout=out)
+
+        self.assertIn(
+            "Imported 1 Coins, updated 1, unchanged 1, skipped 1", out.getvalue()
+        )
+        self.assertEqual(Cryptocurrency.objects.get(symbol="ETH").name, "Ethereum")
+        self.assertEqual(Cryptocurrency.objects.get(symbol="LTC").name, "Litecoin")
+
+    def test_import_cryptocurrencies_from_csv_in_batches(self):
+        with tempfile.NamedTemporaryFile(
+            mode="w+", suffix=".csv", delete=False
+        ) as temp_csv_file:
+            temp_csv_file.write("symbol,name\nBTC,Bitcoin\nETH,Ethereum\nLTC,Litecoin\n")
+
+        out = StringIO()
+        call_command(
+            "import_cryptocurrencies", temp_csv_file.name, batch_size=2, stdout=out
+        )
+
+        self.assertIn("Imported 3 Coins", out.getvalue())
+        self.assertEqual(Cryptocurrency.objects.count(), 3)
+
+
+class ReconcileHoldings(TestCase):
+    """Test the holdings reconciliation command"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.crypto = Cryptocurrency.objects.create(symbol="BTC", name="Bitcoin")
+        for type, amount in (("buy", "5.0"), ("sell", "2.0")):
+            Transaction.objects.create(
+                user=self.user,
+                crypto=self.crypto,
+                date=timezone.now(),
+                type=type,
+                amount=Decimal(amount),
+                price=Decimal("100.0"),
+            )
+
+    def test_reconcile_reports_mismatch(self):
+        UserCoin.objects.create(user=self.user, crypto=self.crypto, amount=1)
+        out, err = StringIO(), StringIO()
+
+        call_command("reconcile_holdings", stdout=out, stderr=err)
+
+        self.assertIn("expected=3", out.getvalue())
+        self.assertIn("Found 1 mismatched holdings", err.getvalue())
+        self.assertEqual(UserCoin.objects.get().amount, Decimal("1"))
+
+    def test_reconcile_fix_repairs_ledger(self):
+        out = StringIO()
+
+        call_command("reconcile_holdings", "--fix", stdout=out)
+
+        self.assertIn("Repaired 1 holdings", out.getvalue())
+        self.assertEqual(UserCoin.objects.get().amount, Decimal("3"))
+
+    def test_reconcile_checks_every_user(self):
+        other = get_user_model().objects.create_user(email="other@example.com")
+        Transaction.objects.create(
+            user=other,
+            crypto=self.crypto,
+            date=timezone.now(),
+            type="buy",
+            amount=Decimal("1.0"),
+            price=Decimal("100.0"),
+        )
+        out, err = StringIO(), StringIO()
+
+        call_command("reconcile_holdings", stdout=out, stderr=err)
+
+        self.assertIn(f"user={self.user.id} crypto=BTC", out.getvalue())
+        self.assertIn(f"user={other.id} crypto=BTC", out.getvalue())
+        self.assertIn("Found 2 mismatched holdings", err.getvalue())
+
+    def test_reconcile_report_takes_no_locks(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command("reconcile_holdings", stdout=StringIO(), stderr=StringIO())
+
+        self.assertFalse(any("FOR UPDATE" in query["sql"] for query in queries))
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "Needs row locks")
+    def test_reconcile_fix_locks_the_users_holdings(self):
+        UserCoin.objects.create(user=self.user, crypto=self.crypto, amount=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command("reconcile_holdings", "--fix", stdout=StringIO())
+
+        # Holdings first, then the user row, before the history is read
+        sqls = [query["sql"] for query in queries]
+        history = next(i for i, sql in enumerate(sqls) if "core_transaction" in sql)
+        locks = [sql for sql in sqls[:history] if "FOR UPDATE" in sql]
+        self.assertEqual(len(locks), 2)
+        self.assertIn('FROM "core_usercoin"', locks[0])
+        self.assertIn('FROM "core_user"', locks[1])
+
+
+class ImportTransactions(TestCase):
+    """Test the transaction import command"""
+
+    def test_import_transactions_command(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        crypto = Cryptocurrency.objects.create(symbol="BTC", name="Bitcoin")
+        with tempfile.NamedTemporaryFile(
+            mode="w+", suffix=".csv", delete=False
+        ) as temp_csv_file:
+            temp_csv_file.write(
+                "crypto,date,type,amount,price\n"
+                "BTC,2023-09-01T00:00:00Z,buy,3.0,100.0\n"
+                "BTC,2023-09-02T00:00:00Z,sell,1.0,100.0\n"
+            )
+
+        out = StringIO()
+        call_command(
+            "import_transactions", temp_csv_file.name, user=user.email, stdout=out
+        )
+
+        self.assertIn("Imported 2 transactions with 0 errors", out.getvalue())
+        self.assertEqual(
+            UserCoin.objects.get(user=user, crypto=crypto).amount, Decimal("2.0")
+        )
+
+
+class ImportPrices(TestCase):
+    """Test the price tick import command"""
+
+    def test_import_prices_command(self):
+        Cryptocurrency.objects.create(symbol="BTC", name="Bitcoin")
+        with tempfile.NamedTemporaryFile(
+            mode="w+", suffix=".csv", delete=False
+        ) as temp_csv_file:
+            temp_csv_file.write(
+                "symbol,timestamp,price\n"
+                "BTC,2023-09-01T00:00:00Z,100.0\n"
+                "BTC,2023-09-01T00:00:00Z,110.0\n"
+                "XXX,2023-09-01T00:00:00Z,1.0\n"
+            )
+
+        out = StringIO()
+        call_command("import_prices", temp_csv_file.name, batch_size=1, stdout=out)
+
+        self.assertIn("Imported 2 price ticks, skipped 1", out.getvalue())
+        self.assertEqual(PriceTick.objects.get().price, Decimal("110.0"))
+
+    def test_import_prices_repeated_tick_in_one_batch(self):
+        Cryptocurrency.objects.create(symbol="BTC", name="Bitcoin")
+        with tempfile.NamedTemporaryFile(
+            mode="w+", suffix=".csv", delete=False
+        ) as temp_csv_file:
+            temp_csv_file.write(
+                "symbol,timestamp,price\n"
+                "BTC,2023-09-01T00:00:00Z,100.0\n"
+                "BTC,2023-09-01T01:00:00Z,105.0\n"
+                "BTC,2023-09-01T00:00:00Z,110.0\n"
+            )
+
+        out = StringIO()
+        call_command("import_prices", temp_csv_file.name, stdout=out)
+
+        self.assertIn("Imported 3 price ticks, skipped 0", out.getvalue())
+        prices = PriceTick.objects.order_by("timestamp").values_list("price", flat=True)
+        self.assertEqual(list(prices), [Decimal("110.0"), Decimal("105.0")])
+
+
+class BenchmarkCostBasis(SimpleTestCase):
+    """Test the cost basis benchmark command"""
+
+    def test_benchmark_cost_basis_command(self):
+        out = StringIO()
+
+        call_command("benchmark_cost_basis", transactions=500, coins=3, stdout=out)
+
+        for method in ("fifo", "lifo", "average"):
+            self.assertIn(f"{method}:", out.getvalue())
+
+
+class BenchmarkSerialization(SimpleTestCase):
+    """Test the list serialization benchmark command"""
+
+    def test_benchmark_serialization_command(self):
+        out = StringIO()
+
+        call_command("benchmark_serialization", rows=200, repeat=1, stdout=out)
+
+        for name in ("transactions", "cryptocurrencies"):
+            self.assertIn(f"{name}: serializer", out.getvalue())
+        self.assertIn("Benchmark complete", out.getvalue())
+
+
+class BenchmarkAsyncViews(TransactionTestCase):
+    """Test the sync/async view benchmark command"""
+
+    def test_benchmark_async_views_command(self):
+        out = StringIO()
+
+        call_command(
+            "benchmark_async_views",
+            requests=4,
+            concurrency=2,
+            transactions=10,
+            endpoint=["holdings"],
+            stdout=out,
+        )
+
+        self.assertIn("holdings sync:", out.getvalue())
+        self.assertIn("holdings async:", out.getvalue())
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_benchmark_async_views_rerun_after_interrupted_run(self):
+        # Coins and a user an interrupted run left behind
+        for index in range(10):
+            Cryptocurrency.objects.create(symbol=f"BENCH{index}", name="Benchmark")
+        get_user_model().objects.create_user(email="benchmark-left@example.com")
+        out = StringIO()
+
+        call_command(
+            "benchmark_async_views",
+            requests=4,
+            concurrency=2,
+            transactions=10,
+            endpoint=["holdings"],
+            stdout=out,
+        )
+
+        self.assertIn("Benchmark complete", out.getvalue())
+        self.assertFalse(Cryptocurrency.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class BenchmarkConnections(TransactionTestCase):
+    """Test the persistent connection benchmark command"""
+
+    def test_benchmark_connections_command(self):
+        out = StringIO()
+
+        call_command("benchmark_connections", requests=3, stdout=out)
+
+        self.assertIn("new connection per request:", out.getvalue())
+        self.assertIn("persistent + health checks:", out.getvalue())
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "Seeding uses generate_series"
+)
+class BenchmarkPortfolio(TestCase):
+    """Test the portfolio benchmark command and its data seeding"""
+
+    def test_seeded_holdings_match_history(self):
+        data = seed_portfolios(users=4, transactions=400, coins=30)
+
+        self.assertEqual(data.user_queryset().count(), 4)
+        self.assertEqual(data.coin_queryset().count(), 30)
+        self.assertEqual(Transaction.objects.count(), 400)
+        expected = {
+            (row["user_id"], row["crypto_id"]): row["total"]
+            for row in Transaction.objects.holdings()
+        }
+        ledger = {
+            (user_coin.user_id, user_coin.crypto_id): user_coin.amount
+            for user_coin in UserCoin.objects.all()
+        }
+        self.assertEqual(ledger, expected)
+        self.assertTrue(all(total > 0 for total in expected.values()))
+
+    def test_benchmark_portfolio_command(self):
+        out = StringIO()
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "benchmark_portfolio",
+                f"--output={output.name}",
+                users=3,
+                transactions=100,
+                coins=25,
+                requests=3,
+                clients=2,
+                stdout=out,
+            )
+            results = json.load(output)
+
+        self.assertEqual(results["dataset"]["transactions"], 100)
+        self.assertEqual(
+            set(results["endpoints"]),
+            {
+                "transaction-create",
+                "transaction-list",
+                "holdings-list",
+                "cryptocurrency-search",
+            },
+        )
+        for result in results["endpoints"].values():
+            self.assertFalse(result["over_budget"])
+            self.assertEqual(result["requests"], 3)
+        self.assertIn("Benchmark complete", out.getvalue())
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class PruneIdempotencyKeys(TestCase):
+    """Test the idempotency key pruning command"""
+
+    def test_prune_idempotency_keys_command(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        IdempotencyKey.objects.create(
+            user=user,
+            key="old",
+            fingerprint="x" * 64,
+            created_at=timezone.now() - timedelta(days=2),
+        )
+        IdempotencyKey.objects.create(user=user, key="new", fingerprint="x" * 64)
+
+        out = StringIO()
+        call_command("prune_idempotency_keys", stdout=out)
+
+        self.assertIn("Pruned 1 idempotency keys", out.getvalue())
+        self.assertEqual(IdempotencyKey.objects.get().key, "new")
+
+
+class SnapshotPortfolios(TestCase):
+    """Test the portfolio snapshot command"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        Transaction.objects.create(
+            user=self.user,
+            crypto=self.bitcoin,
+            date="2023-09-01T10:00:00Z",
+            type="buy",
+            amount=Decimal("1"),
+            price=Decimal("100"),
+        )
+
+    def test_snapshot_portfolios_command(self):
+        out = StringIO()
+        call_command("snapshot_portfolios", "--until=2023-09-03", stdout=out)
+
+        self.assertIn("Created 3 snapshots for 1 users", out.getvalue())
+
+        call_command("snapshot_portfolios", "--until=2023-09-03", stdout=out)
+        self.assertIn("Created 0 snapshots for 1 users", out.getvalue())
+
+    def test_until_must_be_before_today(self):
+        today = timezone.now().date()
+
+        with self.assertRaisesMessage(CommandError, "--until must be a day before"):
+            call_command("snapshot_portfolios", f"--until={today}", stdout=StringIO())
+
+    def test_since_rebuilds_back_dated_history(self):
+        call_command("snapshot_portfolios", "--until=2023-09-03", stdout=StringIO())
+        Transaction.objects.create(
+            user=self.user,
+            crypto=self.bitcoin,
+            date="2023-09-02T10:00:00Z",
+            type="buy",
+            amount=Decimal("1"),
+            price=Decimal("100"),
+        )
+
+        call_command(
+            "snapshot_portfolios",
+            "--until=2023-09-03",
+            "--since=2023-09-02",
+            "--user=user@example.com",
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(
+            list(
+                PortfolioSnapshot.objects.order_by("day").values_list(
+                    "amount", flat=True
+                )
+            ),
+            [Decimal("1"), Decimal("2"), Decimal("2")],
+        )
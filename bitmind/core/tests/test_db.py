@@ -0,0 +1,46 @@
+"""
+Tests for the database helpers.
+"""
+from unittest.mock import MagicMock, patch
+
+from core.db import atomic_with_retry
+from django.db import OperationalError
+from django.test import TransactionTestCase
+
+
+def conflict(pgcode):
+    """Build a wrapped driver error carrying a Postgres SQLSTATE."""
+    cause = Exception("conflict")
+    cause.pgcode = pgcode
+    error = OperationalError("conflict")
+    error.__cause__ = cause
+    return error
+
+
+@patch("core.db.time.sleep")
+class AtomicWithRetryTests(TransactionTestCase):
+    """Test retrying transactions that lost a concurrency conflict."""
+
+    def test_serialization_failure_is_retried(self, patched_sleep):
+        """Test a serialization failure runs the function again."""
+        func = MagicMock(side_effect=[conflict("40001"), conflict("40P01"), "done"])
+
+        self.assertEqual(atomic_with_retry(func), "done")
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(patched_sleep.call_count, 2)
+
+    def test_retries_are_bounded(self, patched_sleep):
+        """Test the error is raised once the attempts are used up."""
+        func = MagicMock(side_effect=conflict("40001"))
+
+        with self.assertRaises(OperationalError):
+            atomic_with_retry(func, attempts=2)
+        self.assertEqual(func.call_count, 2)
+
+    def test_other_errors_are_not_retried(self, patched_sleep):
+        """Test errors other than conflicts are raised immediately."""
+        func = MagicMock(side_effect=conflict("08006"))
+
+        with self.assertRaises(OperationalError):
+            atomic_with_retry(func)
+        func.assert_called_once()
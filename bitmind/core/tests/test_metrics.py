@@ -0,0 +1,166 @@
+"""
+Tests for the request metrics middleware and the metrics endpoint.
+"""
+import re
+
+from core.metrics import Histogram, MetricsRegistry, registry
+from core.models import Cryptocurrency, Transaction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+METRICS_URL = reverse("metrics")
+TRANSACTIONS_URL = reverse("portfolio:transaction-list")
+SERVER_TIMING = re.compile(
+    r'^db;dur=\d+\.\d{2};desc="(\d+) queries", total;dur=\d+\.\d{2}$'
+)
+
+
+class HistogramTests(TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 3, 7):
+            histogram.observe(value)
+
+        self.assertEqual(
+            list(histogram.cumulative_counts()), [(1, 2), (5, 3), ("+Inf", 4)]
+        )
+        self.assertEqual(histogram.sum, 11)
+        self.assertEqual(histogram.count, 4)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        Transaction.objects.create(
+            user=self.user,
+            crypto=bitcoin,
+            date=timezone.now(),
+            type="buy",
+            amount=1,
+            price=100,
+        )
+
+    def metric(self, name, view):
+        match = re.search(
+            rf'^{name}{{view="{view}"}} (\S+)$', registry.render(), re.MULTILINE
+        )
+        return match and float(match.group(1))
+
+    def test_server_timing_header(self):
+        """The header reports the queries the request ran."""
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(TRANSACTIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        match = SERVER_TIMING.match(res["Server-Timing"])
+        self.assertIsNotNone(match, res["Server-Timing"])
+        self.assertEqual(int(match.group(1)), len(context.captured_queries))
+
+    def test_recorded_by_url_name(self):
+        self.client.get(TRANSACTIONS_URL)
+        self.client.get(TRANSACTIONS_URL)
+        self.client.get("/api/does-not-exist/")
+
+        self.assertEqual(
+            self.metric("bitmind_request_duration_seconds_count", "transaction-list"),
+            2,
+        )
+        self.assertEqual(
+            self.metric("bitmind_request_queries_count", "transaction-list"), 2
+        )
+        self.assertGreater(
+            self.metric("bitmind_request_queries_sum", "transaction-list"), 0
+        )
+        self.assertEqual(
+            self.metric("bitmind_request_duration_seconds_count", "unresolved"), 1
+        )
+
+    async def test_async_view_queries_counted(self):
+        """Queries run through sync_to_async count towards the request."""
+        res = await AsyncClient().get(
+            reverse("portfolio:async-transaction-list"),
+            headers={"Authorization": f"Token {self.token.key}"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        queries = int(SERVER_TIMING.match(res["Server-Timing"]).group(1))
+        self.assertGreater(queries, 0)
+        self.assertEqual(
+            self.metric("bitmind_request_queries_sum", "async-transaction-list"),
+            queries,
+        )
+
+    def test_other_workers_are_reported(self):
+        """Observations flushed by another process show up in the scrape."""
+        self.client.get(TRANSACTIONS_URL)
+        other_worker = MetricsRegistry()
+        other_worker.observe("transaction-list", 0.2, 0.1, 4)
+        other_worker.flush()
+
+        self.assertEqual(
+            self.metric("bitmind_request_queries_count", "transaction-list"), 2
+        )
+        self.assertEqual(
+            self.metric("bitmind_request_duration_seconds_count", "transaction-list"),
+            2,
+        )
+
+    @override_settings(REQUEST_METRICS={"CACHE_ALIAS": "default", "FLUSH_INTERVAL": 0})
+    def test_flushed_to_the_cache(self):
+        self.client.get(TRANSACTIONS_URL)
+
+        self.assertFalse(registry.histograms)
+        self.assertEqual(
+            cache.get("metrics:bitmind_request_queries:transaction-list:count"), 1
+        )
+
+    @override_settings(METRICS_TOKEN="scraper-secret")
+    def test_metrics_endpoint(self):
+        self.client.get(TRANSACTIONS_URL)
+
+        res = APIClient().get(
+            METRICS_URL, headers={"Authorization": "Bearer scraper-secret"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = res.content.decode()
+        self.assertIn("# TYPE bitmind_request_duration_seconds histogram", body)
+        self.assertIn(
+            'bitmind_request_queries_bucket{view="transaction-list",le="+Inf"} 1',
+            body,
+        )
+
+    @override_settings(METRICS_TOKEN="scraper-secret")
+    def test_metrics_token(self):
+        client = APIClient()
+
+        self.assertEqual(
+            client.get(METRICS_URL).status_code, status.HTTP_403_FORBIDDEN
+        )
+        res = client.get(
+            METRICS_URL, headers={"Authorization": "Bearer scraper-secret"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_closed_without_token(self):
+        res = APIClient().get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
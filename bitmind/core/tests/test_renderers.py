@@ -0,0 +1,48 @@
+"""
+Tests for the API JSON renderer.
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from core.renderers import FastJSONRenderer
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy as _
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_json_renderer(self):
+        data = {
+            "results": [
+                {"id": 1, "name": "Bitcoin ₿", "amount": "1.50000", "held": True},
+                {"id": 2, "name": None, "amount": "0.01000", "held": False},
+            ],
+            "next": None,
+            "detail": _("Not found."),
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_decimals_and_datetimes_render_like_serializer_fields(self):
+        data = {
+            "amount": Decimal("2.50000"),
+            "date": datetime(2023, 9, 1, 12, 0, 0, 1500, tzinfo=timezone.utc),
+        }
+
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            b'{"amount":"2.50000","date":"2023-09-01T12:00:00.001500Z"}',
+        )
+
+    def test_indented_output_keeps_decimals_as_strings(self):
+        rendered = FastJSONRenderer().render(
+            {"amount": Decimal("2.50000")}, "application/json; indent=2"
+        )
+
+        self.assertEqual(rendered, b'{\n  "amount": "2.50000"\n}')
+
+    def test_line_separators_are_escaped(self):
+        data = {"name": "a\u2028b\u2029c"}
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b"")
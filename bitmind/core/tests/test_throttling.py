@@ -0,0 +1,162 @@
+"""
+Tests for the sliding window throttles.
+"""
+from unittest.mock import patch
+
+from core.throttling import ScopedSlidingWindowThrottle, UserSlidingWindowThrottle
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework.views import APIView
+
+RATES = {"anon": "3/min", "user": "3/min", "valuation": "2/min"}
+
+
+class View(APIView):
+    throttle_scope = "valuation"
+
+
+class SlidingWindowThrottleTests(TestCase):
+    """Test the sliding window counts requests over the last period."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.now = 1_000_000.0
+        patch.object(
+            SimpleRateThrottle, "timer", lambda throttle: self.now
+        ).start()
+        patch.object(UserSlidingWindowThrottle, "THROTTLE_RATES", RATES).start()
+        patch.object(ScopedSlidingWindowThrottle, "THROTTLE_RATES", RATES).start()
+        self.addCleanup(patch.stopall)
+
+    def request(self, user=None):
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user or self.user)
+        # Run the request through APIView so request.user is populated
+        return View().initialize_request(request)
+
+    def allow(self, throttle_class, user=None):
+        throttle = throttle_class()
+        allowed = throttle.allow_request(self.request(user), View())
+        return allowed, throttle
+
+    def test_window_allows_num_requests(self):
+        results = [self.allow(UserSlidingWindowThrottle)[0] for _ in range(4)]
+
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_no_second_burst_across_a_minute_boundary(self):
+        # Two seconds before a minute boundary
+        self.now = 1_000_018.0
+        results = [self.allow(UserSlidingWindowThrottle)[0] for _ in range(3)]
+
+        # A fixed window would start over here with three more requests
+        self.now += 2
+        results += [self.allow(UserSlidingWindowThrottle)[0] for _ in range(3)]
+
+        self.assertEqual(results, [True, True, True, False, False, False])
+
+    def test_previous_period_slides_out_of_the_window(self):
+        self.now = 1_000_018.0
+        for _ in range(3):
+            self.allow(UserSlidingWindowThrottle)
+
+        # Half of the previous minute still counts: 1.5 requests
+        self.now += 32
+        results = [self.allow(UserSlidingWindowThrottle)[0] for _ in range(3)]
+
+        self.assertEqual(results, [True, False, False])
+
+    def test_wait_is_until_a_request_is_allowed(self):
+        self.now = 1_000_018.0
+        for _ in range(3):
+            self.allow(UserSlidingWindowThrottle)
+        self.now += 2
+
+        allowed, throttle = self.allow(UserSlidingWindowThrottle)
+
+        self.assertFalse(allowed)
+        # A third of the previous minute has to slide out for one more request
+        self.assertAlmostEqual(throttle.wait(), 20)
+        self.now += 19
+        self.assertFalse(self.allow(UserSlidingWindowThrottle)[0])
+        self.now += 2
+        self.assertTrue(self.allow(UserSlidingWindowThrottle)[0])
+
+    def test_rejected_requests_do_not_count(self):
+        for _ in range(10):
+            self.allow(UserSlidingWindowThrottle)
+
+        # A third of the previous minute still counts, as one request, not 3.3
+        self.now += 60
+        results = [self.allow(UserSlidingWindowThrottle)[0] for _ in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+
+    def test_each_user_has_own_window(self):
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="testpass123"
+        )
+        for _ in range(3):
+            self.allow(UserSlidingWindowThrottle)
+
+        self.assertFalse(self.allow(UserSlidingWindowThrottle)[0])
+        self.assertTrue(self.allow(UserSlidingWindowThrottle, other_user)[0])
+
+    def test_no_lock_and_two_cache_operations_per_request(self):
+        self.allow(UserSlidingWindowThrottle)
+
+        with patch.object(cache, "incr", wraps=cache.incr) as incr, patch.object(
+            cache, "get", wraps=cache.get
+        ) as get, patch.object(cache, "set", wraps=cache.set) as set:
+            self.allow(UserSlidingWindowThrottle)
+
+        self.assertEqual(incr.call_count, 1)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(set.call_count, 0)
+
+    def test_scoped_window_is_separate_from_user_window(self):
+        results = [self.allow(ScopedSlidingWindowThrottle)[0] for _ in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertTrue(self.allow(UserSlidingWindowThrottle)[0])
+
+    def test_views_without_scope_are_not_scoped(self):
+        throttle = ScopedSlidingWindowThrottle()
+
+        self.assertTrue(throttle.allow_request(self.request(), APIView()))
+
+
+class ScopedEndpointThrottleTests(TestCase):
+    """Test expensive endpoints are limited by their own scope."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        patch.object(ScopedSlidingWindowThrottle, "THROTTLE_RATES", RATES).start()
+        self.addCleanup(patch.stopall)
+
+    def test_valuation_has_its_own_budget(self):
+        url = reverse("portfolio:valuation")
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(
+            self.client.get(reverse("portfolio:holdings-list")).status_code,
+            status.HTTP_200_OK,
+        )
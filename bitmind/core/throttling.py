@@ -0,0 +1,103 @@
+"""
+Sliding window request throttles backed by the shared cache.
+
+DRF's rate throttles keep a list of request timestamps per client and rewrite
+it on every request: a read, a list trim and a write that race between
+workers. These throttles keep one counter per client and period instead,
+created with cache.add() and advanced with cache.incr(), and weigh the
+previous period's counter by how much of it still overlaps the last
+duration seconds. A client is held to about num_requests per duration at any
+point, with no boundary at which a fixed window would let a second full
+burst through. A rejected request is taken back off the counter with
+cache.decr(), as DRF only records allowed requests. No lock is taken: add(),
+incr() and decr() are single atomic operations on Redis and LocMemCache; the
+file and database caches emulate incr() with a get and a set, so concurrent
+workers there can undercount.
+
+The counters live in THROTTLE_CACHE_ALIAS, which should be a cache shared by
+all workers (see CACHES), preferably Redis.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import (AnonRateThrottle, ScopedRateThrottle,
+                                       UserRateThrottle)
+
+
+class SlidingWindowMixin:
+    """Replaces SimpleRateThrottle's request history with period counters."""
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "THROTTLE_CACHE_ALIAS", "default")]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        period = int(self.now // self.duration)
+        self.elapsed = self.now - period * self.duration
+        counter = f"{self.key}:{period}"
+        self.spent = self.count(counter)
+        self.previous = 0
+        if self.spent <= self.num_requests:
+            self.previous = self.cache.get(f"{self.key}:{period - 1}", 0)
+            overlap = 1 - self.elapsed / self.duration
+            if self.previous * overlap + self.spent <= self.num_requests:
+                return True
+
+        # Rejected requests do not count against the client
+        self.cache.decr(counter)
+        self.spent -= 1
+        return False
+
+    def count(self, counter):
+        """Count a request in counter and return its new value."""
+        try:
+            return self.cache.incr(counter)
+        except ValueError:
+            # First request of the period; another worker may create it first.
+            # Kept while it is the current or the previous period.
+            if self.cache.add(counter, 1, 2 * self.duration):
+                return 1
+            return self.cache.incr(counter)
+
+    def wait(self):
+        """Seconds until a request would be allowed again."""
+        allowance = self.num_requests - 1
+        if self.spent <= allowance and self.previous:
+            # Until enough of the previous period has slid out of the window
+            overlap = (allowance - self.spent) / self.previous
+            return max((1 - overlap) * self.duration - self.elapsed, 0)
+        # Into the next period, until enough of this one has slid out
+        overlap = allowance / self.spent
+        return self.duration - self.elapsed + (1 - overlap) * self.duration
+
+
+class AnonSlidingWindowThrottle(SlidingWindowMixin, AnonRateThrottle):
+    """Sliding window per client IP for unauthenticated requests."""
+
+
+class UserSlidingWindowThrottle(SlidingWindowMixin, UserRateThrottle):
+    """Sliding window per user, or per client IP when unauthenticated."""
+
+
+class ScopedSlidingWindowThrottle(SlidingWindowMixin, ScopedRateThrottle):
+    """
+    Separate sliding window per user for views (or viewset actions) that set
+    a throttle_scope, on top of the anon/user budgets. Views without a scope
+    are not limited by it.
+    """
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
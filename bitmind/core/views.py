@@ -1,7 +1,14 @@
 """
 Core views for app.
 """
-from rest_framework import serializers, status
+import secrets
+
+from core.metrics import registry
+from django.conf import settings
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import renderers, serializers, status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -13,3 +20,43 @@ class HealthCheckView(APIView):
     def get(self, request, *args, **kwargs):
         data = {"healthy": True}
         return Response(data, status=status.HTTP_200_OK)
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    media_type = "text/plain"
+    format = "txt"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Error responses
+        return "".join(f"{key}: {value}\n" for key, value in data.items()).encode(
+            self.charset
+        )
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of all workers in the Prometheus text format. Requires
+    "Authorization: Bearer <METRICS_TOKEN>", and is closed while METRICS_TOKEN
+    is unset.
+    """
+
+    renderer_classes = [PrometheusRenderer]
+    authentication_classes = []
+    # Scrapes must not be rate limited; only the scraper holds the token
+    throttle_classes = []
+
+    @extend_schema(responses={(200, "text/plain"): OpenApiTypes.STR})
+    def get(self, request, *args, **kwargs):
+        token = getattr(settings, "METRICS_TOKEN", None)
+        if not token:
+            raise PermissionDenied("Metrics are closed until METRICS_TOKEN is set.")
+        header = request.headers.get("Authorization", "")
+        if not secrets.compare_digest(header, f"Bearer {token}"):
+            raise PermissionDenied()
+        return Response(
+            registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
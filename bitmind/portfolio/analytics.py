@@ -0,0 +1,136 @@
+"""
+Trading activity of a portfolio, aggregated in the database.
+
+One grouped query buckets the user's transactions by coin and period with
+conditional aggregates, and window functions over those buckets carry the
+running net amount and average entry price of each coin forward. The result
+grows with the number of (coin, period) buckets, not with the number of
+transactions.
+"""
+from datetime import timezone
+from decimal import Decimal
+
+from core.models import Transaction
+from django.db.models import (Count, DateField, F, Func, Max, Min, Q, Sum,
+                              Window)
+from django.db.models.functions import Trunc
+from portfolio.valuation import MONEY
+
+INTERVALS = ("day", "week", "month", "year")
+
+
+class RunningTotal(Func):
+    """SUM() of an aggregate, for use as a window over grouped rows."""
+
+    function = "SUM"
+    window_compatible = True
+
+
+def portfolio_analytics(user, interval="month", start=None, end=None, crypto=None):
+    """
+    Per coin totals and per (coin, period) activity of the user's
+    transactions dated between start and end. Running figures start at
+    start, so they only cover the selected range.
+    """
+    transactions = Transaction.objects.filter(user=user)
+    if start is not None:
+        transactions = transactions.filter(date__gte=start)
+    if end is not None:
+        transactions = transactions.filter(date__lte=end)
+    if crypto is not None:
+        transactions = transactions.filter(crypto_id=crypto)
+
+    buy, sell = Q(type="buy"), Q(type="sell")
+    signed_amount = Transaction.objects.signed_amount()
+    cost = F("amount") * F("price")
+    # Running figures of a coin, bucket by bucket
+    running = {
+        "partition_by": [F("crypto_id")],
+        "order_by": F("period").asc(),
+    }
+    rows = (
+        transactions.annotate(
+            period=Trunc(
+                "date", interval, output_field=DateField(), tzinfo=timezone.utc
+            )
+        )
+        .values("crypto_id", "period")
+        .annotate(
+            name=F("crypto__name"),
+            trades=Count("id"),
+            buys=Count("id", filter=buy),
+            sells=Count("id", filter=sell),
+            bought=Sum("amount", filter=buy),
+            sold=Sum("amount", filter=sell),
+            sold_proceeds=Sum(cost, filter=sell, output_field=MONEY),
+            first_trade=Min("date"),
+            last_trade=Max("date"),
+            net=Sum(signed_amount),
+        )
+        # Annotated after the aggregates, so they are not grouped by
+        .annotate(
+            running_net=Window(RunningTotal(Sum(signed_amount)), **running),
+            running_bought=Window(
+                RunningTotal(Sum("amount", filter=buy)), **running
+            ),
+            running_bought_cost=Window(
+                RunningTotal(Sum(cost, filter=buy, output_field=MONEY)), **running
+            ),
+        )
+        .order_by("crypto_id", "period")
+    )
+
+    coins = {}
+    periods = []
+    for row in rows:
+        bought = row["bought"] or Decimal(0)
+        sold = row["sold"] or Decimal(0)
+        periods.append(
+            {
+                "period": row["period"],
+                "crypto": row["crypto_id"],
+                "trades": row["trades"],
+                "buys": row["buys"],
+                "sells": row["sells"],
+                "bought": bought,
+                "sold": sold,
+                "net": row["net"],
+                "running_net": row["running_net"],
+                "average_entry_price": _ratio(
+                    row["running_bought_cost"], row["running_bought"]
+                ),
+            }
+        )
+
+        coin = coins.get(row["crypto_id"])
+        if coin is None:
+            coin = coins[row["crypto_id"]] = {
+                "crypto": row["crypto_id"],
+                "name": row["name"],
+                "trades": 0,
+                "buys": 0,
+                "sells": 0,
+                "bought": Decimal(0),
+                "sold": Decimal(0),
+                "sold_proceeds": Decimal(0),
+                "first_trade": row["first_trade"],
+            }
+        coin["trades"] += row["trades"]
+        coin["buys"] += row["buys"]
+        coin["sells"] += row["sells"]
+        coin["bought"] += bought
+        coin["sold"] += sold
+        coin["sold_proceeds"] += row["sold_proceeds"] or Decimal(0)
+        coin["last_trade"] = row["last_trade"]
+        # Rows come in period order, so the last one has the coin's totals
+        coin["average_entry_price"] = _ratio(
+            row["running_bought_cost"], row["running_bought"]
+        )
+
+    for coin in coins.values():
+        coin["average_exit_price"] = _ratio(coin.pop("sold_proceeds"), coin["sold"])
+    return {"coins": list(coins.values()), "periods": periods}
+
+
+def _ratio(total, amount):
+    return total / amount if total is not None and amount else None
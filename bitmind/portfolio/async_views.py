@@ -0,0 +1,192 @@
+"""
+Async versions of the portfolio read endpoints.
+
+They are served by the same DRF serializers, pagination and filters as the
+sync viewsets, but query the database with Django's async ORM, so under an
+ASGI server (e.g. gunicorn -k uvicorn.workers.UvicornWorker) a slow query
+does not hold a worker for the whole request.
+"""
+from asgiref.sync import sync_to_async
+from core.authentication import CachedTokenAuthentication
+from core.models import Cryptocurrency, Transaction, UserCoin
+from core.permissions import ReadOnlyOrAdminOnly
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from drf_spectacular.utils import extend_schema
+from portfolio.catalogue import get_catalogue
+from portfolio.filters import TransactionFilter
+from portfolio.pagination import (StandardResultsSetPagination,
+                                  TransactionCursorPagination)
+from portfolio.serializers import (CryptocurrencySerializer,
+                                   HoldingsQuerySerializer,
+                                   TransactionSerializer, UserCoinSerializer)
+from portfolio.valuation import latest_price
+from rest_framework import exceptions, generics
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+class AsyncAPIViewMixin:
+    """
+    Async dispatch for APIView subclasses with async handlers.
+
+    Authentication awaits the authenticators' aauthenticate() when they have
+    one; permission and throttle checks, which only touch the cache, run in a
+    thread, and everything else is the regular APIView machinery.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.aperform_authentication(request)
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if hasattr(response, "__await__"):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            aauthenticate = getattr(authenticator, "aauthenticate", None)
+            if aauthenticate is None:
+                aauthenticate = sync_to_async(authenticator.authenticate)
+            try:
+                user_auth = await aauthenticate(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth
+                return
+        request._not_authenticated()
+
+
+class AsyncTransactionListView(AsyncAPIViewMixin, generics.GenericAPIView):
+    """Async transaction history of the user, newest first"""
+
+    serializer_class = TransactionSerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    pagination_class = TransactionCursorPagination
+    filter_backends = [TransactionFilter]
+
+    @extend_schema(responses=TransactionSerializer(many=True))
+    async def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(Transaction.objects.filter(user=request.user))
+        page = await self.paginator.apaginate_queryset(queryset, request, self)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class AsyncHoldingsMixin(AsyncAPIViewMixin):
+    """Queryset and policies shared by the async holdings views"""
+
+    serializer_class = UserCoinSerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = UserCoin.objects.filter(user=self.request.user).select_related(
+            "crypto"
+        )
+        params = HoldingsQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        if params.validated_data.get("include") == "price":
+            queryset = queryset.annotate(latest_price=latest_price())
+        return queryset
+
+
+class AsyncHoldingsListView(AsyncHoldingsMixin, generics.GenericAPIView):
+    """Async list of the user's coin holdings, largest first"""
+
+    @extend_schema(
+        parameters=[HoldingsQuerySerializer], responses=UserCoinSerializer(many=True)
+    )
+    async def get(self, request, *args, **kwargs):
+        holdings = [
+            user_coin
+            async for user_coin in self.get_queryset().order_by("-amount").aiterator()
+        ]
+        serializer = self.get_serializer(holdings, many=True)
+        return Response(serializer.data)
+
+
+class AsyncHoldingsDetailView(AsyncHoldingsMixin, generics.GenericAPIView):
+    """Async retrieval of one of the user's coin holdings"""
+
+    @extend_schema(parameters=[HoldingsQuerySerializer])
+    async def get(self, request, *args, **kwargs):
+        try:
+            user_coin = await self.get_queryset().aget(pk=kwargs["pk"])
+        except UserCoin.DoesNotExist:
+            raise exceptions.NotFound()
+        serializer = self.get_serializer(user_coin)
+        return Response(serializer.data)
+
+
+class AsyncCryptocurrencyListView(AsyncAPIViewMixin, generics.GenericAPIView):
+    """Async list of the cryptocurrency catalogue, with ?search="""
+
+    serializer_class = CryptocurrencySerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [ReadOnlyOrAdminOnly]
+    pagination_class = StandardResultsSetPagination
+
+    @extend_schema(responses=CryptocurrencySerializer(many=True))
+    async def get(self, request, *args, **kwargs):
+        # Only rebuilding the catalogue touches the database
+        catalogue = await sync_to_async(get_catalogue)()
+        etag = catalogue.etag(request.get_full_path())
+        last_modified = int(catalogue.last_modified.timestamp())
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        entries = catalogue.search(
+            request.query_params.get(api_settings.SEARCH_PARAM, "")
+        )
+        page = self.paginate_queryset(entries)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class AsyncCryptocurrencyDetailView(AsyncAPIViewMixin, generics.GenericAPIView):
+    """Async retrieval of one cryptocurrency"""
+
+    serializer_class = CryptocurrencySerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [ReadOnlyOrAdminOnly]
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            crypto = await Cryptocurrency.objects.aget(pk=kwargs["pk"])
+        except Cryptocurrency.DoesNotExist:
+            raise exceptions.NotFound()
+        serializer = self.get_serializer(crypto)
+        return Response(serializer.data)
@@ -0,0 +1,159 @@
+"""
+Synthetic data and query budgets for the portfolio performance suite.
+
+seed_portfolios() builds a realistic volume of users, coins and transaction
+history with a handful of INSERT ... SELECT statements over generate_series,
+so a million transactions take under a minute rather than the better part of
+an hour through model instances. Every seeded user holds twenty coins and
+never sells more than it bought, and the holdings ledger is filled in from the
+history, so the data passes the same checks real portfolios do.
+"""
+import secrets
+from contextlib import contextmanager
+from datetime import timedelta
+
+from core.models import Cryptocurrency, Transaction, UserCoin
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+# Queries each benchmarked request may run, with no ledger response cache.
+# Each includes the authenticated user's lookup and the lists the ledger
+# version lookup. portfolio/tests/test_query_budgets.py holds the endpoints to
+# these exactly.
+QUERY_BUDGETS = {
+    "transaction-create": 8,
+    "transaction-list": 3,
+    "holdings-list": 3,
+    "cryptocurrency-search": 1,
+}
+
+# Coins traded by each seeded user
+COINS_PER_USER = 20
+
+
+class SeededData:
+    """Identifies one seeded data set so it can be queried and removed."""
+
+    def __init__(self, prefix, users, transactions, coins):
+        self.prefix = prefix
+        self.users = users
+        self.transactions = transactions
+        self.coins = coins
+
+    @property
+    def email_prefix(self):
+        return f"perf-{self.prefix.lower()}-"
+
+    def user_queryset(self):
+        return get_user_model().objects.filter(
+            email__startswith=self.email_prefix
+        ).order_by("id")
+
+    def coin_queryset(self):
+        return Cryptocurrency.objects.filter(symbol__startswith=self.prefix)
+
+    def coin_symbol(self, index):
+        return f"{self.prefix}{index % self.coins}"
+
+    def remove(self):
+        users = self.user_queryset()
+        # Deleted without the ORM collector, which would load every row
+        Transaction.objects.filter(user__in=users).delete()
+        UserCoin.objects.filter(user__in=users).delete()
+        users.delete()
+        self.coin_queryset().delete()
+
+
+def seed_portfolios(users, transactions, coins):
+    """
+    Insert users, coins, a transaction history spread evenly over the users
+    and their holdings ledger. Returns the SeededData. Needs PostgreSQL.
+    """
+    if connection.vendor != "postgresql":
+        raise ImproperlyConfigured("Seeding uses generate_series (PostgreSQL).")
+
+    # Symbols are at most 10 characters: 5 for the prefix, 5 for the index
+    data = SeededData(f"P{secrets.token_hex(2).upper()}", users, transactions, coins)
+    params = {
+        "prefix": data.prefix,
+        "email_prefix": data.email_prefix,
+        "email_pattern": f"{data.email_prefix}%",
+        "users": users,
+        "transactions": transactions,
+        "coins": coins,
+        "coins_per_user": COINS_PER_USER,
+        # One transaction every few minutes, ending an hour ago
+        "start": timezone.now() - timedelta(hours=1, seconds=transactions * 300),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO core_user "
+            "(password, is_superuser, email, name, is_active, is_staff, "
+            "ledger_version) "
+            "SELECT '!', false, %(email_prefix)s || n || '@example.com', "
+            "'Perf user ' || n, true, false, 0 "
+            "FROM generate_series(0, %(users)s - 1) n",
+            params,
+        )
+        cursor.execute(
+            "INSERT INTO core_cryptocurrency (symbol, name) "
+            "SELECT %(prefix)s || n, 'Perf coin ' || n "
+            "FROM generate_series(0, %(coins)s - 1) n",
+            params,
+        )
+        # Transaction n goes to user n % users and one of that user's coins;
+        # each (user, coin) pair alternates buying 2 and selling 1
+        cursor.execute(
+            "INSERT INTO core_transaction "
+            "(user_id, crypto_id, date, type, amount, price) "
+            "SELECT u.id, "
+            "%(prefix)s || ((u.i * 13 + (n / %(users)s) %% %(coins_per_user)s) "
+            "%% %(coins)s), "
+            "%(start)s + n * interval '5 minutes', "
+            "CASE WHEN (n / (%(users)s * %(coins_per_user)s)) %% 2 = 1 "
+            "THEN 'sell' ELSE 'buy' END, "
+            "CASE WHEN (n / (%(users)s * %(coins_per_user)s)) %% 2 = 1 "
+            "THEN 1 ELSE 2 END, "
+            "100 + n %% 1000 "
+            "FROM generate_series(0, %(transactions)s - 1) n "
+            "JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS i "
+            "FROM core_user WHERE email LIKE %(email_pattern)s) u "
+            "ON u.i = n %% %(users)s",
+            params,
+        )
+        cursor.execute(
+            "INSERT INTO core_usercoin (user_id, crypto_id, amount) "
+            "SELECT user_id, crypto_id, "
+            "SUM(CASE WHEN type = 'sell' THEN -amount ELSE amount END) "
+            "FROM core_transaction WHERE user_id IN "
+            "(SELECT id FROM core_user WHERE email LIKE %(email_pattern)s) "
+            "GROUP BY user_id, crypto_id "
+            "HAVING SUM(CASE WHEN type = 'sell' THEN -amount ELSE amount END) <> 0",
+            params,
+        )
+        # Plan the benchmark queries against the new volumes
+        cursor.execute(
+            "ANALYZE core_user, core_cryptocurrency, core_transaction, core_usercoin"
+        )
+    return data
+
+
+@contextmanager
+def benchmark_environment(views):
+    """
+    Lift the rate limits of the given views, so the views are measured rather
+    than the per-user budgets, and accept the test client's host name.
+    """
+    saved = {view: view.throttle_classes for view in views}
+    for view in views:
+        view.throttle_classes = []
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            yield
+    finally:
+        for view, throttle_classes in saved.items():
+            view.throttle_classes = throttle_classes
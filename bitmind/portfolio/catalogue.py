@@ -0,0 +1,123 @@
+"""
+Read-through, versioned cache of the cryptocurrency catalogue.
+
+The catalogue only changes through the admin and import_cryptocurrencies, so
+each process keeps a prebuilt copy with its search index in memory. A version
+token in the shared cache tells processes when to rebuild; it is replaced on
+Cryptocurrency save/delete and after imports.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from core.models import Cryptocurrency
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+VERSION_KEY = "crypto-catalogue:version"
+
+
+def _catalogue_settings():
+    return {
+        "CACHE_ALIAS": "default",
+        "MAX_AGE": 300,
+        **getattr(settings, "CRYPTO_CATALOGUE", {}),
+    }
+
+
+class Catalogue:
+    """An immutable snapshot of the catalogue with a prefix/substring index."""
+
+    def __init__(self, entries, version, last_modified):
+        # Entries are {"symbol", "name"} dicts in primary key order
+        self.entries = entries
+        self.version = version
+        self.last_modified = last_modified
+        self.built_at = time.monotonic()
+        self.digest = hashlib.md5(
+            "\n".join(f"{e['symbol']}\t{e['name']}" for e in entries).encode()
+        ).hexdigest()
+
+        # Lowercased "symbol name" per entry for substring matches
+        self.haystacks = [f"{e['symbol']} {e['name']}".lower() for e in entries]
+        # Sorted (term, position) pairs over symbols and names for prefix matches
+        self.prefixes = sorted(
+            [(e["symbol"].lower(), i) for i, e in enumerate(entries)]
+            + [(e["name"].lower(), i) for i, e in enumerate(entries)]
+        )
+
+    def etag(self, full_path):
+        """Strong ETag for one representation (path and query) of this snapshot."""
+        return '"%s"' % hashlib.md5(f"{self.digest}:{full_path}".encode()).hexdigest()
+
+    def prefix_matches(self, term):
+        start = bisect_left(self.prefixes, (term,))
+        matches = set()
+        for prefix, position in self.prefixes[start:]:
+            if not prefix.startswith(term):
+                break
+            matches.add(position)
+        return matches
+
+    def search(self, query):
+        """
+        Entries whose symbol or name contains every search term, with entries
+        whose symbol or name starts with the first term listed first.
+        """
+        terms = query.lower().split()
+        if not terms:
+            return self.entries
+
+        prefixed = self.prefix_matches(terms[0])
+        matches = [
+            position
+            for position, haystack in enumerate(self.haystacks)
+            if all(term in haystack for term in terms)
+        ]
+        ranked = [p for p in matches if p in prefixed] + [
+            p for p in matches if p not in prefixed
+        ]
+        return [self.entries[position] for position in ranked]
+
+
+_lock = threading.Lock()
+_catalogue = None
+
+
+def _shared_cache():
+    return caches[_catalogue_settings()["CACHE_ALIAS"]]
+
+
+def invalidate_catalogue():
+    """Mark every process's catalogue copy as stale."""
+    _shared_cache().set(VERSION_KEY, (uuid.uuid4().hex, timezone.now()), None)
+
+
+def get_catalogue():
+    """Return the current catalogue, rebuilding it when the version moved."""
+    global _catalogue
+
+    shared_cache = _shared_cache()
+    current = shared_cache.get(VERSION_KEY)
+    if current is None:
+        current = (uuid.uuid4().hex, timezone.now())
+        # Keep a version another process may have published meanwhile
+        if not shared_cache.add(VERSION_KEY, current, None):
+            current = shared_cache.get(VERSION_KEY) or current
+    version, last_modified = current
+
+    catalogue = _catalogue
+    if (
+        catalogue is not None
+        and catalogue.version == version
+        and time.monotonic() - catalogue.built_at < _catalogue_settings()["MAX_AGE"]
+    ):
+        return catalogue
+
+    with _lock:
+        entries = list(Cryptocurrency.objects.order_by("pk").values("symbol", "name"))
+        _catalogue = Catalogue(entries, version, last_modified)
+        return _catalogue
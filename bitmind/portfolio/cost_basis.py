@@ -0,0 +1,105 @@
+"""
+Lot matching over a user's transaction history for realized gains.
+
+Transactions are streamed as plain tuples in date order and matched against
+open lots kept in a deque, so memory is bounded by the number of open lots and
+no model instances are built.
+"""
+from collections import deque, namedtuple
+from decimal import Decimal
+
+from core.models import Transaction
+
+COST_BASIS_METHODS = ("fifo", "lifo", "average")
+
+CostBasis = namedtuple("CostBasis", ["realized", "amount", "cost"])
+
+ZERO = Decimal(0)
+
+
+class LotMatcher:
+    """
+    Open lots of one coin. FIFO sells consume the oldest lots first, LIFO the
+    newest; the average method keeps a single pooled lot. Sells larger than
+    the open lots are realized against a zero cost basis.
+    """
+
+    def __init__(self, method="fifo"):
+        if method not in COST_BASIS_METHODS:
+            raise ValueError(f"Unknown cost basis method '{method}'.")
+        self.method = method
+        # Each lot is a mutable [amount, price] pair
+        self.lots = deque()
+        self.amount = ZERO
+        self.cost = ZERO
+        self.realized = ZERO
+
+    def buy(self, amount, price):
+        self.amount += amount
+        self.cost += amount * price
+        if self.method != "average":
+            self.lots.append([amount, price])
+
+    def sell(self, amount, price):
+        if self.method == "average":
+            matched_cost = self._match_average(amount)
+        else:
+            matched_cost = self._match_lots(amount)
+        self.amount -= amount
+        self.cost -= matched_cost
+        self.realized += amount * price - matched_cost
+
+    def _match_average(self, amount):
+        if self.amount <= 0:
+            return ZERO
+        return self.cost * min(amount, self.amount) / self.amount
+
+    def _match_lots(self, amount):
+        take = self.lots.popleft if self.method == "fifo" else self.lots.pop
+        matched_cost = ZERO
+        while amount > 0 and self.lots:
+            lot = take()
+            if lot[0] > amount:
+                matched_cost += amount * lot[1]
+                lot[0] -= amount
+                # Put the partially consumed lot back where it came from
+                if self.method == "fifo":
+                    self.lots.appendleft(lot)
+                else:
+                    self.lots.append(lot)
+                amount = ZERO
+            else:
+                matched_cost += lot[0] * lot[1]
+                amount -= lot[0]
+        return matched_cost
+
+    def result(self):
+        return CostBasis(self.realized, max(self.amount, ZERO), max(self.cost, ZERO))
+
+
+def match_transactions(rows, method="fifo"):
+    """
+    Match (crypto_id, type, amount, price) tuples given in date order and
+    return a CostBasis per crypto_id.
+    """
+    matchers = {}
+    for crypto_id, type, amount, price in rows:
+        matcher = matchers.get(crypto_id)
+        if matcher is None:
+            matcher = matchers[crypto_id] = LotMatcher(method)
+        if type == "sell":
+            matcher.sell(amount, price)
+        else:
+            matcher.buy(amount, price)
+    return {crypto_id: matcher.result() for crypto_id, matcher in matchers.items()}
+
+
+def user_cost_basis(user, method="fifo", chunk_size=5000):
+    """Stream the user's history in date order and match it with the method."""
+    rows = (
+        Transaction.objects.filter(user=user)
+        .order_by("date", "id")
+        .values_list("crypto_id", "type", "amount", "price")
+        .iterator(chunk_size=chunk_size)
+    )
+    return match_transactions(rows, method)
@@ -0,0 +1,43 @@
+from portfolio.serializers import TransactionFilterSerializer
+from rest_framework.filters import BaseFilterBackend
+
+
+class TransactionFilter(BaseFilterBackend):
+    """Optional date range (?from=&to=) and ?crypto= filters for transactions."""
+
+    def filter_queryset(self, request, queryset, view):
+        params = TransactionFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        if "from" in params.validated_data:
+            queryset = queryset.filter(date__gte=params.validated_data["from"])
+        if "to" in params.validated_data:
+            queryset = queryset.filter(date__lte=params.validated_data["to"])
+        if "crypto" in params.validated_data:
+            queryset = queryset.filter(crypto_id=params.validated_data["crypto"])
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": "from",
+                "required": False,
+                "in": "query",
+                "description": "Only transactions dated on or after this time",
+                "schema": {"type": "string", "format": "date-time"},
+            },
+            {
+                "name": "to",
+                "required": False,
+                "in": "query",
+                "description": "Only transactions dated on or before this time",
+                "schema": {"type": "string", "format": "date-time"},
+            },
+            {
+                "name": "crypto",
+                "required": False,
+                "in": "query",
+                "description": "Only transactions of this cryptocurrency symbol",
+                "schema": {"type": "string"},
+            },
+        ]
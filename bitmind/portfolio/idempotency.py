@@ -0,0 +1,119 @@
+"""
+Idempotency-Key support for the transaction write endpoints.
+"""
+import hashlib
+from datetime import timedelta
+
+from core.db import atomic_with_retry
+from core.models import IdempotencyKey
+from django.conf import settings
+from django.db import IntegrityError
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IN_PROGRESS_MESSAGE = f"A request with this {IDEMPOTENCY_HEADER} is in progress."
+REUSED_MESSAGE = f"{IDEMPOTENCY_HEADER} was already used for another request."
+
+
+def idempotency_key_ttl():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+
+
+class IdempotentWriteMixin:
+    """
+    Replays the stored response when a write is retried with the same
+    Idempotency-Key, without running the write path again.
+
+    The key is claimed, the write runs and its response is stored in one
+    database transaction, so a claim only ever becomes visible together with
+    its response. A request that fails, or whose worker dies, rolls its claim
+    back with the write and the client can retry at once. A transaction the
+    database aborts for a serialization failure or deadlock is rerun whole,
+    claim included, by atomic_with_retry. A concurrent retry
+    waits on the claim's unique index and then replays the stored response.
+    A key reused with a different request gets 422.
+    """
+
+    def create(self, request, *args, **kwargs):
+        return self.idempotent(request, super().create, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        return self.idempotent(request, super().update, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        return self.idempotent(request, super().destroy, *args, **kwargs)
+
+    def idempotent(self, request, handler, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return handler(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} is too long."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = hashlib.sha256(
+            f"{request.method} {request.path}\n".encode() + request.body
+        ).hexdigest()
+
+        existing = self.stored_key(request.user, key)
+        if existing is not None:
+            return self.stored_response(existing, fingerprint)
+
+        def claim_and_handle():
+            try:
+                with db_transaction.atomic():
+                    claim = IdempotencyKey.objects.create(
+                        user=request.user, key=key, fingerprint=fingerprint
+                    )
+            except IntegrityError:
+                # Stored by a concurrent request with the same key, which has
+                # committed by the time the insert fails
+                existing = self.stored_key(request.user, key)
+                if existing is None:
+                    return Response(
+                        {"detail": IN_PROGRESS_MESSAGE},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                return self.stored_response(existing, fingerprint)
+
+            response = handler(request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                claim.status_code = response.status_code
+                claim.response = response.data
+                claim.save(update_fields=["status_code", "response"])
+            else:
+                db_transaction.set_rollback(True)
+            return response
+
+        # The handler's own atomic_with_retry runs nested in this transaction
+        # and cannot retry it, so a lost conflict reruns the claim and the
+        # handler together
+        return atomic_with_retry(claim_and_handle)
+
+    def stored_key(self, user, key):
+        """The user's stored key, None when it has none or it has expired."""
+        existing = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if existing is None:
+            return None
+        if existing.created_at < timezone.now() - idempotency_key_ttl():
+            existing.delete()
+            return None
+        return existing
+
+    def stored_response(self, existing, fingerprint):
+        """The Response a retry of the key's request gets."""
+        if existing.fingerprint != fingerprint:
+            return Response(
+                {"detail": REUSED_MESSAGE},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(
+            existing.response,
+            status=existing.status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
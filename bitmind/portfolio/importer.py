@@ -0,0 +1,140 @@
+"""
+Bulk import of a user's transaction history from CSV or JSON lines.
+"""
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from core.models import Transaction, UserCoin
+from django.db import transaction as db_transaction
+from portfolio.ledger import bump_ledger_version
+from portfolio.serializers import TransactionSerializer
+from portfolio.snapshots import invalidate_snapshots
+from rest_framework import serializers
+
+
+def guess_format(filename):
+    """Return the import format implied by a file name, defaulting to CSV."""
+    if filename and filename.lower().endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
+
+
+def read_rows(stream, file_format):
+    """Yield (line number, row dict) pairs from a text stream."""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == "ndjson":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, e
+    else:
+        raise ValueError(f"Unsupported import format '{file_format}'.")
+
+
+class TransactionImporter:
+    """
+    Validate and insert rows for one user in batches. Each batch is checked for
+    negative holdings once per crypto, walking its rows in date order from the
+    current ledger amount, then written with a single bulk_create.
+    """
+
+    def __init__(self, user, batch_size=1000, strict=False):
+        self.user = user
+        self.batch_size = batch_size
+        self.strict = strict
+        self.imported = 0
+        self.errors = []
+
+    def run(self, rows):
+        """Import all rows and return a report of imported rows and errors."""
+        if self.strict:
+            # Any error raises and rolls back everything imported so far
+            with db_transaction.atomic():
+                self._import_batches(rows)
+        else:
+            self._import_batches(rows)
+        return {"imported": self.imported, "errors": self.errors}
+
+    def _import_batches(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            with db_transaction.atomic():
+                self._import_batch(batch)
+
+    def _import_batch(self, batch):
+        by_crypto = defaultdict(list)
+        for line_number, transaction in self._validate_rows(batch):
+            by_crypto[transaction.crypto_id].append((line_number, transaction))
+
+        accepted = []
+        deltas = {}
+        for crypto_id in sorted(by_crypto):
+            current = (
+                UserCoin.objects.select_for_update()
+                .filter(user=self.user, crypto_id=crypto_id)
+                .values_list("amount", flat=True)
+                .first()
+                or 0
+            )
+            balance = current
+            for line_number, transaction in sorted(
+                by_crypto[crypto_id], key=lambda item: item[1].date
+            ):
+                if balance + transaction.signed_amount < 0:
+                    self._error(
+                        line_number,
+                        {
+                            "non_field_errors": [
+                                "Transaction would result in negative holdings."
+                            ]
+                        },
+                    )
+                    continue
+                balance += transaction.signed_amount
+                accepted.append(transaction)
+            deltas[crypto_id] = balance - current
+
+        Transaction.objects.bulk_create(accepted)
+        if accepted:
+            invalidate_snapshots(
+                self.user.id, [transaction.date for transaction in accepted]
+            )
+            bump_ledger_version([self.user.id])
+        for crypto_id, delta in deltas.items():
+            if delta:
+                UserCoin.objects.apply_delta(self.user, crypto_id, delta)
+        self.imported += len(accepted)
+
+    def _validate_rows(self, batch):
+        """Yield (line number, Transaction) for the valid rows of a batch."""
+        # One coin lookup for the whole batch
+        results = iter(
+            TransactionSerializer(many=True).validate_each(
+                [row for _, row in batch if isinstance(row, dict)]
+            )
+        )
+        for line_number, row in batch:
+            if not isinstance(row, dict):
+                self._error(line_number, {"non_field_errors": ["Malformed row."]})
+                continue
+            data, errors = next(results)
+            if errors:
+                self._error(line_number, errors)
+            else:
+                yield line_number, Transaction(user=self.user, **data)
+
+    def _error(self, line_number, errors):
+        if self.strict:
+            raise serializers.ValidationError({"line": line_number, "errors": errors})
+        self.errors.append({"line": line_number, "errors": errors})
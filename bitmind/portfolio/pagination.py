@@ -1,7 +1,96 @@
-from rest_framework.pagination import PageNumberPagination
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 1000
+
+
+class TransactionCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (date, id), newest first. The cursor holds the exact
+    position of the boundary row, so every page is a single index range scan
+    no matter how deep it is, and ties on date never skip or repeat rows.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("-date", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of paginate_queryset for async views."""
+        queryset = self.get_page_queryset(queryset, request)
+        return self.set_page([instance async for instance in queryset])
+
+    def get_page_queryset(self, queryset, request):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor.reverse
+
+        if self.reverse:
+            queryset = queryset.order_by("date", "id")
+        else:
+            queryset = queryset.order_by("-date", "-id")
+
+        if self.cursor is not None and self.cursor.position is not None:
+            date, pk = self.decode_position(self.cursor.position)
+            if self.reverse:
+                queryset = queryset.filter(Q(date__gt=date) | Q(date=date, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(date__lt=date) | Q(date=date, id__lt=pk))
+
+        # Fetch one extra row to know whether another page follows
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self.encode_position(self.page[-1])
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self.encode_position(self.page[0])
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def encode_position(self, row):
+        # Model instances, or .values() rows on the lean list path
+        if isinstance(row, dict):
+            return f"{row['date'].isoformat()}|{row['id']}"
+        return f"{row.date.isoformat()}|{row.pk}"
+
+    def decode_position(self, position):
+        try:
+            date, pk = position.split("|")
+            date = parse_datetime(date)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return date, pk
@@ -0,0 +1,103 @@
+"""
+Lean read path for list responses.
+
+Instantiating a ModelSerializer per row and walking its fields one by one
+dominates the CPU time of large list responses. SerializedRows compiles a
+read-only serializer's fields once into (key, column, convert) entries, reads
+the page with .values() and builds the response rows from those dicts
+directly. Decimals and datetimes are left as they are for the renderer
+(core.renderers.FastJSONRenderer) to encode, which writes them exactly as the
+serializer fields would. The serializer remains what the schema describes.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Fields whose representation of a .values() column is the column itself
+PASS_THROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+
+class SerializedRows:
+    """The representation of serializer_class, built from .values() rows."""
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def fields(self):
+        """(key, column, is datetime) per readable field, in output order."""
+        fields = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            column = "__".join(field.source_attrs)
+            if isinstance(field, serializers.DateTimeField):
+                # Left as datetimes, both render them in ISO 8601
+                output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+                if output_format is not None and output_format.lower() != ISO_8601:
+                    raise self.unsupported(name, field)
+                fields.append((name, column, True))
+            elif isinstance(field, serializers.DecimalField):
+                # Stored decimals already have the field's scale
+                coerce_to_string = getattr(
+                    field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+                )
+                if not coerce_to_string or field.localize or field.allow_null:
+                    raise self.unsupported(name, field)
+                fields.append((name, column, False))
+            elif isinstance(field, PASS_THROUGH_FIELDS):
+                if isinstance(field, serializers.ChoiceField) and any(
+                    str(key) != key for key in field.choices
+                ):
+                    raise self.unsupported(name, field)
+                if getattr(field, "pk_field", None) is not None:
+                    raise self.unsupported(name, field)
+                fields.append((name, column, False))
+            else:
+                raise self.unsupported(name, field)
+        return fields
+
+    @cached_property
+    def columns(self):
+        return [column for _, column, _ in self.fields]
+
+    def unsupported(self, name, field):
+        return ImproperlyConfigured(
+            f"{self.serializer_class.__name__}.{name} ({type(field).__name__}) "
+            "cannot be represented from a .values() column."
+        )
+
+    def queryset(self, queryset):
+        """The queryset's rows as .values() dicts of the needed columns."""
+        return queryset.values(*self.columns)
+
+    def represent(self, rows):
+        """Build the serializer's representation of each .values() row."""
+        fields = self.fields
+        # Stored datetimes are in UTC, so only another zone needs converting
+        if timezone.get_current_timezone_name() == "UTC" or not any(
+            is_datetime for _, _, is_datetime in fields
+        ):
+            return [{key: row[column] for key, column, _ in fields} for row in rows]
+
+        current_timezone = timezone.get_current_timezone()
+
+        results = []
+        for row in rows:
+            result = {}
+            for key, column, is_datetime in fields:
+                value = row[column]
+                if is_datetime and value is not None:
+                    value = value.astimezone(current_timezone)
+                result[key] = value
+            results.append(result)
+        return results
@@ -1,7 +1,11 @@
+import codecs
+
 from core.models import Cryptocurrency  # Cryptocurrency only altered by admin
 from core.models import Transaction  # Can be altered by user
 from core.models import UserCoin  # Only altered by Transaction
 from django.utils import timezone
+from portfolio.analytics import INTERVALS
+from portfolio.cost_basis import COST_BASIS_METHODS
 from rest_framework import serializers
 
 
@@ -17,31 +21,130 @@ class CryptocurrencySerializer(serializers.ModelSerializer):
 class UserCoinSerializer(serializers.ModelSerializer):
     """Serializer for User Coin holdings."""
 
+    name = serializers.CharField(source="crypto.name", read_only=True)
+    # Only annotated when the latest price is requested
+    price = serializers.DecimalField(
+        source="latest_price",
+        max_digits=20,
+        decimal_places=5,
+        read_only=True,
+        allow_null=True,
+        default=None,
+    )
+
     class Meta:
         model = UserCoin
-        fields = ["id", "crypto", "amount"]
+        fields = ["id", "crypto", "name", "amount", "price"]
         read_only_fields = ["id", "crypto", "amount"]
 
 
+class HoldingsQuerySerializer(serializers.Serializer):
+    """Serializer for the holdings query parameters."""
+
+    include = serializers.ChoiceField(
+        choices=["price"],
+        required=False,
+        help_text="Also return the latest stored price of each coin",
+    )
+
+
+class HoldingsListQuerySerializer(HoldingsQuerySerializer):
+    """Serializer for the holdings list query parameters."""
+
+    as_of = serializers.DateTimeField(
+        required=False,
+        help_text="Return the holdings at this time, computed from the history",
+    )
+
+    def validate(self, attrs):
+        if "as_of" in attrs and "include" in attrs:
+            raise serializers.ValidationError(
+                "'include' cannot be combined with 'as_of'."
+            )
+        return attrs
+
+
+class HoldingAsOfSerializer(serializers.Serializer):
+    """Serializer for the amount of one coin held at a point in time."""
+
+    crypto = serializers.CharField()
+    name = serializers.CharField()
+    amount = serializers.DecimalField(max_digits=30, decimal_places=5)
+
+
+class CryptocurrencyField(serializers.PrimaryKeyRelatedField):
+    """
+    Coin of a transaction, looked up by symbol. Inside a
+    TransactionListSerializer the coins of all rows are already loaded.
+    """
+
+    def to_internal_value(self, data):
+        cryptocurrencies = getattr(self.parent.parent, "cryptocurrencies", None)
+        if cryptocurrencies is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, (str, int)) or isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return cryptocurrencies[str(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+class TransactionListSerializer(serializers.ListSerializer):
+    """
+    Validates many transactions with one in_bulk() lookup of their coins and
+    one read of the clock, instead of a query and a timezone.now() per row.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.prepare(data)
+        return super().to_internal_value(data)
+
+    def prepare(self, rows):
+        symbols = {
+            str(row["crypto"])
+            for row in rows
+            if isinstance(row, dict)
+            and isinstance(row.get("crypto"), (str, int))
+            and not isinstance(row["crypto"], bool)
+        }
+        self.cryptocurrencies = Cryptocurrency.objects.in_bulk(symbols)
+        self.now = timezone.now()
+
+    def validate_each(self, rows):
+        """
+        Validate rows independently, returning a (validated data, errors) pair
+        per row with one of the two empty, so valid rows can be kept.
+        """
+        self.prepare(rows)
+        results = []
+        for row in rows:
+            try:
+                results.append((self.child.run_validation(row), {}))
+            except serializers.ValidationError as exc:
+                results.append((None, exc.detail))
+        return results
+
+
 class TransactionSerializer(serializers.ModelSerializer):
+    crypto = CryptocurrencyField(
+        queryset=Cryptocurrency.objects.all(),
+        error_messages={
+            "does_not_exist": "Invalid crypto. This crypto does not exist."
+        },
+    )
+
     class Meta:
         model = Transaction
         fields = ["id", "crypto", "date", "type", "amount", "price"]
         read_only_fields = ["id"]
-
-    def validate_crypto(self, value):
-        # Check if the specified crypto exists in the database
-        try:
-            Cryptocurrency.objects.get(pk=value.pk)
-        except Cryptocurrency.DoesNotExist:
-            raise serializers.ValidationError(
-                "Invalid crypto. This crypto does not exist."
-            )
-        return value
+        list_serializer_class = TransactionListSerializer
 
     def validate_date(self, value):
-        # Check if the date is in the future
-        if value > timezone.now():
+        # Check if the date is in the future; a list shares one clock read
+        now = getattr(self.parent, "now", None) or timezone.now()
+        if value > now:
             raise serializers.ValidationError("Date cannot be in the future.")
         return value
 
@@ -62,3 +165,184 @@ class TransactionSerializer(serializers.ModelSerializer):
         if value < 0:
             raise serializers.ValidationError("Price cannot be negative.")
         return value
+
+
+class TransactionImportSerializer(serializers.Serializer):
+    """Serializer for a bulk transaction import upload."""
+
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=["csv", "ndjson"], required=False)
+    batch_size = serializers.IntegerField(min_value=1, max_value=10000, default=1000)
+    strict = serializers.BooleanField(default=False)
+
+    def validate_file(self, value):
+        # Decoded in full before any row is imported: non-strict imports commit
+        # batch by batch, so an error halfway would leave earlier rows written
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for chunk in value.chunks():
+                decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise serializers.ValidationError("The file is not UTF-8 encoded text.")
+        value.seek(0)
+        return value
+
+
+class DateRangeQuerySerializer(serializers.Serializer):
+    """Base for query parameters with an optional from/to range."""
+
+    range_field_class = serializers.DateTimeField
+
+    def get_fields(self):
+        # "from" is a keyword, so the range fields cannot be class attributes
+        fields = super().get_fields()
+        fields["from"] = self.range_field_class(required=False)
+        fields["to"] = self.range_field_class(required=False)
+        return fields
+
+    def validate(self, attrs):
+        if "from" in attrs and "to" in attrs and attrs["from"] > attrs["to"]:
+            raise serializers.ValidationError("'from' must not be after 'to'.")
+        return attrs
+
+
+class TransactionFilterSerializer(DateRangeQuerySerializer):
+    """Serializer for the transaction history query parameters."""
+
+    crypto = serializers.CharField(required=False)
+
+
+class ValuationQuerySerializer(serializers.Serializer):
+    """Serializer for the valuation query parameters."""
+
+    method = serializers.ChoiceField(
+        choices=COST_BASIS_METHODS,
+        required=False,
+        help_text="Replay the history with this lot matching method",
+    )
+
+
+class CoinValuationSerializer(serializers.Serializer):
+    """Serializer for the valuation of one coin in a portfolio."""
+
+    crypto = serializers.CharField()
+    name = serializers.CharField()
+    amount = serializers.DecimalField(max_digits=30, decimal_places=5)
+    price = serializers.DecimalField(max_digits=20, decimal_places=5, allow_null=True)
+    average_cost = serializers.DecimalField(
+        max_digits=30, decimal_places=5, allow_null=True
+    )
+    cost_basis = serializers.DecimalField(
+        max_digits=40, decimal_places=5, allow_null=True
+    )
+    market_value = serializers.DecimalField(
+        max_digits=40, decimal_places=5, allow_null=True
+    )
+    unrealized_pnl = serializers.DecimalField(
+        max_digits=40, decimal_places=5, allow_null=True
+    )
+    realized_pnl = serializers.DecimalField(
+        max_digits=40, decimal_places=5, allow_null=True
+    )
+
+
+class PortfolioTotalsSerializer(serializers.Serializer):
+    """Serializer for the portfolio-wide valuation totals."""
+
+    market_value = serializers.DecimalField(max_digits=40, decimal_places=5)
+    cost_basis = serializers.DecimalField(max_digits=40, decimal_places=5)
+    unrealized_pnl = serializers.DecimalField(max_digits=40, decimal_places=5)
+    realized_pnl = serializers.DecimalField(max_digits=40, decimal_places=5)
+
+
+class PortfolioValuationSerializer(serializers.Serializer):
+    """Serializer for a user's portfolio valuation."""
+
+    holdings = CoinValuationSerializer(many=True)
+    totals = PortfolioTotalsSerializer()
+
+
+class HistoryQuerySerializer(DateRangeQuerySerializer):
+    """Serializer for the portfolio history query parameters."""
+
+    range_field_class = serializers.DateField
+
+    interval = serializers.ChoiceField(
+        choices=["day", "week", "month"],
+        default="day",
+        help_text="Downsample to the last snapshot of each week or month",
+    )
+    crypto = serializers.CharField(required=False)
+
+
+class HistoryPointSerializer(serializers.Serializer):
+    """Serializer for the portfolio value at the end of one period."""
+
+    period = serializers.DateField()
+    value = serializers.DecimalField(max_digits=40, decimal_places=5, allow_null=True)
+    amount = serializers.DecimalField(
+        max_digits=30, decimal_places=5, allow_null=True
+    )
+
+
+class AnalyticsQuerySerializer(DateRangeQuerySerializer):
+    """Serializer for the portfolio analytics query parameters."""
+
+    interval = serializers.ChoiceField(
+        choices=INTERVALS,
+        default="month",
+        help_text="Bucket the activity by this period (UTC)",
+    )
+    crypto = serializers.CharField(required=False)
+
+
+class CoinAnalyticsSerializer(serializers.Serializer):
+    """Serializer for the trading totals of one coin."""
+
+    crypto = serializers.CharField()
+    name = serializers.CharField()
+    trades = serializers.IntegerField()
+    buys = serializers.IntegerField()
+    sells = serializers.IntegerField()
+    bought = serializers.DecimalField(max_digits=40, decimal_places=5)
+    sold = serializers.DecimalField(max_digits=40, decimal_places=5)
+    average_entry_price = serializers.DecimalField(
+        max_digits=40, decimal_places=5, allow_null=True
+    )
+    average_exit_price = serializers.DecimalField(
+        max_digits=40, decimal_places=5, allow_null=True
+    )
+    first_trade = serializers.DateTimeField()
+    last_trade = serializers.DateTimeField()
+
+
+class PeriodAnalyticsSerializer(serializers.Serializer):
+    """Serializer for the trading activity of one coin in one period."""
+
+    period = serializers.DateField()
+    crypto = serializers.CharField()
+    trades = serializers.IntegerField()
+    buys = serializers.IntegerField()
+    sells = serializers.IntegerField()
+    bought = serializers.DecimalField(max_digits=40, decimal_places=5)
+    sold = serializers.DecimalField(max_digits=40, decimal_places=5)
+    net = serializers.DecimalField(max_digits=40, decimal_places=5)
+    running_net = serializers.DecimalField(
+        max_digits=40,
+        decimal_places=5,
+        help_text="Net amount bought up to the end of the period",
+    )
+    average_entry_price = serializers.DecimalField(
+        max_digits=40,
+        decimal_places=5,
+        allow_null=True,
+        help_text="Average buy price up to the end of the period",
+    )
+
+
+class PortfolioAnalyticsSerializer(serializers.Serializer):
+    """Serializer for a user's trading analytics."""
+
+    coins = CoinAnalyticsSerializer(many=True)
+    periods = PeriodAnalyticsSerializer(many=True)
@@ -0,0 +1,34 @@
+"""
+Signal handlers keeping the portfolio caches consistent with the database.
+"""
+from core.models import Cryptocurrency, Transaction, UserCoin
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from portfolio.catalogue import invalidate_catalogue
+from portfolio.ledger import bump_ledger_version
+
+
+@receiver(post_save, sender=Cryptocurrency)
+@receiver(post_delete, sender=Cryptocurrency)
+def invalidate_cryptocurrency_catalogue(sender, **kwargs):
+    # After commit, or another process could rebuild from the old rows
+    transaction.on_commit(invalidate_catalogue)
+
+
+@receiver(pre_delete, sender=Cryptocurrency)
+def collect_ledger_users_of_cryptocurrency(sender, instance, **kwargs):
+    # The delete cascades to the coin's transactions and holdings, which
+    # changes the ledgers of their users
+    instance._ledger_user_ids = set(
+        Transaction.objects.filter(crypto=instance).values_list("user_id", flat=True)
+    ) | set(UserCoin.objects.filter(crypto=instance).values_list("user_id", flat=True))
+
+
+@receiver(post_delete, sender=Cryptocurrency)
+def bump_ledger_versions_of_cryptocurrency(sender, instance, **kwargs):
+    # In the delete's transaction, once the cascade has taken the transaction
+    # and holding rows, so User rows are locked last as by the ledger writers
+    user_ids = getattr(instance, "_ledger_user_ids", None)
+    if user_ids:
+        bump_ledger_version(user_ids)
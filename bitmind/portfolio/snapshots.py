@@ -0,0 +1,230 @@
+"""
+Incremental end-of-day portfolio snapshots.
+
+Each run continues from a user's last snapshot: it carries the holdings
+stored for that day forward and replays only the transactions and price ticks
+dated after it, so the cost of a run is bounded by the days since the last
+one rather than by the whole history.
+
+The snapshots double as checkpoints for point-in-time holdings: the holdings
+at any moment are those of the last snapshot before it plus the transactions
+since. Writes dated before today delete the user's snapshots from that day
+on, and the next run rebuilds them. Both lock the user's row first, so a
+back-dated write either commits before a run reads the transactions or
+deletes the snapshots the run wrote.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from core.models import (Cryptocurrency, PortfolioSnapshot, PriceTick,
+                         Transaction, User)
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Trunc
+
+BATCH_SIZE = 5000
+
+
+def _day_start(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+class _Stream:
+    """Date-ordered rows, consumed one day at a time."""
+
+    def __init__(self, iterator):
+        self.iterator = iterator
+        self.pending = next(iterator, None)
+
+    def until(self, boundary):
+        """Yield the rows whose first column is before the boundary."""
+        while self.pending is not None and self.pending[0] < boundary:
+            yield self.pending
+            self.pending = next(self.iterator, None)
+
+
+def _lock_user(user_id):
+    User.objects.select_for_update().filter(pk=user_id).exists()
+
+
+def snapshot_user(user_id, until):
+    """
+    Write the missing snapshots of one user up to and including until, a day
+    before today. Call it inside a database transaction.
+    """
+    _lock_user(user_id)
+    last_day = PortfolioSnapshot.objects.filter(user_id=user_id).aggregate(
+        last_day=Max("day")
+    )["last_day"]
+    if last_day is not None:
+        holdings = dict(
+            PortfolioSnapshot.objects.filter(user_id=user_id, day=last_day).values_list(
+                "crypto_id", "amount"
+            )
+        )
+        start = last_day + timedelta(days=1)
+    else:
+        first = (
+            Transaction.objects.filter(user_id=user_id)
+            .order_by("date")
+            .values_list("date", flat=True)
+            .first()
+        )
+        if first is None:
+            return 0
+        holdings = {}
+        start = first.astimezone(timezone.utc).date()
+    if start > until:
+        return 0
+
+    start_at = _day_start(start)
+    end_at = _day_start(until + timedelta(days=1))
+    transactions = (
+        Transaction.objects.filter(user_id=user_id, date__gte=start_at, date__lt=end_at)
+        .order_by("date", "id")
+        .values_list("date", "crypto_id", "type", "amount")
+    )
+    cryptos = set(holdings) | set(
+        transactions.order_by().values_list("crypto_id", flat=True).distinct()
+    )
+
+    # Price in force at the start of the range, then every tick inside it
+    prices = dict(
+        Cryptocurrency.objects.filter(symbol__in=cryptos)
+        .annotate(
+            price=Subquery(
+                PriceTick.objects.filter(
+                    crypto_id=OuterRef("symbol"), timestamp__lt=start_at
+                )
+                .order_by("-timestamp")
+                .values("price")[:1]
+            )
+        )
+        .values_list("symbol", "price")
+    )
+    ticks = (
+        PriceTick.objects.filter(
+            crypto_id__in=cryptos, timestamp__gte=start_at, timestamp__lt=end_at
+        )
+        .order_by("timestamp")
+        .values_list("timestamp", "crypto_id", "price")
+        .iterator()
+    )
+    transactions = _Stream(transactions.iterator())
+    ticks = _Stream(ticks)
+
+    created = 0
+    batch = []
+    day = start
+    while day <= until:
+        day_end = _day_start(day + timedelta(days=1))
+        for _, crypto_id, type, amount in transactions.until(day_end):
+            delta = -amount if type == "sell" else amount
+            holdings[crypto_id] = holdings.get(crypto_id, 0) + delta
+        for _, crypto_id, price in ticks.until(day_end):
+            prices[crypto_id] = price
+
+        for crypto_id, amount in holdings.items():
+            if not amount:
+                continue
+            price = prices.get(crypto_id)
+            batch.append(
+                PortfolioSnapshot(
+                    user_id=user_id,
+                    crypto_id=crypto_id,
+                    day=day,
+                    amount=amount,
+                    value=amount * price if price is not None else None,
+                )
+            )
+        if len(batch) >= BATCH_SIZE:
+            PortfolioSnapshot.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+        day += timedelta(days=1)
+
+    PortfolioSnapshot.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+def invalidate_snapshots(user_id, dates):
+    """Delete the user's snapshots that a write dated at any of dates changes."""
+    first_day = min(date.astimezone(timezone.utc).date() for date in dates)
+    # Snapshots are taken up to yesterday; writes dated today change none
+    if first_day < datetime.now(timezone.utc).date():
+        _lock_user(user_id)
+        PortfolioSnapshot.objects.filter(user_id=user_id, day__gte=first_day).delete()
+
+
+def holdings_as_of(user, as_of):
+    """
+    The user's holdings at as_of as (crypto_id, name, amount), largest first.
+    Starts from the last snapshot before as_of, so only the transactions since
+    that day are summed, in the same query as the snapshot rows.
+    """
+    checkpoint = PortfolioSnapshot.objects.filter(
+        user=user, day__lt=as_of.astimezone(timezone.utc).date()
+    ).aggregate(day=Max("day"))["day"]
+
+    transactions = Transaction.objects.filter(user=user, date__lte=as_of)
+    if checkpoint is not None:
+        transactions = transactions.filter(
+            date__gte=_day_start(checkpoint + timedelta(days=1))
+        )
+    rows = (
+        transactions.values("crypto_id", "crypto__name")
+        .annotate(total=Sum(Transaction.objects.signed_amount()))
+        .values_list("crypto_id", "crypto__name", "total")
+        .order_by()
+    )
+    if checkpoint is not None:
+        rows = PortfolioSnapshot.objects.filter(user=user, day=checkpoint).values_list(
+            "crypto_id", "crypto__name", "amount"
+        ).union(rows, all=True)
+
+    names = {}
+    amounts = defaultdict(Decimal)
+    for crypto_id, name, amount in rows:
+        names[crypto_id] = name
+        amounts[crypto_id] += amount
+    holdings = [
+        (crypto_id, names[crypto_id], amount)
+        for crypto_id, amount in amounts.items()
+        if amount
+    ]
+    return sorted(holdings, key=lambda holding: holding[2], reverse=True)
+
+
+def portfolio_history(user, start=None, end=None, interval="day", crypto=None):
+    """
+    Portfolio value per day, week or month between start and end. Weeks and
+    months are downsampled in the database to their last snapshotted day.
+    """
+    snapshots = PortfolioSnapshot.objects.filter(user=user)
+    if start is not None:
+        snapshots = snapshots.filter(day__gte=start)
+    if end is not None:
+        snapshots = snapshots.filter(day__lte=end)
+    if crypto is not None:
+        snapshots = snapshots.filter(crypto_id=crypto)
+
+    if interval != "day":
+        last_days = (
+            snapshots.annotate(period=Trunc("day", interval))
+            .values("period")
+            .annotate(last_day=Max("day"))
+            .values("last_day")
+        )
+        snapshots = snapshots.filter(day__in=Subquery(last_days))
+
+    points = (
+        snapshots.annotate(period=Trunc("day", interval))
+        .values("period")
+        .annotate(value=Sum("value"), amount=Sum("amount"))
+        .order_by("period")
+    )
+    for point in points:
+        # Amounts of different coins do not add up to anything meaningful
+        if crypto is None:
+            point["amount"] = None
+        yield point
@@ -0,0 +1,122 @@
+"""
+Tests for the portfolio analytics API.
+"""
+from decimal import Decimal
+
+from core.models import Cryptocurrency, Transaction
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+ANALYTICS_URL = reverse("portfolio:analytics")
+
+
+class PortfolioAnalyticsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        self.ethereum = Cryptocurrency.objects.create(name="Ethereum", symbol="ETH")
+        history = [
+            ("2023-08-05T10:00:00Z", self.bitcoin, "buy", "2", "100"),
+            ("2023-08-20T10:00:00Z", self.bitcoin, "buy", "2", "200"),
+            ("2023-09-02T10:00:00Z", self.bitcoin, "sell", "1", "300"),
+            ("2023-09-03T10:00:00Z", self.bitcoin, "buy", "4", "50"),
+            ("2023-09-10T10:00:00Z", self.ethereum, "buy", "10", "20"),
+        ]
+        for date, crypto, type, amount, price in history:
+            Transaction.objects.create(
+                user=self.user,
+                crypto=crypto,
+                date=date,
+                type=type,
+                amount=Decimal(amount),
+                price=Decimal(price),
+            )
+        # Another user's history is not included
+        other = get_user_model().objects.create_user(email="other@example.com")
+        Transaction.objects.create(
+            user=other,
+            crypto=self.bitcoin,
+            date="2023-09-01T00:00:00Z",
+            type="buy",
+            amount=7,
+            price=1,
+        )
+
+    def test_monthly_activity_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(ANALYTICS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        periods = [
+            (
+                period["period"],
+                period["crypto"],
+                period["trades"],
+                Decimal(period["net"]),
+                Decimal(period["running_net"]),
+                Decimal(period["average_entry_price"]),
+            )
+            for period in response.data["periods"]
+        ]
+        self.assertEqual(
+            periods,
+            [
+                ("2023-08-01", "BTC", 2, Decimal(4), Decimal(4), Decimal(150)),
+                ("2023-09-01", "BTC", 2, Decimal(3), Decimal(7), Decimal(100)),
+                ("2023-09-01", "ETH", 1, Decimal(10), Decimal(10), Decimal(20)),
+            ],
+        )
+
+    def test_coin_totals(self):
+        response = self.client.get(ANALYTICS_URL)
+
+        bitcoin = response.data["coins"][0]
+        self.assertEqual(bitcoin["crypto"], "BTC")
+        self.assertEqual(bitcoin["name"], "Bitcoin")
+        self.assertEqual(
+            (bitcoin["trades"], bitcoin["buys"], bitcoin["sells"]), (4, 3, 1)
+        )
+        self.assertEqual(Decimal(bitcoin["bought"]), Decimal(8))
+        self.assertEqual(Decimal(bitcoin["sold"]), Decimal(1))
+        self.assertEqual(Decimal(bitcoin["average_entry_price"]), Decimal(100))
+        self.assertEqual(Decimal(bitcoin["average_exit_price"]), Decimal(300))
+        self.assertEqual(bitcoin["first_trade"], "2023-08-05T10:00:00Z")
+        self.assertEqual(bitcoin["last_trade"], "2023-09-03T10:00:00Z")
+        self.assertIsNone(response.data["coins"][1]["average_exit_price"])
+
+    def test_interval_range_and_crypto_filters(self):
+        response = self.client.get(
+            ANALYTICS_URL,
+            {
+                "interval": "week",
+                "crypto": "BTC",
+                "from": "2023-08-15T00:00:00Z",
+                "to": "2023-09-05T00:00:00Z",
+            },
+        )
+
+        self.assertEqual(
+            [
+                (period["period"], period["trades"])
+                for period in response.data["periods"]
+            ],
+            [("2023-08-14", 1), ("2023-08-28", 2)],
+        )
+        self.assertEqual(response.data["coins"][0]["trades"], 3)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in (
+            {"interval": "hour"},
+            {"from": "2023-09-05T00:00:00Z", "to": "2023-09-01T00:00:00Z"},
+        ):
+            response = self.client.get(ANALYTICS_URL, params)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
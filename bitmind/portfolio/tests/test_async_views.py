@@ -0,0 +1,150 @@
+"""
+Tests for the async portfolio read endpoints.
+"""
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from core import authentication
+from core.models import Cryptocurrency, PriceTick, Transaction, UserCoin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+ASYNC_TRANSACTIONS_URL = reverse("portfolio:async-transaction-list")
+ASYNC_HOLDINGS_URL = reverse("portfolio:async-holdings-list")
+ASYNC_CRYPTOCURRENCIES_URL = reverse("portfolio:async-cryptocurrency-list")
+
+
+class AsyncPortfolioViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        authentication._local_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {self.token.key}"}
+        self.async_client = AsyncClient()
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(user=self.user)
+
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        self.ethereum = Cryptocurrency.objects.create(name="Ethereum", symbol="ETH")
+        for day in range(1, 4):
+            Transaction.objects.create(
+                user=self.user,
+                crypto=self.bitcoin,
+                date=f"2023-09-0{day}T00:00:00Z",
+                type="buy",
+                amount=Decimal("1"),
+                price=Decimal("100"),
+            )
+        self.holding = UserCoin.objects.create(
+            user=self.user, crypto=self.bitcoin, amount=Decimal("3")
+        )
+        UserCoin.objects.create(
+            user=self.user, crypto=self.ethereum, amount=Decimal("1")
+        )
+        PriceTick.objects.create(
+            crypto=self.bitcoin, timestamp="2023-09-01T00:00:00Z", price="250"
+        )
+
+    async def test_transaction_list_matches_sync_endpoint(self):
+        response = await self.async_client.get(
+            ASYNC_TRANSACTIONS_URL, {"page_size": 2}, headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sync_response = await self.sync_get(
+            reverse("portfolio:transaction-list"), {"page_size": 2}
+        )
+        self.assertEqual(response.json()["results"], sync_response.json()["results"])
+        self.assertIsNotNone(response.json()["next"])
+
+        next_page = await self.async_client.get(
+            response.json()["next"], headers=self.headers
+        )
+        self.assertEqual(len(next_page.json()["results"]), 1)
+
+    async def test_transaction_list_applies_filters(self):
+        response = await self.async_client.get(
+            ASYNC_TRANSACTIONS_URL,
+            {"from": "2023-09-02T00:00:00Z", "crypto": "BTC"},
+            headers=self.headers,
+        )
+
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    async def test_holdings_match_sync_endpoint(self):
+        params = {"include": "price"}
+        response = await self.async_client.get(
+            ASYNC_HOLDINGS_URL, params, headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sync_response = await self.sync_get(reverse("portfolio:holdings-list"), params)
+        self.assertEqual(response.json(), sync_response.json())
+        self.assertEqual([h["crypto"] for h in response.json()], ["BTC", "ETH"])
+
+    async def test_holdings_detail(self):
+        url = reverse("portfolio:async-holdings-detail", args=[self.holding.pk])
+
+        response = await self.async_client.get(url, headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.json()["amount"]), Decimal("3"))
+
+    async def test_other_users_holding_is_not_found(self):
+        other_user = await get_user_model().objects.acreate(email="other@example.com")
+        other_holding = await UserCoin.objects.acreate(
+            user=other_user, crypto_id="BTC", amount=Decimal("1")
+        )
+        url = reverse("portfolio:async-holdings-detail", args=[other_holding.pk])
+
+        response = await self.async_client.get(url, headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_cryptocurrency_list_and_detail(self):
+        response = await self.async_client.get(
+            ASYNC_CRYPTOCURRENCIES_URL, {"search": "eth"}, headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()["results"], [{"symbol": "ETH", "name": "Ethereum"}]
+        )
+
+        not_modified = await self.async_client.get(
+            ASYNC_CRYPTOCURRENCIES_URL,
+            {"search": "eth"},
+            headers={**self.headers, "If-None-Match": response["ETag"]},
+        )
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        detail = await self.async_client.get(
+            reverse("portfolio:async-cryptocurrency-detail", args=["BTC"]),
+            headers=self.headers,
+        )
+        self.assertEqual(detail.json(), {"symbol": "BTC", "name": "Bitcoin"})
+
+    async def test_authentication_required(self):
+        response = await self.async_client.get(ASYNC_HOLDINGS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response["WWW-Authenticate"], "Token")
+
+    async def test_invalid_token_rejected(self):
+        response = await self.async_client.get(
+            ASYNC_TRANSACTIONS_URL, headers={"Authorization": "Token invalid"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def sync_get(self, url, params):
+        return await sync_to_async(self.sync_client.get)(url, params)
@@ -0,0 +1,94 @@
+"""
+Tests for the cached cryptocurrency catalogue.
+"""
+from core.models import Cryptocurrency
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+CRYPTOCURRENCY_URL = reverse("portfolio:cryptocurrency-list")
+
+
+class CatalogueTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        Cryptocurrency.objects.create(name="Bitcoin Cash", symbol="BCH")
+        Cryptocurrency.objects.create(name="Wrapped Bitcoin", symbol="WBTC")
+        Cryptocurrency.objects.create(name="Ethereum", symbol="ETH")
+
+    def symbols(self, response):
+        return [entry["symbol"] for entry in response.data["results"]]
+
+    def test_catalogue_served_without_queries_once_built(self):
+        self.client.get(CRYPTOCURRENCY_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(CRYPTOCURRENCY_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.symbols(response), ["BCH", "BTC", "ETH", "WBTC"])
+
+    def test_search_ranks_prefix_matches_before_substring_matches(self):
+        response = self.client.get(CRYPTOCURRENCY_URL, {"search": "bit"})
+
+        self.assertEqual(self.symbols(response), ["BCH", "BTC", "WBTC"])
+
+        response = self.client.get(CRYPTOCURRENCY_URL, {"search": "btc"})
+
+        self.assertEqual(self.symbols(response), ["BTC", "WBTC"])
+
+    def test_search_requires_every_term(self):
+        response = self.client.get(CRYPTOCURRENCY_URL, {"search": "bitcoin cash"})
+
+        self.assertEqual(self.symbols(response), ["BCH"])
+
+    def test_catalogue_rebuilt_after_change(self):
+        self.client.get(CRYPTOCURRENCY_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Cryptocurrency.objects.filter(symbol="ETH").get().delete()
+        response = self.client.get(CRYPTOCURRENCY_URL)
+
+        self.assertNotIn("ETH", self.symbols(response))
+
+    def test_catalogue_kept_until_the_change_commits(self):
+        self.client.get(CRYPTOCURRENCY_URL)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Cryptocurrency.objects.filter(symbol="ETH").get().delete()
+            response = self.client.get(CRYPTOCURRENCY_URL)
+
+        self.assertIn("ETH", self.symbols(response))
+
+        for callback in callbacks:
+            callback()
+        response = self.client.get(CRYPTOCURRENCY_URL)
+
+        self.assertNotIn("ETH", self.symbols(response))
+
+    def test_etag_revalidation_returns_not_modified(self):
+        response = self.client.get(CRYPTOCURRENCY_URL)
+        etag = response["ETag"]
+
+        revalidated = self.client.get(CRYPTOCURRENCY_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Cryptocurrency.objects.create(name="Litecoin", symbol="LTC")
+        changed = self.client.get(CRYPTOCURRENCY_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+
+    def test_last_modified_revalidation_returns_not_modified(self):
+        response = self.client.get(CRYPTOCURRENCY_URL)
+
+        revalidated = self.client.get(
+            CRYPTOCURRENCY_URL, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
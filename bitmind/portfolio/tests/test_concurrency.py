@@ -0,0 +1,82 @@
+"""
+Stress tests for concurrent transaction writes.
+"""
+import threading
+import unittest
+from decimal import Decimal
+
+from core.models import Cryptocurrency, Transaction, UserCoin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+TRANSACTION_URL = reverse("portfolio:transaction-list")
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "Row-level locking needs PostgreSQL"
+)
+class ConcurrentTransactionWritesTestCase(TransactionTestCase):
+    threads = 12
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.crypto = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+
+    def run_concurrently(self, payloads):
+        """POST every payload from its own thread and connection at once."""
+        barrier = threading.Barrier(len(payloads))
+        statuses = []
+
+        def post(payload):
+            try:
+                client = APIClient()
+                client.force_authenticate(user=self.user)
+                barrier.wait()
+                statuses.append(
+                    client.post(TRANSACTION_URL, payload, format="json").status_code
+                )
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=post, args=(p,)) for p in payloads]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return statuses
+
+    def payload(self, type, amount):
+        return {
+            "crypto": self.crypto.symbol,
+            "date": "2023-09-01T00:00:00Z",
+            "type": type,
+            "amount": amount,
+            "price": "100.0",
+        }
+
+    def test_concurrent_first_buys_do_not_conflict(self):
+        statuses = self.run_concurrently([self.payload("buy", "1.0")] * self.threads)
+
+        self.assertEqual(statuses, [201] * self.threads)
+        self.assertEqual(
+            UserCoin.objects.get(user=self.user, crypto=self.crypto).amount,
+            Decimal(self.threads),
+        )
+
+    def test_concurrent_sells_never_go_negative(self):
+        held = self.threads // 2
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        client.post(TRANSACTION_URL, self.payload("buy", str(held)), format="json")
+
+        statuses = self.run_concurrently([self.payload("sell", "1.0")] * self.threads)
+
+        self.assertEqual(sorted(statuses), [201] * held + [400] * (self.threads - held))
+        self.assertFalse(UserCoin.objects.filter(user=self.user).exists())
+        self.assertEqual(Transaction.objects.filter(type="sell").count(), held)
@@ -0,0 +1,47 @@
+"""
+Tests for the lot matching cost basis engine.
+"""
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from portfolio.cost_basis import match_transactions
+
+HISTORY = [
+    ("BTC", "buy", Decimal("2"), Decimal("100")),
+    ("ETH", "buy", Decimal("1"), Decimal("10")),
+    ("BTC", "buy", Decimal("2"), Decimal("200")),
+    ("BTC", "sell", Decimal("3"), Decimal("300")),
+]
+
+
+class CostBasisTestCase(SimpleTestCase):
+    def test_fifo_sells_oldest_lots_first(self):
+        bitcoin = match_transactions(HISTORY, "fifo")["BTC"]
+
+        # 2 @ 100 + 1 @ 200 sold for 900
+        self.assertEqual(bitcoin.realized, Decimal("500"))
+        self.assertEqual(bitcoin.amount, Decimal("1"))
+        self.assertEqual(bitcoin.cost, Decimal("200"))
+
+    def test_lifo_sells_newest_lots_first(self):
+        bitcoin = match_transactions(HISTORY, "lifo")["BTC"]
+
+        # 2 @ 200 + 1 @ 100 sold for 900
+        self.assertEqual(bitcoin.realized, Decimal("400"))
+        self.assertEqual(bitcoin.cost, Decimal("100"))
+
+    def test_average_uses_pooled_cost(self):
+        bitcoin = match_transactions(HISTORY, "average")["BTC"]
+
+        self.assertEqual(bitcoin.realized, Decimal("450"))
+        self.assertEqual(bitcoin.cost, Decimal("150"))
+
+    def test_coins_are_matched_independently(self):
+        ethereum = match_transactions(HISTORY, "fifo")["ETH"]
+
+        self.assertEqual(ethereum.realized, Decimal("0"))
+        self.assertEqual(ethereum.cost, Decimal("10"))
+
+    def test_unknown_method_raises(self):
+        with self.assertRaises(ValueError):
+            match_transactions(HISTORY, "hifo")
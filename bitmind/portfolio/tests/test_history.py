@@ -0,0 +1,222 @@
+"""
+Tests for the portfolio snapshots and history API.
+"""
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from core.models import Cryptocurrency, PortfolioSnapshot, PriceTick, Transaction
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from portfolio.snapshots import snapshot_user
+from rest_framework import status
+from rest_framework.test import APIClient
+
+HISTORY_URL = reverse("portfolio:history")
+
+
+class PortfolioSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        self.ethereum = Cryptocurrency.objects.create(name="Ethereum", symbol="ETH")
+
+    def create_transaction(self, crypto, type, amount, date):
+        return Transaction.objects.create(
+            user=self.user,
+            crypto=crypto,
+            date=date,
+            type=type,
+            amount=Decimal(amount),
+            price=Decimal("1"),
+        )
+
+    def snapshots(self):
+        return list(
+            PortfolioSnapshot.objects.order_by("day", "crypto_id").values_list(
+                "day", "crypto_id", "amount", "value"
+            )
+        )
+
+    def test_snapshots_carry_holdings_and_prices_forward(self):
+        PriceTick.objects.create(
+            crypto=self.bitcoin, timestamp="2023-08-31T12:00:00Z", price="100"
+        )
+        PriceTick.objects.create(
+            crypto=self.bitcoin, timestamp="2023-09-02T12:00:00Z", price="200"
+        )
+        self.create_transaction(self.bitcoin, "buy", "2", "2023-09-01T10:00:00Z")
+        self.create_transaction(self.ethereum, "buy", "5", "2023-09-02T10:00:00Z")
+        self.create_transaction(self.bitcoin, "sell", "2", "2023-09-03T10:00:00Z")
+
+        created = snapshot_user(self.user.id, date(2023, 9, 3))
+
+        self.assertEqual(created, 4)
+        self.assertEqual(
+            self.snapshots(),
+            [
+                (date(2023, 9, 1), "BTC", Decimal("2"), Decimal("200")),
+                (date(2023, 9, 2), "BTC", Decimal("2"), Decimal("400")),
+                (date(2023, 9, 2), "ETH", Decimal("5"), None),
+                (date(2023, 9, 3), "ETH", Decimal("5"), None),
+            ],
+        )
+
+    def test_incremental_run_only_adds_new_days(self):
+        self.create_transaction(self.bitcoin, "buy", "2", "2023-09-01T10:00:00Z")
+        snapshot_user(self.user.id, date(2023, 9, 2))
+        self.create_transaction(self.bitcoin, "buy", "1", "2023-09-04T10:00:00Z")
+
+        # The user row lock, then the run itself
+        with self.assertNumQueries(8):
+            created = snapshot_user(self.user.id, date(2023, 9, 4))
+
+        self.assertEqual(created, 2)
+        self.assertEqual(
+            [(day, amount) for day, _, amount, _ in self.snapshots()],
+            [
+                (date(2023, 9, 1), Decimal("2")),
+                (date(2023, 9, 2), Decimal("2")),
+                (date(2023, 9, 3), Decimal("2")),
+                (date(2023, 9, 4), Decimal("3")),
+            ],
+        )
+        self.assertEqual(snapshot_user(self.user.id, date(2023, 9, 4)), 0)
+
+    def test_user_without_transactions_gets_no_snapshots(self):
+        self.assertEqual(snapshot_user(self.user.id, date(2023, 9, 4)), 0)
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "Needs row locks")
+    def test_run_and_back_dated_write_lock_the_user(self):
+        self.create_transaction(self.bitcoin, "buy", "2", "2023-09-01T10:00:00Z")
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        with CaptureQueriesContext(connection) as run:
+            snapshot_user(self.user.id, date(2023, 9, 2))
+        with CaptureQueriesContext(connection) as write:
+            client.post(
+                reverse("portfolio:transaction-list"),
+                {
+                    "crypto": "BTC",
+                    "date": "2023-09-02T00:00:00Z",
+                    "type": "buy",
+                    "amount": "1",
+                    "price": "100",
+                },
+                format="json",
+            )
+
+        self.assertIn('FROM "core_user"', run.captured_queries[0]["sql"])
+        self.assertIn("FOR UPDATE", run.captured_queries[0]["sql"])
+        user_lock = next(
+            index
+            for index, query in enumerate(write.captured_queries)
+            if 'FROM "core_user"' in query["sql"] and "FOR UPDATE" in query["sql"]
+        )
+        snapshot_delete = next(
+            index
+            for index, query in enumerate(write.captured_queries)
+            if query["sql"].startswith('DELETE FROM "core_portfoliosnapshot"')
+        )
+        self.assertLess(user_lock, snapshot_delete)
+
+
+class PortfolioHistoryTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        self.ethereum = Cryptocurrency.objects.create(name="Ethereum", symbol="ETH")
+
+    def create_snapshot(self, crypto, day, amount, value, user=None):
+        return PortfolioSnapshot.objects.create(
+            user=user or self.user,
+            crypto=crypto,
+            day=day,
+            amount=Decimal(amount),
+            value=Decimal(value),
+        )
+
+    def test_daily_history_sums_coins(self):
+        self.create_snapshot(self.bitcoin, date(2023, 9, 1), "1", "100")
+        self.create_snapshot(self.ethereum, date(2023, 9, 1), "2", "20")
+        self.create_snapshot(self.bitcoin, date(2023, 9, 2), "1", "150")
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="otherpassword"
+        )
+        self.create_snapshot(self.bitcoin, date(2023, 9, 1), "9", "900", other_user)
+
+        response = self.client.get(HISTORY_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(p["period"], Decimal(p["value"])) for p in response.data],
+            [("2023-09-01", Decimal("120")), ("2023-09-02", Decimal("150"))],
+        )
+        self.assertIsNone(response.data[0]["amount"])
+
+    def test_history_filters_by_range_and_crypto(self):
+        for day in (1, 2, 3):
+            self.create_snapshot(self.bitcoin, date(2023, 9, day), "1", "100")
+            self.create_snapshot(self.ethereum, date(2023, 9, day), str(day), "10")
+
+        response = self.client.get(
+            HISTORY_URL, {"from": "2023-09-02", "to": "2023-09-03", "crypto": "ETH"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(p["period"], Decimal(p["amount"])) for p in response.data],
+            [("2023-09-02", Decimal("2")), ("2023-09-03", Decimal("3"))],
+        )
+
+    def test_month_interval_uses_last_day_of_each_month(self):
+        self.create_snapshot(self.bitcoin, date(2023, 8, 30), "1", "100")
+        self.create_snapshot(self.bitcoin, date(2023, 8, 31), "1", "110")
+        self.create_snapshot(self.ethereum, date(2023, 8, 31), "1", "5")
+        self.create_snapshot(self.bitcoin, date(2023, 9, 15), "1", "130")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(HISTORY_URL, {"interval": "month"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(p["period"], Decimal(p["value"])) for p in response.data],
+            [("2023-08-01", Decimal("115")), ("2023-09-01", Decimal("130"))],
+        )
+
+    def test_week_interval_groups_by_monday(self):
+        # 2023-09-04 is a Monday
+        self.create_snapshot(self.bitcoin, date(2023, 9, 3), "1", "100")
+        self.create_snapshot(self.bitcoin, date(2023, 9, 4), "1", "110")
+        self.create_snapshot(self.bitcoin, date(2023, 9, 6), "1", "120")
+
+        response = self.client.get(HISTORY_URL, {"interval": "week"})
+
+        self.assertEqual(
+            [(p["period"], Decimal(p["value"])) for p in response.data],
+            [("2023-08-28", Decimal("100")), ("2023-09-04", Decimal("120"))],
+        )
+
+    def test_invalid_range_is_rejected(self):
+        response = self.client.get(
+            HISTORY_URL, {"from": "2023-09-03", "to": "2023-09-01"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_history_requires_authentication(self):
+        response = APIClient().get(HISTORY_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
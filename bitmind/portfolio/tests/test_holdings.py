@@ -0,0 +1,179 @@
+"""
+Tests for the holdings API.
+"""
+from datetime import date
+from decimal import Decimal
+
+from core.models import (Cryptocurrency, PortfolioSnapshot, PriceTick,
+                         Transaction, UserCoin)
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from portfolio.catalogue import get_catalogue
+from portfolio.snapshots import snapshot_user
+from rest_framework import status
+from rest_framework.test import APIClient
+
+HOLDINGS_URL = reverse("portfolio:holdings-list")
+
+
+class HoldingsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.coins = []
+        for index in range(5):
+            crypto = Cryptocurrency.objects.create(
+                name=f"Coin {index}", symbol=f"C{index}"
+            )
+            self.coins.append(
+                UserCoin.objects.create(user=self.user, crypto=crypto, amount=index + 1)
+            )
+        # The holdings ETag includes the catalogue digest; build it up front
+        get_catalogue()
+
+    def test_holdings_list_is_two_queries_ordered_by_amount(self):
+        # Plus the ledger version lookup for the ETag
+        with self.assertNumQueries(2):
+            response = self.client.get(HOLDINGS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [holding["crypto"] for holding in response.data],
+            ["C4", "C3", "C2", "C1", "C0"],
+        )
+        self.assertEqual(response.data[0]["name"], "Coin 4")
+        self.assertEqual(Decimal(response.data[0]["amount"]), Decimal("5"))
+        self.assertIsNone(response.data[0]["price"])
+
+    def test_holdings_with_latest_price_is_one_query(self):
+        crypto = self.coins[4].crypto
+        PriceTick.objects.create(
+            crypto=crypto, timestamp="2023-09-01T00:00:00Z", price="10"
+        )
+        PriceTick.objects.create(
+            crypto=crypto, timestamp="2023-09-02T00:00:00Z", price="12"
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(HOLDINGS_URL, {"include": "price"})
+
+        self.assertEqual(Decimal(response.data[0]["price"]), Decimal("12"))
+        self.assertIsNone(response.data[1]["price"])
+
+    def test_holdings_exclude_other_users(self):
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com",
+            password="otherpassword",
+        )
+        UserCoin.objects.create(
+            user=other_user, crypto=self.coins[0].crypto, amount=100
+        )
+
+        response = self.client.get(HOLDINGS_URL)
+
+        self.assertEqual(len(response.data), 5)
+
+
+class HoldingsAsOfTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        self.ethereum = Cryptocurrency.objects.create(name="Ethereum", symbol="ETH")
+        history = [
+            ("2023-09-01T10:00:00Z", self.bitcoin, "buy", "2.0"),
+            ("2023-09-01T12:00:00Z", self.ethereum, "buy", "5.0"),
+            ("2023-09-02T09:00:00Z", self.bitcoin, "sell", "0.5"),
+            ("2023-09-03T15:00:00Z", self.ethereum, "sell", "5.0"),
+            ("2023-09-04T08:00:00Z", self.bitcoin, "buy", "1.0"),
+        ]
+        for dated_at, crypto, type, amount in history:
+            Transaction.objects.create(
+                user=self.user,
+                crypto=crypto,
+                date=dated_at,
+                type=type,
+                amount=Decimal(amount),
+                price=Decimal("100.0"),
+            )
+        get_catalogue()
+
+    def holdings(self, as_of):
+        response = self.client.get(HOLDINGS_URL, {"as_of": as_of})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {item["crypto"]: Decimal(item["amount"]) for item in response.data}
+
+    def test_as_of_replays_history(self):
+        # Ledger version, checkpoint, then snapshot and transactions together
+        with self.assertNumQueries(3):
+            self.holdings("2023-09-01T12:00:00Z")
+
+        self.assertEqual(self.holdings("2023-08-31T00:00:00Z"), {})
+        self.assertEqual(
+            self.holdings("2023-09-01T12:00:00Z"),
+            {"BTC": Decimal("2"), "ETH": Decimal("5")},
+        )
+        self.assertEqual(
+            self.holdings("2023-09-03T15:00:00Z"), {"BTC": Decimal("1.5")}
+        )
+        self.assertEqual(
+            self.holdings("2023-09-05T00:00:00Z"), {"BTC": Decimal("2.5")}
+        )
+
+    def test_as_of_starts_from_last_snapshot(self):
+        snapshot_user(self.user.id, date(2023, 9, 2))
+        # Rows covered by the snapshot are not read again
+        Transaction.objects.filter(date__lt="2023-09-02T00:00:00Z").update(amount=99)
+
+        with self.assertNumQueries(3):
+            holdings = self.holdings("2023-09-03T16:00:00+02:00")
+
+        # 14:00 UTC, before the ETH sale
+        self.assertEqual(holdings, {"BTC": Decimal("1.5"), "ETH": Decimal("5")})
+        self.assertEqual(
+            self.holdings("2023-09-01T23:00:00Z"),
+            {"BTC": Decimal("99"), "ETH": Decimal("99")},
+        )
+
+    def test_back_dated_write_invalidates_snapshots(self):
+        snapshot_user(self.user.id, date(2023, 9, 3))
+
+        response = self.client.post(
+            reverse("portfolio:transaction-list"),
+            {
+                "crypto": "BTC",
+                "date": "2023-09-02T18:00:00Z",
+                "type": "buy",
+                "amount": "3.0",
+                "price": "100.0",
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(PortfolioSnapshot.objects.values_list("day", flat=True)),
+            {date(2023, 9, 1)},
+        )
+        self.assertEqual(
+            self.holdings("2023-09-03T00:00:00Z"),
+            {"BTC": Decimal("4.5"), "ETH": Decimal("5")},
+        )
+
+    def test_invalid_as_of_is_rejected(self):
+        for params in (
+            {"as_of": "yesterday"},
+            {"as_of": "2023-09-01T00:00:00Z", "include": "price"},
+        ):
+            response = self.client.get(HOLDINGS_URL, params)
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
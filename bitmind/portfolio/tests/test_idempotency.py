@@ -0,0 +1,177 @@
+"""
+Tests for Idempotency-Key handling on transaction writes.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from core.models import Cryptocurrency, IdempotencyKey, Transaction, UserCoin
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from portfolio.views import TransactionViewSet
+from rest_framework import status
+from rest_framework.test import APIClient
+
+TRANSACTION_URL = reverse("portfolio:transaction-list")
+
+
+def transaction_detail_url(transaction_id):
+    return reverse("portfolio:transaction-detail", args=[transaction_id])
+
+
+def serialization_failure():
+    """A wrapped driver error carrying Postgres's serialization failure code."""
+    cause = Exception("could not serialize access")
+    cause.pgcode = "40001"
+    error = OperationalError("could not serialize access")
+    error.__cause__ = cause
+    return error
+
+
+class IdempotencyKeyTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.crypto = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        self.payload = {
+            "crypto": self.crypto.symbol,
+            "date": "2023-09-01T00:00:00Z",
+            "type": "buy",
+            "amount": "1.0",
+            "price": "100.0",
+        }
+
+    def test_retried_create_is_replayed(self):
+        first = self.client.post(
+            TRANSACTION_URL, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        # Only the key lookup runs; no aggregates or UserCoin updates
+        with self.assertNumQueries(1):
+            retry = self.client.post(
+                TRANSACTION_URL, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+            )
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(UserCoin.objects.get().amount, Decimal("1.0"))
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        self.client.post(
+            TRANSACTION_URL, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        response = self.client.post(
+            TRANSACTION_URL,
+            {**self.payload, "amount": "2.0"},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="abc",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_failed_request_releases_key(self):
+        response = self.client.post(
+            TRANSACTION_URL,
+            {**self.payload, "type": "sell"},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="abc",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_crashed_write_leaves_no_claim(self):
+        with mock.patch.object(
+            TransactionViewSet, "perform_create", side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            self.client.post(
+                TRANSACTION_URL, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+            )
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.client.post(
+            TRANSACTION_URL, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_retried_delete_is_replayed(self):
+        created = self.client.post(TRANSACTION_URL, self.payload, format="json")
+        url = transaction_detail_url(created.data["id"])
+
+        first = self.client.delete(url, HTTP_IDEMPOTENCY_KEY="del")
+        retry = self.client.delete(url, HTTP_IDEMPOTENCY_KEY="del")
+
+        self.assertEqual(first.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(retry.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+    def test_keys_are_scoped_per_user(self):
+        self.client.post(
+            TRANSACTION_URL, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com",
+            password="otherpassword",
+        )
+        self.client.force_authenticate(user=other_user)
+
+        response = self.client.post(
+            TRANSACTION_URL, self.payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+
+@mock.patch("core.db.time.sleep")
+class IdempotencyKeyRetryTests(TransactionTestCase):
+    """Test conflicts rerun the claim and the write together."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+
+    def test_conflict_reruns_claim_and_write(self, patched_sleep):
+        perform_create = TransactionViewSet.perform_create
+        conflicts = [serialization_failure()]
+
+        def lose_first_conflict(view, serializer):
+            if conflicts:
+                raise conflicts.pop()
+            perform_create(view, serializer)
+
+        payload = {
+            "crypto": "BTC",
+            "date": "2023-09-01T00:00:00Z",
+            "type": "buy",
+            "amount": "1.0",
+            "price": "100.0",
+        }
+        with mock.patch.object(
+            TransactionViewSet, "perform_create", lose_first_conflict
+        ):
+            response = self.client.post(
+                TRANSACTION_URL, payload, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        patched_sleep.assert_called_once()
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+        self.assertEqual(UserCoin.objects.get().amount, Decimal("1.0"))
@@ -0,0 +1,121 @@
+"""
+Tests for the bulk transaction import.
+"""
+import json
+from decimal import Decimal
+
+from core.models import Cryptocurrency, Transaction, UserCoin
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+IMPORT_URL = reverse("portfolio:transaction-bulk-import")
+
+CSV_HEADER = "crypto,date,type,amount,price\n"
+
+
+def upload(name, content):
+    return SimpleUploadedFile(name, content.encode("utf-8"))
+
+
+class BulkImportTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+
+    def test_import_csv_updates_holdings(self):
+        content = CSV_HEADER + (
+            "BTC,2023-09-02T00:00:00Z,sell,4.0,120.0\n"
+            "BTC,2023-09-01T00:00:00Z,buy,10.0,100.0\n"
+        )
+
+        response = self.client.post(
+            IMPORT_URL, {"file": upload("history.csv", content)}, format="multipart"
+        )
+
+        # The sell is dated after the buy so the date-ordered check accepts it
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual(response.data["errors"], [])
+        self.assertEqual(
+            UserCoin.objects.get(user=self.user, crypto=self.bitcoin).amount,
+            Decimal("6.0"),
+        )
+
+    def test_import_ndjson_reports_row_errors(self):
+        rows = [
+            ("BTC", "2023-09-01T00:00:00Z", "buy", "1.0"),
+            ("XXX", "2023-09-01T00:00:00Z", "buy", "1.0"),
+            ("BTC", "2023-09-02T00:00:00Z", "sell", "5.0"),
+        ]
+        content = "".join(
+            json.dumps(
+                {
+                    "crypto": crypto,
+                    "date": date,
+                    "type": type,
+                    "amount": amount,
+                    "price": "100.0",
+                }
+            )
+            + "\n"
+            for crypto, date, type, amount in rows
+        )
+        content += "not json\n"
+
+        response = self.client.post(
+            IMPORT_URL, {"file": upload("history.ndjson", content)}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(
+            sorted(error["line"] for error in response.data["errors"]), [2, 3, 4]
+        )
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(
+            UserCoin.objects.get(user=self.user, crypto=self.bitcoin).amount,
+            Decimal("1.0"),
+        )
+
+    def test_strict_import_rolls_back_on_error(self):
+        content = CSV_HEADER + (
+            "BTC,2023-09-01T00:00:00Z,buy,10.0,100.0\n"
+            "BTC,2023-09-02T00:00:00Z,sell,15.0,100.0\n"
+        )
+
+        response = self.client.post(
+            IMPORT_URL,
+            {"file": upload("history.csv", content), "strict": True, "batch_size": 1},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Transaction.objects.count(), 0)
+        self.assertFalse(UserCoin.objects.exists())
+
+    def test_non_utf8_file_is_rejected_before_any_batch(self):
+        rows = "".join(
+            f"BTC,2023-09-01T00:00:{index % 60:02}Z,buy,1.0,100.0\n"
+            for index in range(300)
+        )
+        content = (CSV_HEADER + rows).encode("utf-8") + b"\xff\xfe,bad\n"
+
+        response = self.client.post(
+            IMPORT_URL,
+            {"file": SimpleUploadedFile("history.csv", content), "batch_size": 10},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file", response.data)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(UserCoin.objects.exists())
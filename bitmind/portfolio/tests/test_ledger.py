@@ -0,0 +1,239 @@
+"""
+Tests for the ledger version and the conditional list responses built on it.
+"""
+from io import StringIO
+
+from core.models import Cryptocurrency, PriceTick, Transaction, UserCoin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from portfolio.ledger import get_ledger_version
+from rest_framework import status
+from rest_framework.test import APIClient
+
+TRANSACTION_URL = reverse("portfolio:transaction-list")
+HOLDINGS_URL = reverse("portfolio:holdings-list")
+IMPORT_URL = reverse("portfolio:transaction-bulk-import")
+
+
+def detail_url(transaction_id):
+    return reverse("portfolio:transaction-detail", args=[transaction_id])
+
+
+class LedgerVersionTestCase(TestCase):
+    def setUp(self):
+        # Throttle buckets of an earlier test's user could be reused
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        self.data = {
+            "crypto": "BTC",
+            "date": "2023-09-01T00:00:00Z",
+            "type": "buy",
+            "amount": "2",
+            "price": "100",
+        }
+
+    def test_every_transaction_write_advances_the_version(self):
+        versions = [get_ledger_version(self.user.id)]
+
+        res = self.client.post(TRANSACTION_URL, self.data, format="json")
+        versions.append(get_ledger_version(self.user.id))
+        self.client.patch(detail_url(res.data["id"]), {"amount": "3"}, format="json")
+        versions.append(get_ledger_version(self.user.id))
+        self.client.delete(detail_url(res.data["id"]))
+        versions.append(get_ledger_version(self.user.id))
+        self.client.post(
+            IMPORT_URL,
+            {
+                "file": SimpleUploadedFile(
+                    "history.csv",
+                    b"crypto,date,type,amount,price\n"
+                    b"BTC,2023-09-01T00:00:00Z,buy,1,100\n",
+                )
+            },
+            format="multipart",
+        )
+        versions.append(get_ledger_version(self.user.id))
+
+        self.assertEqual(versions, [0, 1, 2, 3, 4])
+
+    def test_reconcile_fix_advances_the_version(self):
+        Transaction.objects.create(
+            user=self.user,
+            crypto=self.bitcoin,
+            date="2023-09-01T00:00:00Z",
+            type="buy",
+            amount=2,
+            price=100,
+        )
+
+        call_command("reconcile_holdings", "--fix", stdout=StringIO())
+        call_command("reconcile_holdings", "--fix", stdout=StringIO())
+
+        self.assertEqual(get_ledger_version(self.user.id), 1)
+
+    def test_deleting_a_coin_advances_its_holders_versions(self):
+        other_user = get_user_model().objects.create_user(email="other@example.com")
+        ether = Cryptocurrency.objects.create(name="Ether", symbol="ETH")
+        self.client.post(TRANSACTION_URL, self.data, format="json")
+        self.client.force_authenticate(user=other_user)
+        self.client.post(TRANSACTION_URL, {**self.data, "crypto": "ETH"}, format="json")
+
+        self.bitcoin.delete()
+
+        self.assertEqual(get_ledger_version(self.user.id), 2)
+        self.assertEqual(get_ledger_version(other_user.id), 1)
+        self.assertTrue(Transaction.objects.filter(crypto=ether).exists())
+
+    def test_rejected_writes_keep_the_version(self):
+        data = {**self.data, "type": "sell"}
+
+        res = self.client.post(TRANSACTION_URL, data, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_ledger_version(self.user.id), 0)
+
+
+class ConditionalListTestCase(TestCase):
+    def setUp(self):
+        # Throttle buckets of an earlier test's user could be reused
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        Transaction.objects.create(
+            user=self.user,
+            crypto=self.bitcoin,
+            date="2023-09-01T00:00:00Z",
+            type="buy",
+            amount=2,
+            price=100,
+        )
+        UserCoin.objects.create(user=self.user, crypto=self.bitcoin, amount=2)
+
+    def test_unchanged_lists_are_not_modified_after_one_query(self):
+        for url in (TRANSACTION_URL, HOLDINGS_URL):
+            etag = self.client.get(url)["ETag"]
+
+            with self.assertNumQueries(1):
+                res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(res["ETag"], etag)
+
+    def test_a_write_changes_the_etag(self):
+        urls = (TRANSACTION_URL, HOLDINGS_URL)
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+
+        self.client.post(
+            TRANSACTION_URL,
+            {
+                "crypto": "BTC",
+                "date": "2023-09-02T00:00:00Z",
+                "type": "sell",
+                "amount": "1",
+                "price": "100",
+            },
+            format="json",
+        )
+
+        for url, etag in etags.items():
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(res["ETag"], etag)
+
+    def test_etag_depends_on_the_query_but_not_its_order(self):
+        first = self.client.get(TRANSACTION_URL, {"type": "buy", "crypto": "BTC"})
+        reordered = self.client.get(f"{TRANSACTION_URL}?crypto=BTC&type=buy")
+        other = self.client.get(TRANSACTION_URL, {"type": "sell"})
+
+        self.assertEqual(first["ETag"], reordered["ETag"])
+        self.assertNotEqual(first["ETag"], other["ETag"])
+
+    def test_etags_are_per_user(self):
+        etag = self.client.get(HOLDINGS_URL)["ETag"]
+        other = get_user_model().objects.create_user(email="other@example.com")
+        self.client.force_authenticate(user=other)
+
+        res = self.client.get(HOLDINGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_renaming_a_coin_changes_the_holdings_etag(self):
+        etag = self.client.get(HOLDINGS_URL)["ETag"]
+        self.bitcoin.name = "Bitcoin Core"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bitcoin.save()
+
+        res = self.client.get(HOLDINGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]["name"], "Bitcoin Core")
+
+    def test_holdings_with_prices_are_not_versioned(self):
+        PriceTick.objects.create(
+            crypto=self.bitcoin, timestamp="2023-09-01T00:00:00Z", price="10"
+        )
+
+        res = self.client.get(HOLDINGS_URL, {"include": "price"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", res)
+
+
+@override_settings(LEDGER_CACHE={"CACHE_ALIAS": "default", "TTL": 300})
+class LedgerResponseCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        UserCoin.objects.create(user=self.user, crypto=bitcoin, amount=2)
+
+    def test_repeated_lists_are_served_from_the_cache(self):
+        first = self.client.get(HOLDINGS_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(HOLDINGS_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+
+    def test_a_write_bypasses_the_cached_copy(self):
+        self.client.get(HOLDINGS_URL)
+
+        self.client.post(
+            TRANSACTION_URL,
+            {
+                "crypto": "BTC",
+                "date": "2023-09-02T00:00:00Z",
+                "type": "buy",
+                "amount": "1",
+                "price": "100",
+            },
+            format="json",
+        )
+        res = self.client.get(HOLDINGS_URL)
+
+        self.assertEqual(res.json()[0]["amount"], "3.00000")
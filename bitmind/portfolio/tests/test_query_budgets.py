@@ -0,0 +1,89 @@
+"""
+Query count budgets of the benchmarked portfolio endpoints.
+"""
+from core import authentication
+from core.models import Cryptocurrency, Transaction, UserCoin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from portfolio.benchmarks import QUERY_BUDGETS
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+TRANSACTION_URL = reverse("portfolio:transaction-list")
+HOLDINGS_URL = reverse("portfolio:holdings-list")
+CRYPTOCURRENCY_URL = reverse("portfolio:cryptocurrency-list")
+
+
+class QueryBudgetTestCase(TransactionTestCase):
+    """
+    Each endpoint runs exactly its QUERY_BUDGETS count, with the token's
+    user id cached. A TransactionTestCase, so writes run in a real transaction rather
+    than behind the savepoints a TestCase adds.
+    """
+
+    def setUp(self):
+        cache.clear()
+        authentication._local_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        coins = [
+            Cryptocurrency.objects.create(name=f"Coin {index}", symbol=f"C{index}")
+            for index in range(5)
+        ]
+        for index in range(60):
+            Transaction.objects.create(
+                user=self.user,
+                crypto=coins[index % 5],
+                date=timezone.now(),
+                type="buy",
+                amount=1,
+                price=100,
+            )
+        for coin in coins:
+            UserCoin.objects.create(user=self.user, crypto=coin, amount=12)
+
+        # Warm the token and cryptocurrency catalogue caches
+        self.client.get(CRYPTOCURRENCY_URL)
+
+    def test_transaction_create(self):
+        data = {
+            "crypto": "C1",
+            "date": timezone.now().isoformat(),
+            "type": "buy",
+            "amount": "1",
+            "price": "100",
+        }
+        with self.assertNumQueries(QUERY_BUDGETS["transaction-create"]):
+            res = self.client.post(TRANSACTION_URL, data, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_transaction_list(self):
+        with self.assertNumQueries(QUERY_BUDGETS["transaction-list"]):
+            res = self.client.get(TRANSACTION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 50)
+
+    def test_holdings_list(self):
+        with self.assertNumQueries(QUERY_BUDGETS["holdings-list"]):
+            res = self.client.get(HOLDINGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 5)
+
+    def test_cryptocurrency_search(self):
+        with self.assertNumQueries(QUERY_BUDGETS["cryptocurrency-search"]):
+            res = self.client.get(CRYPTOCURRENCY_URL, {"search": "Coin 3"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [{"symbol": "C3", "name": "Coin 3"}])
@@ -0,0 +1,58 @@
+"""
+Tests that the portfolio access paths are planned on their composite indexes.
+"""
+from datetime import datetime, timedelta, timezone
+
+from core.models import Cryptocurrency, Transaction, UserCoin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+START = datetime(2023, 9, 1, tzinfo=timezone.utc)
+
+
+class QueryPlanTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.crypto = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        # Enough rows per user for sorting a page to cost more than reading
+        # it in order, and several users for user_id to be selective
+        users = [self.user] + [
+            get_user_model().objects.create_user(email=f"user{index}@example.com")
+            for index in range(3)
+        ]
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=user,
+                crypto=self.crypto,
+                date=START + timedelta(minutes=minute),
+                type="buy",
+                amount=1,
+                price=1,
+            )
+            for user in users
+            for minute in range(500)
+        )
+        if connection.vendor == "postgresql":
+            # Test tables are tiny, so make the planner prefer any usable index
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE core_transaction, core_usercoin")
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_transaction_list_uses_user_date_index(self):
+        queryset = Transaction.objects.filter(user=self.user).order_by("-date", "-id")
+
+        # Sliced like one keyset page of the history listing
+        self.assertUsesIndex(queryset[:51], "txn_user_date_idx")
+
+    def test_holdings_list_uses_user_amount_index(self):
+        queryset = UserCoin.objects.filter(user=self.user).order_by("-amount")
+
+        self.assertUsesIndex(queryset, "usercoin_user_amount_idx")
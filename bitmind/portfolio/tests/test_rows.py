@@ -0,0 +1,60 @@
+"""
+Tests for list responses built from .values() rows.
+"""
+from core.models import Cryptocurrency, Transaction
+from core.renderers import FastJSONRenderer
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.utils import timezone
+from portfolio.rows import SerializedRows
+from portfolio.serializers import (TransactionImportSerializer,
+                                   TransactionSerializer, UserCoinSerializer)
+from rest_framework.renderers import JSONRenderer
+
+
+class SerializedRowsTestCase(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="user@example.com")
+        bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        for date, type, amount, price in [
+            ("2023-09-01T00:00:00Z", "buy", "2", "100.5"),
+            ("2023-09-02T10:30:00.250000Z", "sell", "0.01", "26000"),
+        ]:
+            Transaction.objects.create(
+                user=user,
+                crypto=bitcoin,
+                date=date,
+                type=type,
+                amount=amount,
+                price=price,
+            )
+        self.rows = SerializedRows(TransactionSerializer)
+
+    def assert_renders_like_serializer(self):
+        queryset = Transaction.objects.order_by("id")
+        serialized = TransactionSerializer(queryset, many=True).data
+
+        represented = self.rows.represent(self.rows.queryset(queryset))
+
+        self.assertEqual(
+            FastJSONRenderer().render(represented), JSONRenderer().render(serialized)
+        )
+
+    def test_rows_render_like_the_serializer(self):
+        self.assert_renders_like_serializer()
+
+    def test_rows_render_like_the_serializer_in_another_timezone(self):
+        with timezone.override("Europe/Paris"):
+            self.assert_renders_like_serializer()
+
+    def test_columns_follow_the_serializer_fields(self):
+        self.assertEqual(
+            self.rows.columns, ["id", "crypto", "date", "type", "amount", "price"]
+        )
+
+    def test_fields_without_a_column_representation_are_rejected(self):
+        # A file upload, and a nullable decimal the serializer renders as ""
+        for serializer_class in (TransactionImportSerializer, UserCoinSerializer):
+            with self.assertRaises(ImproperlyConfigured):
+                SerializedRows(serializer_class).columns
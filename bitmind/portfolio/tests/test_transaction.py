@@ -7,6 +7,7 @@ from core.models import Cryptocurrency, Transaction, UserCoin
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
+from portfolio.serializers import TransactionSerializer
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -481,12 +482,197 @@ class ApiLogicTestCase(TestCase):
         for transaction in authenticated_user_transactions:
             self.assertIn(
                 {"crypto": transaction.crypto.symbol, "type": transaction.type},
-                response.data,
+                response.data["results"],
             )
 
         # Check that the other user's transactions are not present in the response
         for transaction in other_user_transactions:
             self.assertNotIn(
                 {"crypto": transaction["crypto"], "type": transaction["type"]},
-                response.data,
+                response.data["results"],
             )
+
+    def test_update_transaction_to_other_crypto_moves_holdings(self):
+        bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        ethereum = Cryptocurrency.objects.create(name="Ethereum", symbol="ETH")
+        payload = {
+            "crypto": bitcoin.symbol,
+            "date": "2023-09-01T00:00:00Z",
+            "type": "buy",
+            "amount": "2.0",
+            "price": "100.0",
+        }
+        response = self.client.post(TRANSACTION_URL, payload, format="json")
+
+        response_update = self.client.patch(
+            transaction_detail_url(response.data["id"]),
+            {"crypto": ethereum.symbol},
+            format="json",
+        )
+
+        self.assertEqual(response_update.status_code, status.HTTP_200_OK)
+        self.assertFalse(UserCoin.objects.filter(user=self.user, crypto=bitcoin).exists())
+        self.assertEqual(
+            UserCoin.objects.get(user=self.user, crypto=ethereum).amount, Decimal("2.0")
+        )
+
+    def test_update_sell_transaction_to_buy_transaction(self):
+        cryptocurrency = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        base = {
+            "crypto": cryptocurrency.symbol,
+            "date": "2023-09-01T00:00:00Z",
+            "price": "100.0",
+        }
+        self.client.post(
+            TRANSACTION_URL, {**base, "type": "buy", "amount": "10.0"}, format="json"
+        )
+        response_sell = self.client.post(
+            TRANSACTION_URL, {**base, "type": "sell", "amount": "4.0"}, format="json"
+        )
+        self.assertEqual(
+            UserCoin.objects.get(user=self.user, crypto=cryptocurrency).amount,
+            Decimal("6.0"),
+        )
+
+        response_update = self.client.patch(
+            transaction_detail_url(response_sell.data["id"]),
+            {"type": "buy"},
+            format="json",
+        )
+
+        self.assertEqual(response_update.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            UserCoin.objects.get(user=self.user, crypto=cryptocurrency).amount,
+            Decimal("14.0"),
+        )
+
+
+class TransactionHistoryPaginationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        self.ethereum = Cryptocurrency.objects.create(name="Ethereum", symbol="ETH")
+        # Several rows share a date so the id tie-breaker is exercised
+        dates = ["2023-09-01", "2023-09-02", "2023-09-02", "2023-09-02", "2023-09-03"]
+        self.transactions = [
+            Transaction.objects.create(
+                user=self.user,
+                crypto=self.bitcoin if index % 2 else self.ethereum,
+                date=f"{date}T00:00:00Z",
+                type="buy",
+                amount="1.0",
+                price="100.0",
+            )
+            for index, date in enumerate(dates)
+        ]
+
+    def test_cursor_pages_cover_history_once_in_order(self):
+        seen = []
+        url = f"{TRANSACTION_URL}?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            seen.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+
+        expected = Transaction.objects.order_by("-date", "-id").values_list(
+            "id", flat=True
+        )
+        self.assertEqual(seen, list(expected))
+
+    def test_previous_link_returns_preceding_page(self):
+        first = self.client.get(f"{TRANSACTION_URL}?page_size=2")
+        second = self.client.get(first.data["next"])
+
+        previous = self.client.get(second.data["previous"])
+
+        self.assertEqual(previous.data["results"], first.data["results"])
+        self.assertIsNone(previous.data["previous"])
+
+    def test_invalid_cursor_returns_not_found(self):
+        response = self.client.get(f"{TRANSACTION_URL}?cursor=bogus")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_by_date_range_and_crypto(self):
+        response = self.client.get(
+            TRANSACTION_URL,
+            {
+                "from": "2023-09-02T00:00:00Z",
+                "to": "2023-09-02T23:59:59Z",
+                "crypto": self.bitcoin.symbol,
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [self.transactions[3].id, self.transactions[1].id],
+        )
+
+    def test_inverted_date_range_is_rejected(self):
+        response = self.client.get(
+            TRANSACTION_URL,
+            {"from": "2023-09-03T00:00:00Z", "to": "2023-09-01T00:00:00Z"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TransactionListSerializerTestCase(TestCase):
+    def setUp(self):
+        for symbol in ("BTC", "ETH", "SOL"):
+            Cryptocurrency.objects.create(name=symbol, symbol=symbol)
+
+    def row(self, crypto, **overrides):
+        return {
+            "crypto": crypto,
+            "date": "2023-09-01T00:00:00Z",
+            "type": "buy",
+            "amount": "1.0",
+            "price": "100.0",
+            **overrides,
+        }
+
+    def test_many_rows_validate_with_one_query(self):
+        rows = [self.row(symbol) for symbol in ("BTC", "ETH", "SOL") * 20]
+        serializer = TransactionSerializer(data=rows, many=True)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(len(serializer.validated_data), 60)
+        self.assertEqual(serializer.validated_data[1]["crypto"].symbol, "ETH")
+
+    def test_errors_are_reported_per_row(self):
+        rows = [
+            self.row("BTC"),
+            self.row("XXX"),
+            self.row("ETH", date="2999-01-01T00:00:00Z"),
+            self.row(["BTC"]),
+        ]
+
+        results = TransactionSerializer(many=True).validate_each(rows)
+
+        self.assertEqual(results[0][1], {})
+        self.assertEqual(
+            results[1][1]["crypto"], ["Invalid crypto. This crypto does not exist."]
+        )
+        self.assertEqual(results[2][1]["date"], ["Date cannot be in the future."])
+        self.assertIn("crypto", results[3][1])
+        self.assertEqual(
+            [data is None for data, _ in results], [False, True, True, True]
+        )
+
+    def test_single_transaction_loads_crypto_once(self):
+        serializer = TransactionSerializer(data=self.row("BTC"))
+
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+        self.assertFalse(TransactionSerializer(data=self.row("XXX")).is_valid())
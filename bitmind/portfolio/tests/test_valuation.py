@@ -0,0 +1,114 @@
+"""
+Tests for the portfolio valuation API.
+"""
+from decimal import Decimal
+
+from core.models import Cryptocurrency, PriceTick, Transaction
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+VALUATION_URL = reverse("portfolio:valuation")
+
+
+class PortfolioValuationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+        )
+        self.client.force_authenticate(user=self.user)
+        self.bitcoin = Cryptocurrency.objects.create(name="Bitcoin", symbol="BTC")
+        self.ethereum = Cryptocurrency.objects.create(name="Ethereum", symbol="ETH")
+
+    def create_transaction(self, crypto, type, amount, price, user=None):
+        return Transaction.objects.create(
+            user=user or self.user,
+            crypto=crypto,
+            date="2023-09-01T00:00:00Z",
+            type=type,
+            amount=Decimal(amount),
+            price=Decimal(price),
+        )
+
+    def test_valuation_computes_cost_basis_and_pnl(self):
+        self.create_transaction(self.bitcoin, "buy", "2", "100")
+        self.create_transaction(self.bitcoin, "buy", "2", "200")
+        self.create_transaction(self.bitcoin, "sell", "1", "300")
+        PriceTick.objects.create(
+            crypto=self.bitcoin, timestamp="2023-09-01T00:00:00Z", price="250"
+        )
+        PriceTick.objects.create(
+            crypto=self.bitcoin, timestamp="2023-09-02T00:00:00Z", price="400"
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(VALUATION_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        (bitcoin,) = response.data["holdings"]
+        self.assertEqual(Decimal(bitcoin["amount"]), Decimal("3"))
+        self.assertEqual(Decimal(bitcoin["price"]), Decimal("400"))
+        self.assertEqual(Decimal(bitcoin["average_cost"]), Decimal("150"))
+        self.assertEqual(Decimal(bitcoin["market_value"]), Decimal("1200"))
+        self.assertEqual(Decimal(bitcoin["unrealized_pnl"]), Decimal("750"))
+        self.assertEqual(Decimal(bitcoin["realized_pnl"]), Decimal("150"))
+        self.assertEqual(
+            Decimal(response.data["totals"]["market_value"]), Decimal("1200")
+        )
+
+    def test_valuation_without_price_leaves_market_figures_empty(self):
+        self.create_transaction(self.ethereum, "buy", "1", "10")
+
+        response = self.client.get(VALUATION_URL)
+
+        (ethereum,) = response.data["holdings"]
+        self.assertIsNone(ethereum["market_value"])
+        self.assertIsNone(ethereum["unrealized_pnl"])
+        self.assertEqual(Decimal(ethereum["cost_basis"]), Decimal("10"))
+
+    def test_valuation_only_includes_own_transactions(self):
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com",
+            password="otherpassword",
+        )
+        self.create_transaction(self.bitcoin, "buy", "1", "100", user=other_user)
+
+        response = self.client.get(VALUATION_URL)
+
+        self.assertEqual(response.data["holdings"], [])
+        self.assertEqual(Decimal(response.data["totals"]["market_value"]), 0)
+
+    def test_valuation_with_fifo_method(self):
+        self.create_transaction(self.bitcoin, "buy", "2", "100")
+        Transaction.objects.create(
+            user=self.user,
+            crypto=self.bitcoin,
+            date="2023-09-02T00:00:00Z",
+            type="buy",
+            amount=Decimal("2"),
+            price=Decimal("200"),
+        )
+        Transaction.objects.create(
+            user=self.user,
+            crypto=self.bitcoin,
+            date="2023-09-03T00:00:00Z",
+            type="sell",
+            amount=Decimal("3"),
+            price=Decimal("300"),
+        )
+
+        response = self.client.get(VALUATION_URL, {"method": "fifo"})
+
+        (bitcoin,) = response.data["holdings"]
+        self.assertEqual(Decimal(bitcoin["realized_pnl"]), Decimal("500"))
+        self.assertEqual(Decimal(bitcoin["cost_basis"]), Decimal("200"))
+        self.assertEqual(Decimal(bitcoin["average_cost"]), Decimal("200"))
+
+    def test_valuation_with_unknown_method_fails(self):
+        response = self.client.get(VALUATION_URL, {"method": "hifo"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
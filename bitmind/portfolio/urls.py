@@ -2,7 +2,7 @@
 URL mappings for the recipe app.
 """
 from django.urls import include, path
-from portfolio import views
+from portfolio import async_views, views
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
@@ -25,4 +25,32 @@ app_name = "portfolio"
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("valuation/", views.PortfolioValuationView.as_view(), name="valuation"),
+    path("history/", views.PortfolioHistoryView.as_view(), name="history"),
+    path("analytics/", views.PortfolioAnalyticsView.as_view(), name="analytics"),
+    path(
+        "async/transaction/",
+        async_views.AsyncTransactionListView.as_view(),
+        name="async-transaction-list",
+    ),
+    path(
+        "async/holdings/",
+        async_views.AsyncHoldingsListView.as_view(),
+        name="async-holdings-list",
+    ),
+    path(
+        "async/holdings/<int:pk>/",
+        async_views.AsyncHoldingsDetailView.as_view(),
+        name="async-holdings-detail",
+    ),
+    path(
+        "async/cryptocurrency/",
+        async_views.AsyncCryptocurrencyListView.as_view(),
+        name="async-cryptocurrency-list",
+    ),
+    path(
+        "async/cryptocurrency/<str:pk>/",
+        async_views.AsyncCryptocurrencyDetailView.as_view(),
+        name="async-cryptocurrency-detail",
+    ),
 ]
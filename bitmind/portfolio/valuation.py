@@ -0,0 +1,105 @@
+"""
+Portfolio valuation from the transaction history and the latest stored prices.
+"""
+from decimal import Decimal
+
+from core.models import PriceTick, Transaction
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum
+from portfolio.cost_basis import user_cost_basis
+
+MONEY = DecimalField(max_digits=40, decimal_places=10)
+
+
+def latest_price(crypto_ref="crypto_id"):
+    """Subquery for the most recent PriceTick price of the referenced coin."""
+    return Subquery(
+        PriceTick.objects.filter(crypto_id=OuterRef(crypto_ref))
+        .order_by("-timestamp")
+        .values("price")[:1]
+    )
+
+
+def value_portfolio(user, method=None):
+    """
+    Value every coin the user has traded with one grouped query.
+
+    By default cost basis uses the weighted average price of all buys, realized
+    P&L is sell proceeds minus that average cost, and unrealized P&L marks the
+    remaining amount to the latest PriceTick. Passing a lot matching method
+    (fifo, lifo or average) replaces the cost basis and realized P&L with the
+    result of replaying the history in date order. Coins without a stored
+    price get None for their price-dependent figures.
+    """
+    rows = (
+        Transaction.objects.filter(user=user)
+        .values("crypto_id")
+        .annotate(
+            name=F("crypto__name"),
+            bought=Sum("amount", filter=Q(type="buy")),
+            bought_cost=Sum(
+                F("amount") * F("price"), filter=Q(type="buy"), output_field=MONEY
+            ),
+            sold=Sum("amount", filter=Q(type="sell")),
+            sold_proceeds=Sum(
+                F("amount") * F("price"), filter=Q(type="sell"), output_field=MONEY
+            ),
+            price=latest_price(),
+        )
+        .order_by("crypto_id")
+    )
+
+    holdings = [_value_row(row) for row in rows]
+    if method is not None:
+        _apply_lot_matching(holdings, user_cost_basis(user, method))
+    totals = {
+        key: sum(
+            (holding[key] for holding in holdings if holding[key] is not None),
+            Decimal(0),
+        )
+        for key in ("market_value", "cost_basis", "unrealized_pnl", "realized_pnl")
+    }
+    return {"holdings": holdings, "totals": totals}
+
+
+def _value_row(row):
+    bought = row["bought"] or Decimal(0)
+    sold = row["sold"] or Decimal(0)
+    amount = bought - sold
+    average_cost = row["bought_cost"] / bought if bought else None
+    price = row["price"]
+
+    cost_basis = amount * average_cost if average_cost is not None else None
+    realized_pnl = (
+        (row["sold_proceeds"] or Decimal(0)) - sold * average_cost
+        if average_cost is not None
+        else None
+    )
+    market_value = amount * price if price is not None else None
+    unrealized_pnl = (
+        market_value - cost_basis
+        if market_value is not None and cost_basis is not None
+        else None
+    )
+    return {
+        "crypto": row["crypto_id"],
+        "name": row["name"],
+        "amount": amount,
+        "price": price,
+        "average_cost": average_cost,
+        "cost_basis": cost_basis,
+        "market_value": market_value,
+        "unrealized_pnl": unrealized_pnl,
+        "realized_pnl": realized_pnl,
+    }
+
+
+def _apply_lot_matching(holdings, cost_bases):
+    for holding in holdings:
+        cost_basis = cost_bases[holding["crypto"]]
+        holding["cost_basis"] = cost_basis.cost
+        holding["realized_pnl"] = cost_basis.realized
+        holding["average_cost"] = (
+            cost_basis.cost / holding["amount"] if holding["amount"] else None
+        )
+        if holding["market_value"] is not None:
+            holding["unrealized_pnl"] = holding["market_value"] - cost_basis.cost
@@ -1,110 +1,388 @@
+import io
+
+from core.authentication import CachedTokenAuthentication
+from core.db import atomic_with_retry
 from core.models import Cryptocurrency, Transaction, UserCoin
 from core.permissions import ReadOnlyOrAdminOnly
-from django.db import transaction as db_transaction
-from django.db.models import Sum
-from portfolio.pagination import StandardResultsSetPagination
-from portfolio.serializers import (CryptocurrencySerializer,
-                                   TransactionSerializer, UserCoinSerializer)
-from rest_framework import serializers, viewsets
-from rest_framework.authentication import TokenAuthentication
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import (OpenApiParameter,
+                                   PolymorphicProxySerializer, extend_schema,
+                                   extend_schema_view)
+from portfolio.analytics import portfolio_analytics
+from portfolio.catalogue import get_catalogue
+from portfolio.export import (CSVExportRenderer, NDJSONExportRenderer,
+                              stream_export)
+from portfolio.filters import TransactionFilter
+from portfolio.idempotency import IDEMPOTENCY_HEADER, IdempotentWriteMixin
+from portfolio.importer import TransactionImporter, guess_format, read_rows
+from portfolio.ledger import LedgerVersionedMixin, bump_ledger_version
+from portfolio.pagination import (StandardResultsSetPagination,
+                                  TransactionCursorPagination)
+from portfolio.rows import SerializedRows
+from portfolio.serializers import (AnalyticsQuerySerializer,
+                                   CryptocurrencySerializer,
+                                   HistoryPointSerializer,
+                                   HistoryQuerySerializer,
+                                   HoldingAsOfSerializer,
+                                   HoldingsListQuerySerializer,
+                                   HoldingsQuerySerializer,
+                                   PortfolioAnalyticsSerializer,
+                                   PortfolioValuationSerializer,
+                                   TransactionImportSerializer,
+                                   TransactionSerializer, UserCoinSerializer,
+                                   ValuationQuerySerializer)
+from portfolio.snapshots import (holdings_as_of, invalidate_snapshots,
+                                 portfolio_history)
+from portfolio.valuation import latest_price, value_portfolio
+from rest_framework import generics, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.filters import SearchFilter
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+TRANSACTION_ROWS = SerializedRows(TransactionSerializer)
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    IDEMPOTENCY_HEADER,
+    type=str,
+    location=OpenApiParameter.HEADER,
+    required=False,
+    description="Retrying a write with the same key replays the first response",
+)
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    create=extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER]),
+    update=extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER]),
+    partial_update=extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER]),
+    destroy=extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER]),
+)
+class TransactionViewSet(
+    LedgerVersionedMixin, IdempotentWriteMixin, viewsets.ModelViewSet
+):
     queryset = Transaction.objects.all().select_related("user", "crypto")
     serializer_class = TransactionSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionCursorPagination
+    filter_backends = [TransactionFilter]
+    # Set per action for ScopedSlidingWindowThrottle
+    throttle_scope = None
+
+    # Writes lock the transaction row (for updates and deletes) and then the
+    # affected UserCoin rows in a stable order, so concurrent writes for the
+    # same (user, crypto) are serialized; conflicts the database still aborts
+    # are retried a bounded number of times by atomic_with_retry.
 
     def perform_create(self, serializer):
-        with db_transaction.atomic():
+        def create():
+            # A failed attempt leaves its rolled back instance behind
+            serializer.instance = None
             transaction = serializer.save(user=self.request.user)
-            self.update_user_coin(transaction)
-            if self.check_negative_holdings(transaction):
-                raise serializers.ValidationError(
-                    "Transaction would result in negative holdings."
-                )
+            self.apply_holdings_deltas(
+                {transaction.crypto_id: transaction.signed_amount},
+                "Transaction would result in negative holdings.",
+            )
+            invalidate_snapshots(self.request.user.id, [transaction.date])
+            bump_ledger_version([self.request.user.id])
+
+        atomic_with_retry(create)
 
     def perform_update(self, serializer):
-        with db_transaction.atomic():
+        def update():
+            # Revert what is stored now, not what was read before the lock
+            previous = self.lock_transaction(serializer.instance)
+            if previous is None:
+                raise NotFound()
+            deltas = {previous.crypto_id: -previous.signed_amount}
+            previous_date = previous.date
+            serializer.instance = previous
             transaction = serializer.save(user=self.request.user)
-            self.update_user_coin(transaction)
-            if self.check_negative_holdings(transaction):
-                raise serializers.ValidationError(
-                    "Transaction would result in negative holdings."
-                )
+            deltas[transaction.crypto_id] = (
+                deltas.get(transaction.crypto_id, 0) + transaction.signed_amount
+            )
+            self.apply_holdings_deltas(
+                deltas, "Transaction would result in negative holdings."
+            )
+            invalidate_snapshots(
+                self.request.user.id, [previous_date, transaction.date]
+            )
+            bump_ledger_version([self.request.user.id])
+
+        atomic_with_retry(update)
 
     def perform_destroy(self, instance):
-        with db_transaction.atomic():
-            instance.delete()
-            self.update_user_coin(instance)
-            if self.check_negative_holdings(instance):
-                raise serializers.ValidationError(
-                    "Deleting this 'buy' transaction would result in negative holdings."
-                )
-
-    def update_user_coin(self, transaction):
-        user = self.request.user
-        crypto = transaction.crypto
-        total_amount = self.calculate_user_crypto_total(transaction)
-
-        if total_amount == 0:
-            UserCoin.objects.filter(user=user, crypto=crypto).delete()
-        else:
-            user_coin, _ = UserCoin.objects.get_or_create(
-                user=user,
-                crypto=crypto,
-                defaults={"amount": total_amount},
+        def destroy():
+            locked = self.lock_transaction(instance)
+            if locked is None:
+                # Already deleted by a concurrent (retried) request
+                return
+            deltas = {locked.crypto_id: -locked.signed_amount}
+            locked.delete()
+            self.apply_holdings_deltas(
+                deltas,
+                "Deleting this 'buy' transaction would result in negative holdings.",
+            )
+            invalidate_snapshots(self.request.user.id, [locked.date])
+            bump_ledger_version([self.request.user.id])
+
+        atomic_with_retry(destroy)
+
+    def lock_transaction(self, instance):
+        return (
+            Transaction.objects.select_for_update()
+            .filter(pk=instance.pk, user=self.request.user)
+            .first()
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+        serializer_class=TransactionImportSerializer,
+        throttle_scope="import",
+    )
+    def bulk_import(self, request):
+        """Import a CSV or JSON lines file of transactions for the user."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        file_format = serializer.validated_data.get("file_format") or guess_format(
+            upload.name
+        )
+
+        importer = TransactionImporter(
+            request.user,
+            batch_size=serializer.validated_data["batch_size"],
+            strict=serializer.validated_data["strict"],
+        )
+        # The csv module handles line endings itself, including inside quotes
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+        report = importer.run(read_rows(stream, file_format))
+        return Response(report, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "format",
+                type=str,
+                enum=["csv", "ndjson"],
+                description="Export format, CSV when omitted",
             )
-            user_coin.amount = total_amount
-            user_coin.save()
-
-    def check_negative_holdings(self, transaction):
-        return self.calculate_user_crypto_total(transaction) < 0
-
-    def calculate_user_crypto_total(self, transaction):
-        user = self.request.user
-        crypto = transaction.crypto
-        total_bought = (
-            self.get_queryset()
-            .filter(user=user, crypto=crypto, type="buy")
-            .aggregate(Sum("amount"))
-            .get("amount__sum")
-            or 0
+        ],
+        responses={
+            (200, "text/csv"): OpenApiTypes.STR,
+            (200, "application/x-ndjson"): OpenApiTypes.STR,
+        },
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=[CSVExportRenderer, NDJSONExportRenderer],
+        throttle_scope="export",
+    )
+    def export(self, request):
+        """Stream the user's full (filtered) history, oldest first."""
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .select_related(None)
+            .order_by("date", "id")
         )
-        total_sold = (
-            self.get_queryset()
-            .filter(user=user, crypto=crypto, type="sell")
-            .aggregate(Sum("amount"))
-            .get("amount__sum")
-            or 0
+        file_format = request.accepted_renderer.format
+        response = StreamingHttpResponse(
+            stream_export(queryset, file_format),
+            content_type=request.accepted_renderer.media_type,
         )
-        return total_bought - total_sold
+        response["Content-Disposition"] = (
+            f'attachment; filename="transactions.{file_format}"'
+        )
+        return response
+
+    def apply_holdings_deltas(self, deltas, error_message):
+        """
+        Apply signed per-crypto deltas to the user's holdings ledger.
+        Rows are locked in a stable order so concurrent writers touching the
+        same coins cannot deadlock; a negative result aborts the transaction.
+        """
+        for crypto_id in sorted(deltas):
+            delta = deltas[crypto_id]
+            if not delta:
+                continue
+            total = UserCoin.objects.apply_delta(self.request.user, crypto_id, delta)
+            if total < 0:
+                raise serializers.ValidationError(error_message)
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned(request, self.list_rows, *args, **kwargs)
+
+    def list_rows(self, request, *args, **kwargs):
+        # Rows are read with .values() instead of through serializer instances
+        queryset = TRANSACTION_ROWS.queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(TRANSACTION_ROWS.represent(page))
 
     def get_queryset(self):
         # Retrieve all UserCoin objects for the authenticated user
-        return self.queryset.filter(user=self.request.user).order_by("-date")
+        return self.queryset.filter(user=self.request.user).order_by("-date", "-id")
 
 
-class UserHoldingsViewSet(viewsets.ReadOnlyModelViewSet):
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[HoldingsListQuerySerializer],
+        responses=PolymorphicProxySerializer(
+            component_name="Holdings",
+            serializers=[UserCoinSerializer, HoldingAsOfSerializer],
+            resource_type_field_name=None,
+            many=True,
+        ),
+    ),
+    retrieve=extend_schema(parameters=[HoldingsQuerySerializer]),
+)
+class UserHoldingsViewSet(LedgerVersionedMixin, viewsets.ReadOnlyModelViewSet):
     """View that returns all the user's Coin holdings"""
 
-    queryset = Transaction.objects.all().select_related("user", "crypto")
+    queryset = UserCoin.objects.all().select_related("crypto")
     serializer_class = UserCoinSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def ledger_versioned(self, request):
+        # Latest prices move without the ledger
+        return request.query_params.get("include") != "price"
+
+    def ledger_dependencies(self, request):
+        # Holdings embed coin names, which change with the catalogue
+        return get_catalogue().digest
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned(request, self.list_holdings, *args, **kwargs)
+
+    def list_holdings(self, request, *args, **kwargs):
+        params = HoldingsListQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        if "as_of" not in params.validated_data:
+            return super().list(request, *args, **kwargs)
+
+        # Replayed from the nearest snapshot rather than read from the ledger
+        holdings = holdings_as_of(request.user, params.validated_data["as_of"])
+        serializer = HoldingAsOfSerializer(
+            [
+                {"crypto": crypto_id, "name": name, "amount": amount}
+                for crypto_id, name, amount in holdings
+            ],
+            many=True,
+        )
+        return Response(serializer.data)
+
     def get_queryset(self):
         # Retrieve all UserCoin objects for the authenticated user
-        return self.queryset.filter(user=self.request.user).order_by("-amount")
+        queryset = self.queryset.filter(user=self.request.user).order_by("-amount")
+        params = HoldingsQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        if params.validated_data.get("include") == "price":
+            queryset = queryset.annotate(latest_price=latest_price())
+        return queryset
 
 
 class CryptocurrencyViewSet(viewsets.ModelViewSet):
     queryset = Cryptocurrency.objects.all().order_by("pk")
     serializer_class = CryptocurrencySerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [ReadOnlyOrAdminOnly]
     pagination_class = StandardResultsSetPagination
     filter_backends = [SearchFilter]
-    search_fields = ["name"]
+    search_fields = ["name", "symbol"]
+
+    def list(self, request, *args, **kwargs):
+        # Served from the in-memory catalogue; clients revalidate with
+        # If-None-Match / If-Modified-Since and get a 304 when nothing changed
+        catalogue = get_catalogue()
+        etag = catalogue.etag(request.get_full_path())
+        last_modified = int(catalogue.last_modified.timestamp())
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+
+        entries = catalogue.search(
+            request.query_params.get(api_settings.SEARCH_PARAM, "")
+        )
+        # Catalogue entries are already CryptocurrencySerializer's output
+        page = self.paginate_queryset(entries)
+        response = self.get_paginated_response(page)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class PortfolioValuationView(generics.GenericAPIView):
+    """View that values the user's portfolio at the latest stored prices"""
+
+    serializer_class = PortfolioValuationSerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "valuation"
+
+    @extend_schema(parameters=[ValuationQuerySerializer])
+    def get(self, request, *args, **kwargs):
+        params = ValuationQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        valuation = value_portfolio(request.user, params.validated_data.get("method"))
+        serializer = self.get_serializer(valuation)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class PortfolioHistoryView(generics.GenericAPIView):
+    """View that charts the user's portfolio value from the daily snapshots"""
+
+    serializer_class = HistoryPointSerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "history"
+
+    @extend_schema(parameters=[HistoryQuerySerializer])
+    def get(self, request, *args, **kwargs):
+        params = HistoryQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        points = portfolio_history(
+            request.user,
+            start=params.validated_data.get("from"),
+            end=params.validated_data.get("to"),
+            interval=params.validated_data["interval"],
+            crypto=params.validated_data.get("crypto"),
+        )
+        serializer = self.get_serializer(points, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class PortfolioAnalyticsView(generics.GenericAPIView):
+    """View that aggregates the user's trading activity per coin and period"""
+
+    serializer_class = PortfolioAnalyticsSerializer
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "analytics"
+
+    @extend_schema(parameters=[AnalyticsQuerySerializer])
+    def get(self, request, *args, **kwargs):
+        params = AnalyticsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        analytics = portfolio_analytics(
+            request.user,
+            interval=params.validated_data["interval"],
+            start=params.validated_data.get("from"),
+            end=params.validated_data.get("to"),
+            crypto=params.validated_data.get("crypto"),
+        )
+        serializer = self.get_serializer(analytics)
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1,7 +1,8 @@
 """
 Views for the user API.
 """
-from rest_framework import authentication, generics, permissions
+from core.authentication import CachedTokenAuthentication
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 from user.serializers import AuthTokenSerializer, UserSerializer
@@ -24,7 +25,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
 
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):